@@ -15,8 +15,12 @@ class ConfiguracionSistema:
                 'fecha_registro': None
             },
             'monitoreo': {
-                'intervalo_ventana_segundos': 60,  # Cada 60 segundos como solicitaste
+                'intervalo_ventana_segundos': 60,  # Intervalo máximo entre muestras de ventana
+                'intervalo_ventana_min_segundos': 1,  # Intervalo tras un cambio de ventana
+                'eventos_ventana': True,  # Usar hooks de cambio de ventana del SO si existen
                 'tiempo_inactividad_minutos': 10,  # 10 minutos para marcar inactividad
+                'backend_inactividad': 'auto',  # 'auto', 'so' (consulta al sistema) o 'hooks' (pynput)
+                'puntuacion_foco': False,  # Intensidad de foco por minuto: instala los hooks de pynput (un callback por tecla o movimiento) aunque la inactividad se consulte al SO
                 'registro_detallado': True
             },
             'pomodoro': {
@@ -24,18 +28,21 @@ class ConfiguracionSistema:
                 'tiempo_descanso_corto_minutos': 5,
                 'tiempo_descanso_largo_minutos': 15,
                 'ciclos_hasta_descanso_largo': 4,
+                'modo_adaptativo': False,  # Ajustar duraciones según el rendimiento histórico por hora
                 'notificaciones_activas': True,
                 'sonidos_activos': True
             },
             'objetivos': {
                 'recordatorio_inicio_dia': True,
-                'mostrar_progreso_continuo': True
+                'mostrar_progreso_continuo': True,
+                'avance_automatico': True
             },
             'reportes': {
                 'enviar_a_api': False,
                 'url_api': '',
                 'guardar_local': True,
-                'hora_resumen_diario': '18:00'
+                'hora_resumen_diario': '18:00',
+                'procesos_pdf': 2
             },
             'interfaz': {
                 'modo_tray': True,
@@ -9,15 +9,18 @@ import pystray
 from pystray import MenuItem as item
 from PIL import Image, ImageDraw
 from config import config_sistema
-from objetivos.gestor_objetivos import GestorObjetivos
+from objetivos.gestor_objetivos import obtener_gestor_objetivos
 from reportes.resumen_diario import ResumenDiario
+from reportes.trabajos import obtener_servicio_reportes
 
 class TrayIcon:
     def __init__(self, sistema_principal):
         self.sistema_principal = sistema_principal
         self.icon = None
-        self.gestor_objetivos = GestorObjetivos()
+        self.gestor_objetivos = obtener_gestor_objetivos()
         self.resumen_diario = ResumenDiario()
+        self.servicio_reportes = obtener_servicio_reportes()
+        self.servicio_reportes.eventos.suscribir('reporte_terminado', self._al_terminar_reporte)
         self.nombre_usuario = config_sistema.obtener_nombre_usuario()
         
     def crear_imagen_icono(self):
@@ -51,6 +54,8 @@ class TrayIcon:
             pystray.Menu.SEPARATOR,
             item("📈 Resumen del Día", self.mostrar_resumen_dia),
             item("📋 Estadísticas Rápidas", self.mostrar_estadisticas),
+            item("📄 Reporte PDF del Día", self.generar_reporte_dia),
+            item("📄 Reporte PDF Semanal", self.generar_reporte_semana),
             pystray.Menu.SEPARATOR,
             item("🎨 Personalización", self.abrir_personalizacion),
             item("⚙️ Configuración", self.abrir_configuracion),
@@ -213,7 +218,7 @@ El temporizador Pomodoro no está funcionando.
                 config_texto = f"""👤 Usuario: {self.nombre_usuario}
 
 ⚙️ CONFIGURACIONES ACTUALES:
-📊 Monitoreo cada: 60 segundos
+📊 Monitoreo de ventanas: adaptativo (1-60 segundos)
 💤 Inactividad tras: 10 minutos
 🍅 Pomodoro: 25/5/15 minutos
 🔔 Notificaciones: Activas
@@ -331,6 +336,27 @@ Nada se envía a internet sin tu autorización.
         from datetime import datetime
         return datetime.now().strftime("%d/%m/%Y")
     
+    def generar_reporte_dia(self, icon, item):
+        """Encola el reporte PDF de hoy (se genera en otro proceso y se avisa al terminar)"""
+        self._solicitar_reporte('diario')
+    
+    def generar_reporte_semana(self, icon, item):
+        """Encola el reporte PDF de los últimos 7 días"""
+        self._solicitar_reporte('semanal')
+    
+    def _solicitar_reporte(self, tipo):
+        try:
+            self.servicio_reportes.solicitar(tipo)
+            print(f"📄 Reporte {tipo} en preparación...")
+        except Exception as e:
+            self.mostrar_mensaje_error("Error", f"No se pudo solicitar el reporte:\n{e}")
+    
+    def _al_terminar_reporte(self, evento, trabajo):
+        if trabajo['estado'] == 'completado':
+            self.mostrar_mensaje_info("📄 Reporte PDF", f"Reporte {trabajo['tipo']} listo:\n{trabajo['ruta']}")
+        elif trabajo['estado'] == 'error':
+            self.mostrar_mensaje_error("Error", f"No se pudo generar el reporte {trabajo['tipo']}:\n{trabajo['error']}")
+    
     def mostrar_mensaje_info(self, titulo, mensaje):
         """Muestra un mensaje informativo"""
         def mostrar():
@@ -353,6 +379,34 @@ Nada se envía a internet sin tu autorización.
         hilo_mensaje = threading.Thread(target=mostrar, daemon=True)
         hilo_mensaje.start()
     
+    def conectar_eventos(self, pomodoro, gestor_objetivos):
+        """Suscribe el tooltip a los eventos del Pomodoro y de los objetivos: se actualiza solo cuando algo cambia"""
+        self._pomodoro = pomodoro
+        self._gestor_tooltip = gestor_objetivos
+        pomodoro.eventos.suscribir('*', self._al_cambiar_estado)
+        gestor_objetivos.eventos.suscribir('*', self._al_cambiar_estado)
+        self._refrescar_tooltip()
+    
+    def _al_cambiar_estado(self, evento, **datos):
+        self._refrescar_tooltip()
+    
+    def _refrescar_tooltip(self):
+        """Recalcula el tooltip a partir del estado del Pomodoro y los objetivos de hoy"""
+        try:
+            estado_pomodoro = self._pomodoro.obtener_estado()
+            if estado_pomodoro['activo']:
+                fase = "Trabajo" if estado_pomodoro['fase'] == "trabajo" else "Descanso"
+                tiempo = estado_pomodoro.get('tiempo_restante', '')
+                pausa = " (pausa)" if estado_pomodoro.get('pausado') else ""
+                mensaje = f"Pomodoro: {fase} {tiempo}{pausa}"
+            else:
+                objetivos = len(self._gestor_tooltip.obtener_objetivos_hoy())
+                mensaje = f"Activo - {objetivos} objetivos hoy"
+            
+            self.actualizar_tooltip(mensaje)
+        except Exception:
+            pass
+    
     def actualizar_tooltip(self, mensaje):
         """Actualiza el tooltip del icono de bandeja"""
         if self.icon:
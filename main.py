@@ -1,31 +1,50 @@
 # main.py - Controlador principal del sistema de monitoreo
 
+import multiprocessing
 import threading
 import time
 import sys
 import os
 from datetime import datetime
 
-# Verificar primer uso y configurar sistema
-print("🔧 Verificando configuración del sistema...")
-from setup_inicial import verificar_y_configurar_primer_uso
-from config import config_sistema
-
-# Si es primer uso, mostrar configuración inicial
-if not verificar_y_configurar_primer_uso():
-    print("❌ Configuración inicial cancelada. Saliendo...")
-    sys.exit(0)
-
-# Importar módulos del sistema después de la configuración
-from monitor.logger import inicializar_log, registrar_evento
-from monitor.inactividad import iniciar_monitoreo_inactividad
-from monitor.ventana_activa import MonitorVentanas
-from pomodoro.temporizador import PomodoroTimer
-from pomodoro.notificador import NotificadorPomodoro
-from objetivos.gestor_objetivos import GestorObjetivos
-from storage.database import inicializar_db
-from reportes.resumen_diario import ResumenDiario, programar_resumen_automatico
-from interfaz.tray_icon import TrayIcon
+def preparar_sistema():
+    """
+    Verifica el primer uso e importa los módulos del sistema
+    
+    Se llama desde main() y no al importar este archivo: los procesos de reportes
+    (spawn) reimportan el script principal y no deben repetir la configuración
+    inicial ni cargar toda la aplicación.
+    
+    Returns:
+        bool: False si el usuario canceló la configuración inicial
+    """
+    global config_sistema, inicializar_log, registrar_evento, iniciar_monitoreo_inactividad
+    global suscribir_inactividad, MonitorVentanas, PomodoroTimer, despachador, obtener_gestor_objetivos
+    global AvanceAutomatico, inicializar_db, ResumenDiario, programar_resumen_automatico
+    global obtener_servicio_reportes, TrayIcon
+    
+    # Verificar primer uso y configurar sistema
+    print("🔧 Verificando configuración del sistema...")
+    from setup_inicial import verificar_y_configurar_primer_uso
+    from config import config_sistema
+    
+    # Si es primer uso, mostrar configuración inicial
+    if not verificar_y_configurar_primer_uso():
+        return False
+    
+    # Importar módulos del sistema después de la configuración
+    from monitor.logger import inicializar_log, registrar_evento
+    from monitor.inactividad import iniciar_monitoreo_inactividad, suscribir_inactividad
+    from monitor.ventana_activa import MonitorVentanas
+    from pomodoro.temporizador import PomodoroTimer
+    from pomodoro.despachador import despachador
+    from objetivos.gestor_objetivos import obtener_gestor_objetivos
+    from objetivos.reglas import AvanceAutomatico
+    from storage.database import inicializar_db
+    from reportes.resumen_diario import ResumenDiario, programar_resumen_automatico
+    from reportes.trabajos import obtener_servicio_reportes
+    from interfaz.tray_icon import TrayIcon
+    return True
 
 class SistemaMonitoreo:
     def __init__(self):
@@ -49,7 +68,7 @@ class SistemaMonitoreo:
             # Inicializar componentes principales
             self.monitor_ventanas = MonitorVentanas()
             self.pomodoro = PomodoroTimer()
-            self.gestor_objetivos = GestorObjetivos()
+            self.gestor_objetivos = obtener_gestor_objetivos()
             self.resumen_diario = ResumenDiario()
             
             # Configurar Pomodoro según preferencias del usuario
@@ -58,14 +77,31 @@ class SistemaMonitoreo:
                 self.pomodoro.configurar_tiempos(
                     trabajo=config_pomodoro.get('tiempo_trabajo_minutos', 25),
                     descanso_corto=config_pomodoro.get('tiempo_descanso_corto_minutos', 5),
-                    descanso_largo=config_pomodoro.get('tiempo_descanso_largo_minutos', 15)
+                    descanso_largo=config_pomodoro.get('tiempo_descanso_largo_minutos', 15),
+                    adaptativo=config_pomodoro.get('modo_adaptativo', False)
+                )
+                despachador.configurar(
+                    notificaciones=config_pomodoro.get('notificaciones_activas', True),
+                    sonidos=config_pomodoro.get('sonidos_activos', True)
                 )
             
+            # Los objetivos con regla avanzan solos con cada sesión de ventana cerrada
+            if config_sistema.obtener_configuracion('objetivos', 'avance_automatico') is not False:
+                AvanceAutomatico(self.gestor_objetivos).iniciar()
+            
+            # La inactividad dentro de las fases de trabajo alimenta el modo adaptativo
+            suscribir_inactividad(self.pomodoro.registrar_cambio_inactividad)
+            
+            # Continuar el ciclo Pomodoro guardado (tras un cierre, caída o reinicio)
+            self.pomodoro.restaurar_estado()
+            
             # Inicializar tray icon si está habilitado
             if config_sistema.obtener_configuracion('interfaz', 'modo_tray'):
                 self.tray_icon = TrayIcon(self)
                 if not self.tray_icon.inicializar_tray():
                     print("⚠️ No se pudo inicializar el icono de bandeja, continuando sin él")
+                else:
+                    self.tray_icon.conectar_eventos(self.pomodoro, self.gestor_objetivos)
             
             # Programar resumen automático
             programar_resumen_automatico()
@@ -88,6 +124,7 @@ class SistemaMonitoreo:
                     print("\n🎯 ¡Es hora de definir tus objetivos del día!")
                     print("💡 Tip: Define objetivos específicos y medibles")
                     print("📝 Ejemplo: 'Contactar 10 clientes' o 'Completar 3 tareas del proyecto'")
+                    print("🔁 Los que repites cada día puedes guardarlos como recurrentes (python -m objetivos.gestor_objetivos, opción 9)")
                     
                     respuesta = input("\n¿Quieres abrir la interfaz de objetivos ahora? (s/N): ")
                     if respuesta.lower() in ['s', 'si', 'sí', 'y', 'yes']:
@@ -133,12 +170,8 @@ class SistemaMonitoreo:
             )
             hilo_ventanas.start()
             
-            # Hilo para Pomodoro
-            hilo_pomodoro = threading.Thread(
-                target=self.pomodoro.iniciar, 
-                daemon=True
-            )
-            hilo_pomodoro.start()
+            # Pomodoro: no ocupa un hilo propio, sus fases vencen en el planificador de plazos
+            self.pomodoro.iniciar()
             
             print("\n✅ SISTEMA COMPLETAMENTE OPERATIVO")
             print("📊 Monitoreo de actividad: ACTIVO")
@@ -157,26 +190,10 @@ class SistemaMonitoreo:
             print("⚡ Presiona Ctrl+C cuando quieras ver el resumen del día y salir")
             print("="*60)
             
-            # Mantener el programa ejecutándose
+            # Mantener el programa ejecutándose; el tooltip se actualiza por eventos
             while self.running:
                 time.sleep(5)
                 
-                # Actualizar tooltip del tray icon si está disponible
-                if self.tray_icon:
-                    try:
-                        estado_pomodoro = self.pomodoro.obtener_estado()
-                        if estado_pomodoro['activo']:
-                            fase = "Trabajo" if estado_pomodoro['fase'] == "trabajo" else "Descanso"
-                            tiempo = estado_pomodoro.get('tiempo_restante', '')
-                            mensaje = f"Pomodoro: {fase} {tiempo}"
-                        else:
-                            objetivos = len(self.gestor_objetivos.obtener_objetivos_hoy())
-                            mensaje = f"Activo - {objetivos} objetivos hoy"
-                        
-                        self.tray_icon.actualizar_tooltip(mensaje)
-                    except:
-                        pass
-                
         except KeyboardInterrupt:
             self.detener_sistema()
             
@@ -193,6 +210,26 @@ class SistemaMonitoreo:
         print(f"\n🛑 Deteniendo sistema para {self.nombre_usuario}...")
         self.running = False
         
+        try:
+            # Cerrar la sesión de ventana abierta para que entre en el resumen
+            if self.monitor_ventanas:
+                self.monitor_ventanas.detener()
+        except Exception as e:
+            print(f"⚠️ Error al detener monitor de ventanas: {e}")
+
+        try:
+            # Guardar los avances de objetivos aún en la ventana de escritura diferida
+            if self.gestor_objetivos:
+                self.gestor_objetivos.vaciar()
+        except Exception as e:
+            print(f"⚠️ Error al guardar objetivos: {e}")
+
+        try:
+            # Los reportes PDF en cola se cancelan; se espera a los que están en ejecución
+            obtener_servicio_reportes().detener()
+        except Exception as e:
+            print(f"⚠️ Error al detener reportes: {e}")
+
         try:
             # Generar resumen final del día
             print("📊 Generando resumen final del día...")
@@ -208,6 +245,9 @@ class SistemaMonitoreo:
                 
             registrar_evento(f"Sistema detenido por {self.nombre_usuario}", "sistema")
             
+            # Dar un momento a las notificaciones pendientes (sin bloquear el cierre)
+            despachador.vaciar(timeout=2)
+            
         except Exception as e:
             print(f"⚠️ Error al detener componentes: {e}")
         
@@ -219,6 +259,10 @@ class SistemaMonitoreo:
 
 def main():
     """Función principal para ejecutar el sistema"""
+    if not preparar_sistema():
+        print("❌ Configuración inicial cancelada. Saliendo...")
+        sys.exit(0)
+    
     try:
         print("=" * 60)
         print("🖥️  SISTEMA DE PRODUCTIVIDAD PERSONAL")
@@ -249,4 +293,6 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # Ejecutable congelado (PyInstaller): los procesos de reportes ejecutan su tarea y no la aplicación
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,125 @@
+# monitor/atribucion.py - Atribución de tiempo activo restando la inactividad a los spans
+
+import threading
+from collections import deque, namedtuple
+
+# Sesión en primer plano ya cerrada (inicio y fin en timestamps epoch)
+SpanVentana = namedtuple('SpanVentana', ['inicio', 'fin', 'proceso', 'pid', 'titulo', 'categoria'])
+
+def _solapamiento(inicio_a, fin_a, inicio_b, fin_b):
+    """Segundos en común entre [inicio_a, fin_a) y [inicio_b, fin_b)"""
+    return max(0.0, min(fin_a, fin_b) - max(inicio_a, inicio_b))
+
+class UnionInactividad:
+    """
+    Unión incremental entre spans de ventana e intervalos de inactividad
+
+    La inactividad se declara con retraso (tras TIEMPO_INACTIVIDAD sin entrada) y
+    con su inicio en el pasado, así que cada span se retiene hasta que su fin queda
+    más atrás que ese retraso máximo: a partir de ahí ningún intervalo de
+    inactividad nuevo puede solaparlo. Por span retenido se guarda un solo
+    acumulador, y de la inactividad el inicio del intervalo abierto y los
+    intervalos ya cerrados que todavía pueden caer dentro de un span por llegar
+    (la ventana en primer plano sigue abierta mientras dura la inactividad).
+    """
+
+    def __init__(self, retraso_maximo, emitir):
+        """
+        Args:
+            retraso_maximo (float): segundos máximos entre el inicio real de una
+                inactividad y su notificación
+            emitir (callable): emitir(span, segundos_activos) para cada span resuelto
+        """
+        self.retraso_maximo = retraso_maximo
+        self._emitir = emitir
+        self._pendientes = deque()  # [span, segundos_inactivos]
+        self._inicio_inactividad = None
+        self._cerrados = deque()    # (inicio, fin) de inactividades posteriores al último span recibido
+        self._lock = threading.Lock()
+
+    def agregar_span(self, span):
+        """Recibe un span cerrado; se emitirá cuando su inactividad sea definitiva"""
+        with self._lock:
+            inactivo = sum(_solapamiento(inicio, fin, span.inicio, span.fin) for inicio, fin in self._cerrados)
+            self._pendientes.append([span, inactivo])
+
+            # Los spans llegan en orden: los siguientes empiezan después de este fin
+            while self._cerrados and self._cerrados[0][1] <= span.fin:
+                self._cerrados.popleft()
+
+    def registrar_cambio(self, inactivo, momento):
+        """Callback del monitor de inactividad: inicio (True) o fin (False) en 'momento'"""
+        with self._lock:
+            if inactivo:
+                if self._inicio_inactividad is None:
+                    self._inicio_inactividad = momento
+                return
+
+            inicio = self._inicio_inactividad
+            if inicio is None:
+                return
+
+            for entrada in self._pendientes:
+                span = entrada[0]
+                entrada[1] += _solapamiento(inicio, momento, span.inicio, span.fin)
+            self._inicio_inactividad = None
+
+            # Lo que quede después del último span recibido se descuenta del span que siga
+            ultimo_fin = self._pendientes[-1][0].fin if self._pendientes else None
+            if ultimo_fin is None or momento > ultimo_fin:
+                self._cerrados.append((inicio if ultimo_fin is None else max(inicio, ultimo_fin), momento))
+
+    def avanzar(self, ahora):
+        """Emite los spans cuyo fin ya no puede verse afectado por inactividad nueva"""
+        self._liberar(ahora - self.retraso_maximo)
+
+    def vaciar(self):
+        """Emite todos los spans retenidos con la información disponible (al cerrar)"""
+        self._liberar(None)
+
+    def _liberar(self, marca):
+        listos = []
+
+        with self._lock:
+            while self._pendientes and (marca is None or self._pendientes[0][0].fin <= marca):
+                span, inactivo = self._pendientes.popleft()
+
+                # Una inactividad todavía abierta cubre el span desde su inicio hasta el fin del span
+                if self._inicio_inactividad is not None:
+                    inactivo += _solapamiento(self._inicio_inactividad, span.fin, span.inicio, span.fin)
+
+                duracion = span.fin - span.inicio
+                listos.append((span, max(0.0, duracion - inactivo)))
+
+        for span, activos in listos:
+            try:
+                self._emitir(span, activos)
+            except Exception as e:
+                print(f"⚠️ Error al emitir span: {e}")
+
+    def __len__(self):
+        return len(self._pendientes)
+
+if __name__ == "__main__":
+    # Prueba: un navegador abierto 3 horas con 2 horas y media de inactividad
+    resultados = []
+    union = UnionInactividad(retraso_maximo=310, emitir=lambda s, a: resultados.append((s.proceso, a)))
+
+    union.agregar_span(SpanVentana(0, 600, 'code.exe', 1, 'main.py', 'desarrollo'))
+    union.registrar_cambio(True, 1200)
+    union.agregar_span(SpanVentana(600, 11400, 'chrome.exe', 2, 'Noticias', 'navegador'))
+    union.registrar_cambio(False, 10200)
+    union.avanzar(12000)
+
+    for proceso, activos in resultados:
+        print(f"{proceso}: {activos / 60:.0f} minutos activos")
+
+    # Inactividad que empieza y termina mientras la ventana sigue abierta (navegador toda la noche)
+    resultados.clear()
+    union = UnionInactividad(retraso_maximo=310, emitir=lambda s, a: resultados.append((s.proceso, a)))
+    union.registrar_cambio(True, 100)
+    union.registrar_cambio(False, 30000)
+    union.agregar_span(SpanVentana(0, 31000, 'chrome.exe', 2, 'Noticias', 'navegador'))
+    union.vaciar()
+    assert resultados == [('chrome.exe', 1100.0)], resultados
+    print(f"{resultados[0][0]} (inactividad dentro del span abierto): {resultados[0][1] / 60:.0f} minutos activos")
@@ -0,0 +1,73 @@
+# monitor/contadores.py - Contadores de memoria acotada para tiempos por aplicación
+
+class ContadorTopK:
+    """
+    Contador ponderado Space-Saving (Metwally et al.) con a lo sumo k claves
+
+    Las claves más pesadas se cuentan con precisión; cuando llega una clave nueva
+    y el contador está lleno, reemplaza a la de menor peso y hereda ese peso como
+    cota de error. Cualquier clave con peso real mayor que total/k está garantizada
+    en el contador, así que el top de aplicaciones es correcto con memoria fija.
+    """
+
+    def __init__(self, capacidad=100):
+        self.capacidad = capacidad
+        self._conteos = {}   # clave -> peso estimado (cota superior)
+        self._errores = {}   # clave -> sobreestimación máxima
+        self.total = 0.0
+
+    def agregar(self, clave, peso=1.0):
+        """Suma peso a la clave"""
+        self.total += peso
+
+        if clave in self._conteos:
+            self._conteos[clave] += peso
+            return
+
+        if len(self._conteos) < self.capacidad:
+            self._conteos[clave] = peso
+            self._errores[clave] = 0.0
+            return
+
+        # Reemplazar la clave de menor peso (O(k), solo en cambios de ventana)
+        minima = min(self._conteos, key=self._conteos.get)
+        peso_minimo = self._conteos.pop(minima)
+        del self._errores[minima]
+
+        self._conteos[clave] = peso_minimo + peso
+        self._errores[clave] = peso_minimo
+
+    def estimar(self, clave):
+        """Retorna (peso estimado, error máximo) de la clave; (0, 0) si no se sigue"""
+        return self._conteos.get(clave, 0.0), self._errores.get(clave, 0.0)
+
+    def top(self, n=None):
+        """Retorna [(clave, peso, error)] ordenado de mayor a menor peso"""
+        orden = sorted(self._conteos.items(), key=lambda item: item[1], reverse=True)
+        if n is not None:
+            orden = orden[:n]
+        return [(clave, peso, self._errores[clave]) for clave, peso in orden]
+
+    def como_diccionario(self):
+        """Retorna {clave: peso} de las claves seguidas"""
+        return dict(self._conteos)
+
+    def __contains__(self, clave):
+        return clave in self._conteos
+
+    def __len__(self):
+        return len(self._conteos)
+
+if __name__ == "__main__":
+    # Prueba: muchos títulos únicos no desplazan a las aplicaciones dominantes
+    contador = ContadorTopK(capacidad=10)
+
+    for i in range(10000):
+        contador.agregar("Visual Studio Code", 5)
+        contador.agregar(f"Pestaña del navegador {i}", 1)
+        if i % 2 == 0:
+            contador.agregar("Outlook", 3)
+
+    print(f"Claves en memoria: {len(contador)}")
+    for clave, peso, error in contador.top(3):
+        print(f"  {clave}: {peso:.0f} (error ≤ {error:.0f})")
@@ -0,0 +1,208 @@
+# monitor/fuentes_ventana.py - Notificaciones de cambio de ventana activa sin sondeo
+
+import os
+import sys
+import threading
+
+class FuenteCambiosVentana:
+    """Interfaz común: invoca un callback cada vez que cambia la ventana en primer plano"""
+
+    nombre = "base"
+
+    def __init__(self):
+        self._callback = None
+        self._hilo = None
+
+    def disponible(self):
+        """Indica si la fuente puede usarse en este sistema"""
+        return False
+
+    def iniciar(self, callback):
+        """Comienza a notificar cambios llamando a callback()"""
+        self._callback = callback
+        self._hilo = threading.Thread(target=self._ejecutar, daemon=True)
+        self._hilo.start()
+        return True
+
+    def detener(self):
+        """Deja de notificar cambios"""
+        pass
+
+    def _ejecutar(self):
+        raise NotImplementedError
+
+    def _notificar(self):
+        if self._callback:
+            try:
+                self._callback()
+            except Exception as e:
+                print(f"⚠️ Error en callback de cambio de ventana: {e}")
+
+class FuenteWinEventHook(FuenteCambiosVentana):
+    """SetWinEventHook(EVENT_SYSTEM_FOREGROUND) con bucle de mensajes en un hilo propio"""
+
+    nombre = "win_event_hook"
+
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    WINEVENT_SKIPOWNPROCESS = 0x0002
+    WM_QUIT = 0x0012
+
+    def __init__(self):
+        super().__init__()
+        self._id_hilo = None
+        self._listo = threading.Event()
+
+    def disponible(self):
+        if sys.platform != "win32":
+            return False
+        try:
+            import ctypes
+            return hasattr(ctypes.windll.user32, 'SetWinEventHook')
+        except Exception:
+            return False
+
+    def iniciar(self, callback):
+        super().iniciar(callback)
+        self._listo.wait(2)
+        return self._id_hilo is not None
+
+    def _ejecutar(self):
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+
+        WinEventProc = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+        )
+
+        def al_cambiar(hook, evento, hwnd, id_objeto, id_hijo, hilo, tiempo):
+            self._notificar()
+
+        # Mantener la referencia: si el callback se libera, Windows llama a memoria inválida
+        self._proc = WinEventProc(al_cambiar)
+
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        hook = user32.SetWinEventHook(
+            self.EVENT_SYSTEM_FOREGROUND, self.EVENT_SYSTEM_FOREGROUND,
+            0, self._proc, 0, 0,
+            self.WINEVENT_OUTOFCONTEXT | self.WINEVENT_SKIPOWNPROCESS
+        )
+
+        if not hook:
+            print("⚠️ SetWinEventHook falló, se usará sondeo")
+            self._listo.set()
+            return
+
+        self._id_hilo = kernel32.GetCurrentThreadId()
+        self._listo.set()
+
+        # Los eventos fuera de contexto se entregan a través de la cola de mensajes de este hilo
+        mensaje = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(mensaje), 0, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(mensaje))
+            user32.DispatchMessageW(ctypes.byref(mensaje))
+
+        user32.UnhookWinEvent(hook)
+
+    def detener(self):
+        if self._id_hilo is not None:
+            import ctypes
+            ctypes.windll.user32.PostThreadMessageW(self._id_hilo, self.WM_QUIT, 0, 0)
+            self._id_hilo = None
+
+class FuenteX11VentanaActiva(FuenteCambiosVentana):
+    """Escucha PropertyNotify de _NET_ACTIVE_WINDOW en la ventana raíz (requiere python-xlib)"""
+
+    nombre = "x11_net_active_window"
+
+    def __init__(self):
+        super().__init__()
+        self._display = None
+        self._pipe = None
+
+    def disponible(self):
+        if not sys.platform.startswith("linux") or not os.environ.get("DISPLAY"):
+            return False
+        try:
+            import Xlib.display  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def iniciar(self, callback):
+        from Xlib import X, display
+
+        self._display = display.Display()
+        raiz = self._display.screen().root
+        self._atomo = self._display.intern_atom('_NET_ACTIVE_WINDOW')
+        raiz.change_attributes(event_mask=X.PropertyChangeMask)
+        self._display.flush()
+
+        # Tubería para despertar el select() al detener, sin timeouts de sondeo
+        self._pipe = os.pipe()
+        super().iniciar(callback)
+        return True
+
+    def _ejecutar(self):
+        import select
+        from Xlib import X
+
+        fd_display = self._display.fileno()
+        fd_detener = self._pipe[0]
+
+        while True:
+            # Procesar primero los eventos ya leídos del socket, luego bloquear
+            while self._display.pending_events():
+                evento = self._display.next_event()
+                if evento.type == X.PropertyNotify and evento.atom == self._atomo:
+                    self._notificar()
+
+            listos, _, _ = select.select([fd_display, fd_detener], [], [])
+            if fd_detener in listos:
+                break
+
+        self._display.close()
+
+    def detener(self):
+        if self._pipe:
+            os.write(self._pipe[1], b'x')
+            self._pipe = None
+
+class FuenteCambiosVentanaFalsa(FuenteCambiosVentana):
+    """Fuente controlable manualmente para pruebas y simulaciones"""
+
+    nombre = "falsa"
+
+    def disponible(self):
+        return True
+
+    def iniciar(self, callback):
+        self._callback = callback
+        return True
+
+    def simular_cambio(self):
+        """Simula un cambio de ventana en primer plano"""
+        self._notificar()
+
+    def detener(self):
+        self._callback = None
+
+FUENTES_SO = [
+    FuenteWinEventHook,
+    FuenteX11VentanaActiva
+]
+
+def crear_fuente_cambios_ventana():
+    """Retorna la primera fuente de eventos disponible en este sistema, o None"""
+    for clase in FUENTES_SO:
+        try:
+            fuente = clase()
+            if fuente.disponible():
+                return fuente
+        except Exception:
+            continue
+    return None
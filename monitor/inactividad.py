@@ -1,37 +1,283 @@
 # monitor/inactividad.py
 
-from pynput import mouse, keyboard
+import math
 import time
+import threading
+from datetime import datetime
 from monitor.logger import inicializar_log, registrar_evento
+from monitor.proveedores_inactividad import crear_proveedor_so
+from utils.reloj import RELOJ_SISTEMA
 
 TIEMPO_INACTIVIDAD = 5 * 60
-ultima_actividad = time.time()
+INTERVALO_VERIFICACION = 5
+
+# Reloj del detector (se reemplaza por un RelojSimulado en simulaciones)
+reloj = RELOJ_SISTEMA
+ultima_actividad = reloj.ahora()
+
+# Proveedor en uso; None significa hooks globales de pynput
+proveedor_activo = None
+
+# Callbacks callback(inactivo, momento) de cambios de estado de inactividad
+_suscriptores_inactividad = []
+
+def suscribir_inactividad(callback):
+    """
+    Registra callback(inactivo, momento) para cada cambio de estado
+
+    'momento' es el instante real del cambio (la última entrada antes de quedar
+    inactivo, o la primera entrada al volver), no el de la detección.
+    """
+    _suscriptores_inactividad.append(callback)
+
+def desuscribir_inactividad(callback):
+    """Quita un callback registrado con suscribir_inactividad"""
+    if callback in _suscriptores_inactividad:
+        _suscriptores_inactividad.remove(callback)
+
+def _notificar_inactividad(inactivo, momento):
+    for callback in list(_suscriptores_inactividad):
+        try:
+            callback(inactivo, momento)
+        except Exception as e:
+            print(f"⚠️ Error en suscriptor de inactividad: {e}")
+
+def retraso_maximo_deteccion():
+    """Segundos máximos entre el inicio real de una inactividad y su notificación"""
+    return TIEMPO_INACTIVIDAD + 2 * INTERVALO_VERIFICACION
+
+class PuntuacionFoco:
+    """
+    Intensidad de foco a partir del flujo de entrada, con memoria O(1)
+
+    Por cada tipo de entrada (teclas, clicks, movimiento) mantiene una tasa con
+    decaimiento exponencial para ventanas de 1, 5 y 15 minutos. No guarda eventos
+    individuales: cada evento actualiza nueve números.
+    """
+
+    VENTANAS = (60, 300, 900)
+    TIPOS = ('teclas', 'clicks', 'movimiento')
+
+    # Peso de cada tipo en eventos ponderados por minuto
+    PESOS = {'teclas': 1.0, 'clicks': 2.0, 'movimiento': 0.05}
+
+    # Eventos ponderados por minuto que equivalen a ~63 puntos de foco
+    REFERENCIA_POR_MINUTO = 60.0
+
+    # El movimiento del mouse se muestrea como máximo una vez por este intervalo
+    INTERVALO_MOVIMIENTO = 0.1
+
+    def __init__(self, reloj=None):
+        self._reloj = reloj or time.time
+        self._lock = threading.Lock()
+        ahora = self._reloj()
+        self._tasas = {tipo: [0.0] * len(self.VENTANAS) for tipo in self.TIPOS}
+        self._ultimo_evento = {tipo: ahora for tipo in self.TIPOS}
+        self._conteo_minuto = {tipo: 0 for tipo in self.TIPOS}
+
+    def registrar(self, tipo):
+        """Registra un evento de entrada del tipo indicado"""
+        ahora = self._reloj()
+
+        with self._lock:
+            transcurrido = ahora - self._ultimo_evento[tipo]
+            if tipo == 'movimiento' and transcurrido < self.INTERVALO_MOVIMIENTO:
+                return
+
+            tasas = self._tasas[tipo]
+            for i, ventana in enumerate(self.VENTANAS):
+                tasas[i] = tasas[i] * math.exp(-transcurrido / ventana) + 1.0 / ventana
+            self._ultimo_evento[tipo] = ahora
+            self._conteo_minuto[tipo] += 1
+
+    def tasa_por_minuto(self, tipo, ventana=60):
+        """Eventos por minuto de un tipo, suavizados en la ventana dada (segundos)"""
+        i = self.VENTANAS.index(ventana)
+        with self._lock:
+            transcurrido = self._reloj() - self._ultimo_evento[tipo]
+            tasa = self._tasas[tipo][i] * math.exp(-transcurrido / ventana)
+        return tasa * 60.0
+
+    def puntuacion(self, ventana=60):
+        """Puntuación de foco 0-100 para la ventana dada"""
+        intensidad = sum(
+            self.PESOS[tipo] * self.tasa_por_minuto(tipo, ventana) for tipo in self.TIPOS
+        )
+        return 100.0 * (1.0 - math.exp(-intensidad / self.REFERENCIA_POR_MINUTO))
+
+    def obtener_resumen(self):
+        """Retorna puntuaciones y tasas de todas las ventanas"""
+        return {
+            'puntuacion': round(self.puntuacion(60), 1),
+            'puntuacion_5m': round(self.puntuacion(300), 1),
+            'puntuacion_15m': round(self.puntuacion(900), 1),
+            'tasas_por_minuto': {
+                tipo: {ventana // 60: round(self.tasa_por_minuto(tipo, ventana), 2)
+                       for ventana in self.VENTANAS}
+                for tipo in self.TIPOS
+            }
+        }
+
+    def tomar_conteo_minuto(self):
+        """Retorna y reinicia los conteos de eventos acumulados desde la última llamada"""
+        with self._lock:
+            conteo = self._conteo_minuto
+            self._conteo_minuto = {tipo: 0 for tipo in self.TIPOS}
+        return conteo
+
+# Instancia global de puntuación de foco
+puntuacion_foco = PuntuacionFoco(reloj=lambda: reloj.ahora())
+
+def obtener_intensidad_foco():
+    """Retorna la intensidad de foco actual (puntuaciones 1/5/15 min y tasas por tipo)"""
+    return puntuacion_foco.obtener_resumen()
 
 def reiniciar_timer(x=None):
     global ultima_actividad
-    ultima_actividad = time.time()
+    ultima_actividad = reloj.ahora()
+
+def _registrar_tecla(tecla=None):
+    reiniciar_timer()
+    puntuacion_foco.registrar('teclas')
+
+def _registrar_click(x=None, y=None, boton=None, presionado=True):
+    reiniciar_timer()
+    if presionado:
+        puntuacion_foco.registrar('clicks')
+
+def _registrar_movimiento(*args):
+    reiniciar_timer()
+    puntuacion_foco.registrar('movimiento')
+
+def establecer_reloj(nuevo_reloj):
+    """Cambia el reloj del detector (y reinicia la última actividad a su hora actual)"""
+    global reloj, ultima_actividad
+    reloj = nuevo_reloj
+    ultima_actividad = reloj.ahora()
+
+def segundos_sin_actividad():
+    """Segundos desde la última entrada, según el backend activo"""
+    if proveedor_activo is not None:
+        return proveedor_activo.segundos_sin_actividad()
+    return reloj.ahora() - ultima_actividad
 
 def esta_inactivo():
-    return (time.time() - ultima_actividad) > TIEMPO_INACTIVIDAD
+    return segundos_sin_actividad() > TIEMPO_INACTIVIDAD
 
-def iniciar_monitoreo_inactividad():
-    inicializar_log()
+def _obtener_backend_configurado():
+    """Lee el backend de inactividad de la configuración ('auto', 'so' o 'hooks')"""
+    try:
+        from config import config_sistema
+        return config_sistema.obtener_configuracion('monitoreo', 'backend_inactividad') or 'auto'
+    except Exception:
+        return 'auto'
 
-    mouse.Listener(on_move=reiniciar_timer, on_click=reiniciar_timer, on_scroll=reiniciar_timer).start()
-    keyboard.Listener(on_press=reiniciar_timer).start()
+def _puntuacion_foco_habilitada():
+    """Indica si la configuración pide calcular la intensidad de foco (opcional: necesita hooks de entrada)"""
+    try:
+        from config import config_sistema
+        return bool(config_sistema.obtener_configuracion('monitoreo', 'puntuacion_foco'))
+    except Exception:
+        return False
 
-    print("Monitoreando inactividad...")
+def _iniciar_hooks():
+    """Registra los listeners globales de pynput (un callback por evento de entrada)"""
+    from pynput import mouse, keyboard
 
-    inactivo = False
+    mouse.Listener(on_move=_registrar_movimiento, on_click=_registrar_click,
+                   on_scroll=_registrar_movimiento).start()
+    keyboard.Listener(on_press=_registrar_tecla).start()
 
-    while True:
-        if not inactivo and esta_inactivo():
+def _guardar_minuto_foco(momento):
+    """Guarda en el histograma diario la puntuación y los conteos del minuto indicado"""
+    conteo = puntuacion_foco.tomar_conteo_minuto()
+    try:
+        from storage.database import registrar_minuto_foco
+        registrar_minuto_foco(
+            momento.date().isoformat(),
+            momento.hour * 60 + momento.minute,
+            puntuacion_foco.puntuacion(60),
+            conteo['teclas'],
+            conteo['clicks'],
+            conteo['movimiento']
+        )
+    except Exception as e:
+        print(f"⚠️ Error al guardar histograma de foco: {e}")
+
+class DetectorInactividad:
+    """Estado de un paso de verificación: transición activo/inactivo y minuto de foco en curso"""
+
+    def __init__(self, puntuar_foco=False):
+        self.puntuar_foco = puntuar_foco
+        self.inactivo = False
+        self.minuto_actual = self._minuto(reloj.ahora())
+
+    @staticmethod
+    def _minuto(momento):
+        return datetime.fromtimestamp(momento).replace(second=0, microsecond=0)
+
+    def verificar(self):
+        """Una verificación: guarda el minuto de foco cerrado y notifica cambios de estado"""
+        ahora = reloj.ahora()
+
+        if self.puntuar_foco:
+            minuto = self._minuto(ahora)
+            if minuto != self.minuto_actual:
+                _guardar_minuto_foco(self.minuto_actual)
+                self.minuto_actual = minuto
+
+        sin_actividad = segundos_sin_actividad()
+        if not self.inactivo and sin_actividad > TIEMPO_INACTIVIDAD:
             registrar_evento("Usuario INACTIVO")
-            inactivo = True
-        elif inactivo and not esta_inactivo():
+            self.inactivo = True
+            _notificar_inactividad(True, ahora - sin_actividad)
+        elif self.inactivo and sin_actividad <= TIEMPO_INACTIVIDAD:
             registrar_evento("Usuario ACTIVO nuevamente")
-            inactivo = False
-        time.sleep(5)
+            self.inactivo = False
+            _notificar_inactividad(False, ahora - sin_actividad)
+
+def iniciar_monitoreo_inactividad(backend=None, proveedor=None):
+    """
+    Inicia el monitoreo de inactividad
+
+    Args:
+        backend (str): 'auto' (SO si está disponible, si no hooks), 'so' o 'hooks'
+        proveedor (ProveedorInactividad): proveedor explícito (por ejemplo, el falso en pruebas)
+    """
+    global proveedor_activo
+
+    inicializar_log()
+
+    if backend is None:
+        backend = _obtener_backend_configurado()
+
+    if proveedor is None and backend in ('auto', 'so'):
+        proveedor = crear_proveedor_so()
+        if proveedor is None and backend == 'so':
+            print("⚠️ No hay consulta de inactividad del SO disponible, usando hooks")
+
+    puntuar_foco = _puntuacion_foco_habilitada()
+
+    if proveedor is not None:
+        proveedor.iniciar()
+        proveedor_activo = proveedor
+        print(f"Monitoreando inactividad (consulta al SO: {proveedor.nombre})...")
+        if puntuar_foco:
+            # La puntuación de foco necesita el flujo de entrada; la inactividad no
+            try:
+                _iniciar_hooks()
+            except Exception as e:
+                print(f"⚠️ Puntuación de foco desactivada (sin hooks de entrada): {e}")
+                puntuar_foco = False
+    else:
+        proveedor_activo = None
+        _iniciar_hooks()
+        print("Monitoreando inactividad (hooks de mouse/teclado)...")
+
+    detector = DetectorInactividad(puntuar_foco)
+    while True:
+        detector.verificar()
+        reloj.dormir(INTERVALO_VERIFICACION)
 
 if __name__ == "__main__":
     iniciar_monitoreo_inactividad()
@@ -0,0 +1,246 @@
+# monitor/proveedores_inactividad.py - Consulta al sistema operativo del tiempo sin entrada
+
+import os
+import sys
+import time
+import subprocess
+
+class ProveedorInactividad:
+    """Interfaz común: informa cuántos segundos pasaron desde la última entrada del usuario"""
+
+    nombre = "base"
+
+    def disponible(self):
+        """Indica si el proveedor puede usarse en este sistema"""
+        return False
+
+    def iniciar(self):
+        """Prepara el proveedor antes de empezar a consultarlo"""
+        pass
+
+    def detener(self):
+        """Libera los recursos del proveedor"""
+        pass
+
+    def segundos_sin_actividad(self):
+        """Retorna los segundos transcurridos desde la última entrada (mouse/teclado)"""
+        raise NotImplementedError
+
+class ProveedorInactividadWindows(ProveedorInactividad):
+    """Usa GetLastInputInfo de user32: una llamada por consulta, sin hooks globales"""
+
+    nombre = "windows"
+
+    def __init__(self):
+        self._user32 = None
+        self._kernel32 = None
+        self._info = None
+
+        if sys.platform != "win32":
+            return
+
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class LASTINPUTINFO(ctypes.Structure):
+                _fields_ = [('cbSize', wintypes.UINT), ('dwTime', wintypes.DWORD)]
+
+            self._user32 = ctypes.windll.user32
+            self._kernel32 = ctypes.windll.kernel32
+            self._kernel32.GetTickCount.restype = wintypes.DWORD
+            self._info = LASTINPUTINFO()
+            self._info.cbSize = ctypes.sizeof(LASTINPUTINFO)
+            self._byref = ctypes.byref
+        except Exception as e:
+            print(f"⚠️ GetLastInputInfo no disponible: {e}")
+            self._user32 = None
+
+    def disponible(self):
+        return self._user32 is not None
+
+    def segundos_sin_actividad(self):
+        if not self._user32.GetLastInputInfo(self._byref(self._info)):
+            return 0.0
+
+        # GetTickCount da la vuelta cada ~49.7 días; la resta en 32 bits lo absorbe
+        transcurrido_ms = (self._kernel32.GetTickCount() - self._info.dwTime) & 0xFFFFFFFF
+        return transcurrido_ms / 1000.0
+
+class ProveedorInactividadX11(ProveedorInactividad):
+    """Usa la extensión XScreenSaver (libXss) para leer el tiempo sin entrada del servidor X"""
+
+    nombre = "x11"
+
+    def __init__(self):
+        self._xlib = None
+        self._xss = None
+        self._display = None
+        self._info = None
+
+        if not sys.platform.startswith("linux") or not os.environ.get("DISPLAY"):
+            return
+
+        try:
+            import ctypes
+            import ctypes.util
+
+            class XScreenSaverInfo(ctypes.Structure):
+                _fields_ = [
+                    ('window', ctypes.c_ulong),
+                    ('state', ctypes.c_int),
+                    ('kind', ctypes.c_int),
+                    ('til_or_since', ctypes.c_ulong),
+                    ('idle', ctypes.c_ulong),
+                    ('eventMask', ctypes.c_ulong)
+                ]
+
+            ruta_x11 = ctypes.util.find_library('X11')
+            ruta_xss = ctypes.util.find_library('Xss')
+            if not ruta_x11 or not ruta_xss:
+                return
+
+            xlib = ctypes.cdll.LoadLibrary(ruta_x11)
+            xss = ctypes.cdll.LoadLibrary(ruta_xss)
+
+            xlib.XOpenDisplay.restype = ctypes.c_void_p
+            xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+            xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+            xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+            xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+            xss.XScreenSaverAllocInfo.restype = ctypes.POINTER(XScreenSaverInfo)
+            xss.XScreenSaverQueryInfo.argtypes = [
+                ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(XScreenSaverInfo)
+            ]
+
+            display = xlib.XOpenDisplay(None)
+            if not display:
+                return
+
+            self._xlib = xlib
+            self._xss = xss
+            self._display = display
+            self._root = xlib.XDefaultRootWindow(display)
+            self._info = xss.XScreenSaverAllocInfo()
+        except Exception as e:
+            print(f"⚠️ XScreenSaver no disponible: {e}")
+            self._xlib = None
+
+    def disponible(self):
+        return self._xlib is not None and self._info is not None
+
+    def segundos_sin_actividad(self):
+        if not self._xss.XScreenSaverQueryInfo(self._display, self._root, self._info):
+            return 0.0
+        return self._info.contents.idle / 1000.0
+
+    def detener(self):
+        if self._display:
+            try:
+                self._xlib.XCloseDisplay(self._display)
+            except Exception:
+                pass
+            self._display = None
+
+class ProveedorInactividadLogind(ProveedorInactividad):
+    """Lee la pista IdleHint/IdleSinceHint de systemd-logind (Wayland o sesiones sin X)"""
+
+    nombre = "logind"
+
+    def __init__(self):
+        self._sesion = os.environ.get("XDG_SESSION_ID")
+        self._disponible = False
+
+        if not sys.platform.startswith("linux") or not self._sesion:
+            return
+
+        self._disponible = self._leer_pista() is not None
+
+    def _leer_pista(self):
+        """Consulta loginctl y retorna (idle_hint, idle_since_usec) o None si falla"""
+        try:
+            salida = subprocess.run(
+                ['loginctl', 'show-session', self._sesion,
+                 '-p', 'IdleHint', '-p', 'IdleSinceHint'],
+                capture_output=True, text=True, timeout=2
+            ).stdout
+        except Exception:
+            return None
+
+        valores = dict(
+            linea.split('=', 1) for linea in salida.splitlines() if '=' in linea
+        )
+        if 'IdleHint' not in valores:
+            return None
+
+        try:
+            desde_usec = int(valores.get('IdleSinceHint') or 0)
+        except ValueError:
+            desde_usec = 0
+        return valores['IdleHint'] == 'yes', desde_usec
+
+    def disponible(self):
+        return self._disponible
+
+    def segundos_sin_actividad(self):
+        pista = self._leer_pista()
+        if not pista:
+            return 0.0
+
+        inactivo, desde_usec = pista
+        if not inactivo or not desde_usec:
+            return 0.0
+        return max(0.0, time.time() - desde_usec / 1_000_000)
+
+class ProveedorInactividadFalso(ProveedorInactividad):
+    """Proveedor controlable manualmente para pruebas y simulaciones"""
+
+    nombre = "falso"
+
+    def __init__(self, reloj=None):
+        self._reloj = reloj or time.time
+        self._ultima_entrada = self._reloj()
+
+    def disponible(self):
+        return True
+
+    def registrar_entrada(self):
+        """Simula una entrada del usuario en este instante"""
+        self._ultima_entrada = self._reloj()
+
+    def establecer_inactividad(self, segundos):
+        """Fuerza un tiempo sin entrada determinado"""
+        self._ultima_entrada = self._reloj() - segundos
+
+    def segundos_sin_actividad(self):
+        return max(0.0, self._reloj() - self._ultima_entrada)
+
+PROVEEDORES_SO = [
+    ProveedorInactividadWindows,
+    ProveedorInactividadX11,
+    ProveedorInactividadLogind
+]
+
+def crear_proveedor_so():
+    """Retorna el primer proveedor del sistema operativo disponible, o None"""
+    for clase in PROVEEDORES_SO:
+        try:
+            proveedor = clase()
+        except Exception:
+            continue
+        if proveedor.disponible():
+            return proveedor
+    return None
+
+if __name__ == "__main__":
+    # Prueba rápida del proveedor disponible en este sistema
+    proveedor = crear_proveedor_so()
+
+    if proveedor:
+        print(f"✅ Proveedor de inactividad: {proveedor.nombre}")
+        for _ in range(5):
+            print(f"💤 Segundos sin actividad: {proveedor.segundos_sin_actividad():.1f}")
+            time.sleep(1)
+        proveedor.detener()
+    else:
+        print("⚠️ No hay proveedor del sistema operativo; se usarán hooks de pynput")
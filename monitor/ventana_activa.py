@@ -1,78 +1,399 @@
 # monitor/ventana_activa.py
 
-import win32gui
 import time
+import threading
+from collections import OrderedDict, namedtuple
 import psutil
 from monitor.logger import registrar_evento
+from monitor.fuentes_ventana import crear_fuente_cambios_ventana
+from monitor.contadores import ContadorTopK
+from monitor.atribucion import SpanVentana, UnionInactividad
+from utils.fechas import fecha_local, partir_por_dia
+from utils.reloj import RELOJ_SISTEMA
+from utils.categorias import motor_categorias
+from storage.database import registrar_span_ventana, escritor_db, MAX_DURACION_SPAN
+
+try:
+    import win32gui
+except ImportError:
+    # Fuera de Windows get_active_window retorna "Desconocida"
+    win32gui = None
+
+# Foto única de la ventana en primer plano tomada en cada muestra
+SnapshotVentana = namedtuple('SnapshotVentana', ['hwnd', 'titulo', 'pid', 'proceso'])
+
+SNAPSHOT_DESCONOCIDO = SnapshotVentana(None, "Desconocida", None, "proceso_desconocido")
+
+class CacheProcesos:
+    """
+    Cache LRU acotada de pid -> (create_time, nombre)
+
+    El create_time protege contra la reutilización de PIDs: si el proceso que hoy
+    tiene ese pid no es el que se cacheó, el nombre se vuelve a leer.
+    """
+
+    def __init__(self, capacidad=256):
+        self.capacidad = capacidad
+        self._entradas = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener_nombre(self, pid, validar=True):
+        """
+        Retorna el nombre del proceso con ese pid
+
+        Args:
+            pid (int): identificador del proceso
+            validar (bool): comprobar create_time antes de usar la entrada cacheada;
+                se puede omitir si la misma ventana sigue perteneciendo al mismo pid
+        """
+        entrada = self._entradas.get(pid)
+
+        if entrada is not None and not validar:
+            self._entradas.move_to_end(pid)
+            self.aciertos += 1
+            return entrada[1]
+
+        try:
+            proceso = psutil.Process(pid)
+            creacion = proceso.create_time()
+
+            if entrada is not None and entrada[0] == creacion:
+                self._entradas.move_to_end(pid)
+                self.aciertos += 1
+                return entrada[1]
+
+            nombre = proceso.name()
+        except Exception:
+            self._entradas.pop(pid, None)
+            return "proceso_desconocido"
+
+        self.fallos += 1
+        self._entradas[pid] = (creacion, nombre)
+        self._entradas.move_to_end(pid)
+        if len(self._entradas) > self.capacidad:
+            self._entradas.popitem(last=False)
+
+        return nombre
+
+    def __len__(self):
+        return len(self._entradas)
+
+class MuestreadorAdaptativo:
+    """
+    Calcula el intervalo hasta la próxima muestra de la ventana activa
+
+    Tras un cambio de ventana vuelve al intervalo mínimo; mientras la ventana se
+    mantiene estable el intervalo crece exponencialmente hasta el tope máximo,
+    haya o no entrada del usuario (escribir en la misma ventana no anuncia un
+    cambio). Si el usuario está inactivo salta directamente al tope. Así, con la
+    ventana estable, se despierta tan poco como el muestreo fijo de un minuto.
+    """
+
+    def __init__(self, intervalo_min=1, intervalo_max=60, factor=2, umbral_inactivo=60):
+        self.intervalo_min = intervalo_min
+        self.intervalo_max = intervalo_max
+        self.factor = factor
+        self.umbral_inactivo = umbral_inactivo
+        self.intervalo = intervalo_min
+
+    def siguiente_intervalo(self, hubo_cambio, segundos_sin_entrada=None):
+        """Retorna los segundos a esperar según si hubo cambio y la entrada reciente"""
+        if hubo_cambio:
+            self.intervalo = self.intervalo_min
+        elif segundos_sin_entrada is not None and segundos_sin_entrada >= self.umbral_inactivo:
+            self.intervalo = self.intervalo_max
+        else:
+            self.intervalo = min(self.intervalo * self.factor, self.intervalo_max)
+
+        return self.intervalo
+
+def _segundos_sin_entrada():
+    """Segundos sin entrada del usuario según el monitor de inactividad, o None"""
+    try:
+        from monitor.inactividad import segundos_sin_actividad
+        return segundos_sin_actividad()
+    except Exception:
+        return None
+
+# Callbacks callback(span, segundos_activos) de cada span resuelto
+_suscriptores_spans = []
+
+def suscribir_spans(callback):
+    """
+    Registra callback(span, segundos_activos) para cada sesión en primer plano cerrada
+
+    Se llama en el hilo del monitor cuando la inactividad del span ya es definitiva
+    (un retraso de detección de inactividad después del cambio de ventana).
+    """
+    _suscriptores_spans.append(callback)
+
+def desuscribir_spans(callback):
+    """Quita un callback registrado con suscribir_spans"""
+    if callback in _suscriptores_spans:
+        _suscriptores_spans.remove(callback)
+
+def _emitir_span(span, segundos_activos):
+    """Destino de la unión de inactividad: encola el span con su tiempo activo y avisa a los suscriptores"""
+    registrar_span_ventana(span.inicio, span.fin, span.proceso, span.pid, span.titulo,
+                           span.categoria, segundos_activos)
+
+    for callback in list(_suscriptores_spans):
+        try:
+            callback(span, segundos_activos)
+        except Exception as e:
+            print(f"⚠️ Error en suscriptor de spans: {e}")
+
+def _crear_union_inactividad():
+    """Crea la unión span/inactividad suscrita a los cambios del monitor de inactividad"""
+    try:
+        from monitor.inactividad import suscribir_inactividad, retraso_maximo_deteccion
+    except Exception as e:
+        print(f"⚠️ Atribución sin inactividad: {e}")
+        return UnionInactividad(0, _emitir_span)
+
+    union = UnionInactividad(retraso_maximo_deteccion(), _emitir_span)
+    suscribir_inactividad(union.registrar_cambio)
+    return union
+
+def _eventos_ventana_habilitados():
+    """Indica si la configuración permite usar notificaciones de cambio de ventana"""
+    try:
+        from config import config_sistema
+        valor = config_sistema.obtener_configuracion('monitoreo', 'eventos_ventana')
+        return True if valor is None else bool(valor)
+    except Exception:
+        return True
+
+def _crear_muestreador():
+    """Crea el muestreador con los intervalos de la configuración"""
+    try:
+        from config import config_sistema
+        monitoreo = config_sistema.obtener_configuracion('monitoreo') or {}
+    except Exception:
+        monitoreo = {}
+
+    return MuestreadorAdaptativo(
+        intervalo_min=monitoreo.get('intervalo_ventana_min_segundos', 1),
+        intervalo_max=monitoreo.get('intervalo_ventana_segundos', 60)
+    )
 
 class MonitorVentanas:
-    def __init__(self):
+    # Títulos seguidos con precisión; el resto se aproxima (Space-Saving)
+    MAX_TITULOS = 100
+    MAX_PROCESOS = 256
+
+    def __init__(self, fuente_cambios=None, reloj=None, leer_snapshot=None):
+        """
+        Args:
+            fuente_cambios (FuenteCambiosVentana): fuente de eventos de cambio (None = la del SO si hay)
+            reloj (Reloj): reloj de pared (RelojSimulado en simulaciones)
+            leer_snapshot (callable): reemplaza la consulta al SO de la ventana activa (simulaciones)
+        """
+        self._reloj = reloj or RELOJ_SISTEMA
+        self._leer_snapshot = leer_snapshot
         self.ventana_anterior = ""
-        self.tiempo_inicio_ventana = time.time()
-        self.tiempos_por_aplicacion = {}
-        
-    def get_active_window(self):
-        """Obtiene el título de la ventana activa"""
+        self.proceso_anterior = None
+        self.tiempo_inicio_ventana = self._reloj.ahora()
+        self.tiempos_por_aplicacion = ContadorTopK(self.MAX_TITULOS)
+        self.tiempos_por_proceso = ContadorTopK(self.MAX_PROCESOS)
+        self.muestreador = _crear_muestreador()
+        self.fuente_cambios = fuente_cambios
+        self.cache_procesos = CacheProcesos()
+        self.snapshot_actual = SNAPSHOT_DESCONOCIDO
+        self._snapshot_span = None
+        self._ultima_muestra = None
+        self.union_inactividad = _crear_union_inactividad()
+        self._detener = threading.Event()
+        self._despertar = threading.Event()
+        self._lock_muestra = threading.Lock()
+
+    def obtener_snapshot(self):
+        """Obtiene (hwnd, título, pid, proceso) de la ventana activa con una sola consulta"""
+        if self._leer_snapshot is not None:
+            return self._leer_snapshot()
+
         try:
-            window = win32gui.GetForegroundWindow()
-            return win32gui.GetWindowText(window)
+            hwnd = win32gui.GetForegroundWindow()
+            titulo = win32gui.GetWindowText(hwnd)
+            _, pid = win32gui.GetWindowThreadProcessId(hwnd)
         except:
-            return "Desconocida"
-    
+            return SNAPSHOT_DESCONOCIDO
+
+        anterior = self.snapshot_actual
+        misma_ventana = hwnd == anterior.hwnd and pid == anterior.pid
+        proceso = self.cache_procesos.obtener_nombre(pid, validar=not misma_ventana)
+
+        return SnapshotVentana(hwnd, titulo, pid, proceso)
+
+    def get_active_window(self):
+        """Obtiene el título de la ventana activa"""
+        return self.obtener_snapshot().titulo
+
     def get_process_name(self):
         """Obtiene el nombre del proceso de la ventana activa"""
+        return self.obtener_snapshot().proceso
+
+    def actualizar_tiempo_aplicacion(self, aplicacion, tiempo_usado, proceso=None):
+        """Actualiza el tiempo acumulado por título de ventana y por proceso"""
+        self.tiempos_por_aplicacion.agregar(aplicacion, tiempo_usado)
+        if proceso:
+            self.tiempos_por_proceso.agregar(proceso, tiempo_usado)
+
+    def muestrear(self, cambio_notificado=False):
+        """
+        Toma una muestra de la ventana activa; retorna True si hubo cambio de ventana
+
+        Args:
+            cambio_notificado (bool): la muestra se toma porque una fuente de eventos
+                notificó el cambio en este instante, así que no hay que estimarlo
+        """
+        with self._lock_muestra:
+            return self._muestrear(cambio_notificado)
+
+    def _muestrear(self, cambio_notificado):
+        ahora = self._reloj.ahora()
+        snapshot = self.obtener_snapshot()
+        self.snapshot_actual = snapshot
+        ventana_actual = snapshot.titulo
+        hubo_cambio = False
+
+        if ventana_actual != self.ventana_anterior and ventana_actual:
+            proceso_actual = snapshot.proceso
+
+            # Sondeando, el cambio ocurrió entre la muestra anterior y esta: se estima en el punto medio
+            if self._ultima_muestra is not None and not cambio_notificado:
+                momento_cambio = (self._ultima_muestra + ahora) / 2
+            else:
+                momento_cambio = ahora
+
+            # Calcular tiempo en la ventana anterior
+            if self.ventana_anterior:
+                tiempo_usado = max(0.0, momento_cambio - self.tiempo_inicio_ventana)
+                self.actualizar_tiempo_aplicacion(self.ventana_anterior, tiempo_usado, self.proceso_anterior)
+                self._cerrar_span(momento_cambio)
+
+                if tiempo_usado > 30:  # Solo registrar si estuvo más de 30 segundos
+                    registrar_evento(f"Cambio de aplicación: {self.ventana_anterior} -> {ventana_actual} (tiempo: {tiempo_usado:.1f}s)")
+
+            # Registrar nueva ventana
+            registrar_evento(f"Ventana activa: {ventana_actual} ({proceso_actual})")
+            self.ventana_anterior = ventana_actual
+            self.proceso_anterior = proceso_actual
+            self.tiempo_inicio_ventana = momento_cambio
+            self._abrir_span(momento_cambio, snapshot)
+            hubo_cambio = True
+
+        elif self._snapshot_span and (ahora - self._inicio_span >= MAX_DURACION_SPAN
+                                      or fecha_local(ahora) != fecha_local(self._inicio_span)):
+            # Partir sesiones muy largas (acota lo que se pierde si el proceso cae) y cerrar el día al pasar la medianoche
+            self._cerrar_span(ahora)
+            self._abrir_span(ahora, snapshot)
+
+        self._ultima_muestra = ahora
+        self.union_inactividad.avanzar(ahora)
+        return hubo_cambio
+
+    def _abrir_span(self, inicio, snapshot):
+        """Comienza la sesión en primer plano de la ventana indicada"""
+        self._inicio_span = inicio
+        self._snapshot_span = snapshot
+
+    def _cerrar_span(self, fin):
+        """Cierra la sesión en primer plano abierta y la encola, partida por día local"""
+        snapshot = self._snapshot_span
+        if snapshot is None:
+            return
+
+        self._snapshot_span = None
+        categoria = motor_categorias.categorizar(snapshot.proceso)
+        for _, inicio, fin_parte in partir_por_dia(self._inicio_span, fin):
+            self.union_inactividad.agregar_span(SpanVentana(
+                inicio, fin_parte, snapshot.proceso, snapshot.pid, snapshot.titulo, categoria
+            ))
+
+    def notificar_cambio(self):
+        """Callback de las fuentes de eventos: despierta el bucle para muestrear ya"""
+        self._despertar.set()
+
+    def _iniciar_fuente_cambios(self):
+        """Conecta una fuente de eventos de cambio de ventana; retorna True si quedó activa"""
+        if self.fuente_cambios is None and _eventos_ventana_habilitados():
+            self.fuente_cambios = crear_fuente_cambios_ventana()
+
+        if self.fuente_cambios is None:
+            return False
+
         try:
-            window = win32gui.GetForegroundWindow()
-            _, pid = win32gui.GetWindowThreadProcessId(window)
-            process = psutil.Process(pid)
-            return process.name()
-        except:
-            return "proceso_desconocido"
-    
-    def actualizar_tiempo_aplicacion(self, aplicacion, tiempo_usado):
-        """Actualiza el tiempo acumulado por aplicación"""
-        if aplicacion in self.tiempos_por_aplicacion:
-            self.tiempos_por_aplicacion[aplicacion] += tiempo_usado
-        else:
-            self.tiempos_por_aplicacion[aplicacion] = tiempo_usado
-    
+            if self.fuente_cambios.iniciar(self.notificar_cambio):
+                print(f"🪟 Cambios de ventana por eventos ({self.fuente_cambios.nombre})")
+                return True
+        except Exception as e:
+            print(f"⚠️ No se pudo iniciar la fuente de eventos de ventana: {e}")
+
+        self.fuente_cambios = None
+        return False
+
     def iniciar_monitoreo(self):
-        """Inicia el monitoreo continuo de ventanas"""
+        """
+        Inicia el monitoreo continuo de ventanas
+
+        Con una fuente de eventos disponible se muestrea en cada cambio notificado y,
+        como latido, al intervalo máximo (para captar cambios de título dentro de la
+        misma ventana). Sin fuente se usa el muestreo adaptativo.
+        """
         print("🪟 Iniciando monitoreo de ventanas activas...")
-        
-        while True:
+
+        por_eventos = self._iniciar_fuente_cambios()
+        cambio_notificado = False
+
+        while not self._detener.is_set():
             try:
-                ventana_actual = self.get_active_window()
-                proceso_actual = self.get_process_name()
-                
-                if ventana_actual != self.ventana_anterior and ventana_actual:
-                    # Calcular tiempo en la ventana anterior
-                    if self.ventana_anterior:
-                        tiempo_usado = time.time() - self.tiempo_inicio_ventana
-                        self.actualizar_tiempo_aplicacion(self.ventana_anterior, tiempo_usado)
-                        
-                        if tiempo_usado > 30:  # Solo registrar si estuvo más de 30 segundos
-                            registrar_evento(f"Cambio de aplicación: {self.ventana_anterior} -> {ventana_actual} (tiempo: {tiempo_usado:.1f}s)")
-                    
-                    # Registrar nueva ventana
-                    registrar_evento(f"Ventana activa: {ventana_actual} ({proceso_actual})")
-                    self.ventana_anterior = ventana_actual
-                    self.tiempo_inicio_ventana = time.time()
-                
-                time.sleep(60)  # Verificar cada 60 segundos según especificación
-                
+                hubo_cambio = self.muestrear(cambio_notificado)
+
+                if por_eventos:
+                    intervalo = self.muestreador.intervalo_max
+                else:
+                    intervalo = self.muestreador.siguiente_intervalo(hubo_cambio, _segundos_sin_entrada())
+
+                cambio_notificado = self._despertar.wait(intervalo)
+                self._despertar.clear()
+
             except Exception as e:
                 print(f"Error en monitoreo de ventanas: {e}")
-                time.sleep(5)
-    
-    def obtener_estadisticas(self):
-        """Retorna las estadísticas de tiempo por aplicación"""
-        # Actualizar tiempo de la aplicación actual
+                self._detener.wait(5)
+
+    def detener(self):
+        """Detiene el bucle de monitoreo y la fuente de eventos, y guarda la sesión abierta"""
+        self._detener.set()
+        self._despertar.set()
+        if self.fuente_cambios:
+            self.fuente_cambios.detener()
+
+        with self._lock_muestra:
+            self._cerrar_span(self._reloj.ahora())
+        self.union_inactividad.vaciar()
+        escritor_db.vaciar()
+
+    def _acumular_ventana_actual(self):
+        """Suma a los contadores el tiempo transcurrido en la ventana actual"""
         if self.ventana_anterior:
-            tiempo_actual = time.time() - self.tiempo_inicio_ventana
-            self.actualizar_tiempo_aplicacion(self.ventana_anterior, tiempo_actual)
-        
-        return self.tiempos_por_aplicacion
+            ahora = self._reloj.ahora()
+            tiempo_actual = ahora - self.tiempo_inicio_ventana
+            self.actualizar_tiempo_aplicacion(self.ventana_anterior, tiempo_actual, self.proceso_anterior)
+            self.tiempo_inicio_ventana = ahora
+
+    def obtener_estadisticas(self, limite=None):
+        """Retorna {título: segundos} de los títulos más usados (memoria acotada)"""
+        with self._lock_muestra:
+            self._acumular_ventana_actual()
+            return {titulo: segundos for titulo, segundos, _ in self.tiempos_por_aplicacion.top(limite)}
+
+    def obtener_estadisticas_por_proceso(self, limite=None):
+        """Retorna {proceso: segundos} agregando todos los títulos de cada proceso"""
+        with self._lock_muestra:
+            self._acumular_ventana_actual()
+            return {proceso: segundos for proceso, segundos, _ in self.tiempos_por_proceso.top(limite)}
 
 def test_ventana_activa():
     monitor = MonitorVentanas()
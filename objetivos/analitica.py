@@ -0,0 +1,242 @@
+# objetivos/analitica.py - Estadísticas de objetivos a largo plazo mantenidas de forma incremental
+
+import threading
+from datetime import date, timedelta
+from storage.database import obtener_totales_objetivos_por_dia
+from utils.fechas import fecha_hoy
+
+# Fracción de objetivos completados para que un día cuente como cumplido (racha)
+UMBRAL_DIA_CUMPLIDO = 1.0
+
+DIAS_SEMANA = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+
+def _progreso(objetivo):
+    """Avance de un objetivo entre 0 y 1"""
+    return max(0.0, min(1.0, objetivo['progreso'] / max(objetivo['meta'], 1)))
+
+def _cumplido(total, completados):
+    return total > 0 and completados >= UMBRAL_DIA_CUMPLIDO * total
+
+class AnaliticaObjetivos:
+    """
+    Agregados de todo el historial de objetivos, actualizados con cada cambio
+
+    Al iniciar se leen los totales por día con una sola consulta agregada en SQLite.
+    Después cada evento del gestor recalcula solo el día afectado (desde su cache)
+    y aplica la diferencia a los totales, a las estadísticas por día de la semana y
+    a las rachas. Las rachas se guardan como tramos de días consecutivos indexados
+    por inicio y por fin: sumar un día cumplido une a lo sumo dos tramos. Así las
+    consultas no recorren el historial.
+
+    Un día cuenta para la racha si completó al menos UMBRAL_DIA_CUMPLIDO de sus
+    objetivos; un día sin objetivos la corta. La racha actual incluye hoy solo si
+    ya está cumplido (si no, termina ayer: el día todavía no terminó).
+    """
+
+    def __init__(self, gestor):
+        self.gestor = gestor
+        self._lock = threading.Lock()
+        self._dias = {}          # fecha -> (total, completados, suma_progreso)
+        self._total = 0
+        self._completados = 0
+        self._suma_progreso = 0.0
+        self._por_dia_semana = [[0, 0, 0, 0] for _ in DIAS_SEMANA]  # días, días cumplidos, objetivos, completados
+        self._cumplidos = set()  # ordinales de los días cumplidos
+        self._rachas = {}        # ordinal de inicio -> ordinal de fin
+        self._fin_a_inicio = {}
+        self._mas_larga = 0
+        self._cancelar = None
+        self._pendientes = set()  # fechas cambiadas durante la carga inicial (None al terminar)
+
+        # Suscribir antes de leer: los cambios que lleguen mientras tanto se anotan y se
+        # recalculan al final. vaciar() toma el lock del gestor, así que va sin el propio
+        self._cancelar = gestor.suscribir_cambios(self._al_cambiar_objetivo)
+        gestor.vaciar()
+        totales = obtener_totales_objetivos_por_dia()
+
+        with self._lock:
+            for fecha, total, completados, suma_progreso in totales:
+                self._aplicar(fecha, (total, completados or 0, suma_progreso or 0.0))
+            pendientes, self._pendientes = self._pendientes, None
+
+        for fecha in sorted(pendientes):
+            self._al_cambiar_objetivo(None, fecha)
+
+    def detener(self):
+        """Deja de seguir los cambios del gestor"""
+        if self._cancelar:
+            self._cancelar()
+            self._cancelar = None
+
+    def _al_cambiar_objetivo(self, evento, fecha=None, objetivo=None):
+        if fecha is None:
+            return
+
+        with self._lock:
+            if self._pendientes is not None:
+                self._pendientes.add(fecha)
+                return
+
+        objetivos = self.gestor.obtener_resumen_diario(fecha)['objetivos']
+        valores = (len(objetivos), sum(1 for o in objetivos if o['completado']), sum(_progreso(o) for o in objetivos))
+
+        with self._lock:
+            self._aplicar(fecha, valores)
+
+    def _aplicar(self, fecha, valores):
+        """Reemplaza los valores de un día y ajusta todos los agregados (con el lock tomado)"""
+        anterior = self._dias.get(fecha, (0, 0, 0.0))
+        if anterior == valores:
+            return
+
+        dia = date.fromisoformat(fecha)
+        semana = self._por_dia_semana[dia.weekday()]
+
+        for (total, completados, suma_progreso), signo in ((anterior, -1), (valores, 1)):
+            if not total:
+                continue
+            self._total += signo * total
+            self._completados += signo * completados
+            self._suma_progreso += signo * suma_progreso
+            semana[0] += signo
+            semana[1] += signo * _cumplido(total, completados)
+            semana[2] += signo * total
+            semana[3] += signo * completados
+
+        if valores[0]:
+            self._dias[fecha] = valores
+        else:
+            self._dias.pop(fecha, None)
+
+        ordinal = dia.toordinal()
+        cumplido = _cumplido(valores[0], valores[1])
+        if cumplido and ordinal not in self._cumplidos:
+            self._agregar_dia_cumplido(ordinal)
+        elif not cumplido and ordinal in self._cumplidos:
+            self._quitar_dia_cumplido(ordinal)
+
+    def _agregar_dia_cumplido(self, ordinal):
+        self._cumplidos.add(ordinal)
+        inicio = fin = ordinal
+
+        if ordinal - 1 in self._fin_a_inicio:
+            inicio = self._fin_a_inicio.pop(ordinal - 1)
+            del self._rachas[inicio]
+        if ordinal + 1 in self._rachas:
+            fin = self._rachas.pop(ordinal + 1)
+            del self._fin_a_inicio[fin]
+
+        self._rachas[inicio] = fin
+        self._fin_a_inicio[fin] = inicio
+        self._mas_larga = max(self._mas_larga, fin - inicio + 1)
+
+    def _quitar_dia_cumplido(self, ordinal):
+        """Parte el tramo que contiene el día (poco frecuente: se busca entre los tramos)"""
+        self._cumplidos.discard(ordinal)
+        inicio = next(i for i, f in self._rachas.items() if i <= ordinal <= f)
+        fin = self._rachas.pop(inicio)
+        del self._fin_a_inicio[fin]
+
+        for nuevo_inicio, nuevo_fin in ((inicio, ordinal - 1), (ordinal + 1, fin)):
+            if nuevo_inicio <= nuevo_fin:
+                self._rachas[nuevo_inicio] = nuevo_fin
+                self._fin_a_inicio[nuevo_fin] = nuevo_inicio
+
+        if fin - inicio + 1 == self._mas_larga:
+            self._mas_larga = max((f - i + 1 for i, f in self._rachas.items()), default=0)
+
+    def tasa_dia(self, fecha):
+        """Porcentaje de objetivos completados en una fecha (None si no tuvo objetivos)"""
+        with self._lock:
+            total, completados, _ = self._dias.get(fecha, (0, 0, 0.0))
+        return completados / total * 100 if total else None
+
+    def serie(self, desde, hasta=None):
+        """
+        Serie diaria para graficar, un elemento por día entre desde y hasta (inclusive)
+
+        Returns:
+            list: dicts con fecha, total, completados, porcentaje_completado y progreso_medio
+        """
+        dia = date.fromisoformat(desde)
+        ultimo = date.fromisoformat(hasta or fecha_hoy())
+        serie = []
+
+        with self._lock:
+            while dia <= ultimo:
+                fecha = dia.isoformat()
+                total, completados, suma_progreso = self._dias.get(fecha, (0, 0, 0.0))
+                serie.append({
+                    'fecha': fecha,
+                    'total': total,
+                    'completados': completados,
+                    'porcentaje_completado': completados / total * 100 if total else None,
+                    'progreso_medio': suma_progreso / total if total else None
+                })
+                dia += timedelta(days=1)
+
+        return serie
+
+    def rachas(self):
+        """Racha actual y más larga de días cumplidos"""
+        hoy = date.fromisoformat(fecha_hoy()).toordinal()
+        with self._lock:
+            fin = hoy if hoy in self._cumplidos else hoy - 1
+            inicio = self._fin_a_inicio.get(fin)
+            actual = fin - inicio + 1 if inicio is not None else 0
+            return {'actual': actual, 'mas_larga': self._mas_larga}
+
+    def por_dia_semana(self):
+        """Días, días cumplidos y porcentaje de objetivos completados por día de la semana"""
+        with self._lock:
+            return [
+                {
+                    'dia': nombre,
+                    'dias': dias,
+                    'dias_cumplidos': dias_cumplidos,
+                    'porcentaje_completado': completados / objetivos * 100 if objetivos else None
+                }
+                for nombre, (dias, dias_cumplidos, objetivos, completados) in zip(DIAS_SEMANA, self._por_dia_semana)
+            ]
+
+    def resumen(self):
+        """Totales de todo el historial, rachas y estadísticas por día de la semana"""
+        with self._lock:
+            resumen = {
+                'dias_con_objetivos': len(self._dias),
+                'dias_cumplidos': len(self._cumplidos),
+                'total_objetivos': self._total,
+                'objetivos_completados': self._completados,
+                'porcentaje_completado': self._completados / self._total * 100 if self._total else 0,
+                'progreso_medio': self._suma_progreso / self._total if self._total else 0
+            }
+
+        resumen['rachas'] = self.rachas()
+        resumen['por_dia_semana'] = self.por_dia_semana()
+        return resumen
+
+# Instancia única del proceso
+_analitica_compartida = None
+_lock_analitica = threading.Lock()
+
+def obtener_analitica_objetivos():
+    """Retorna la AnaliticaObjetivos compartida (se crea la primera vez, sobre el gestor compartido)"""
+    global _analitica_compartida
+    with _lock_analitica:
+        if _analitica_compartida is None:
+            from objetivos.gestor_objetivos import obtener_gestor_objetivos
+            _analitica_compartida = AnaliticaObjetivos(obtener_gestor_objetivos())
+        return _analitica_compartida
+
+if __name__ == "__main__":
+    analitica = obtener_analitica_objetivos()
+    resumen = analitica.resumen()
+
+    print("📊 HISTORIAL DE OBJETIVOS")
+    print(f"Días con objetivos: {resumen['dias_con_objetivos']} ({resumen['dias_cumplidos']} cumplidos)")
+    print(f"Objetivos completados: {resumen['objetivos_completados']}/{resumen['total_objetivos']} "
+          f"({resumen['porcentaje_completado']:.1f}%) - progreso medio {resumen['progreso_medio'] * 100:.0f}%")
+    print(f"🔥 Racha actual: {resumen['rachas']['actual']} días - más larga: {resumen['rachas']['mas_larga']} días")
+    for dia in resumen['por_dia_semana']:
+        porcentaje = f"{dia['porcentaje_completado']:.0f}%" if dia['porcentaje_completado'] is not None else "-"
+        print(f"   {dia['dia']}: {porcentaje} ({dia['dias_cumplidos']}/{dia['dias']} días cumplidos)")
@@ -1,139 +1,525 @@
 # objetivos/gestor_objetivos.py
 
+import atexit
 import json
 import os
-from datetime import datetime, date
+import threading
+from contextlib import contextmanager
+from datetime import datetime
 from monitor.logger import registrar_evento
-from pomodoro.notificador import NotificadorPomodoro
+from objetivos.reglas import validar_regla
+from pomodoro.notificador import obtener_notificador
+from storage.database import (insertar_objetivos, actualizar_objetivo, actualizar_objetivos,
+                              eliminar_objetivo_db, obtener_objetivos, insertar_plantilla,
+                              desactivar_plantilla, obtener_plantillas, materializar_plantillas)
+from utils.eventos import BusEventos
+from utils.fechas import fecha_hoy
+from utils.helpers import guardar_json_atomico
+from utils.planificador import planificador
+
+# Archivo donde se guardaban los objetivos antes de SQLite (se migra una vez al iniciar)
+ARCHIVO_OBJETIVOS_JSON = 'storage/objetivos.json'
+
+# Exportación opcional; otro nombre para que no se tome como JSON heredado a migrar
+ARCHIVO_EXPORTACION = 'storage/objetivos_export.json'
+
+# Recurrencias de las plantillas de objetivos
+RECURRENCIAS = ('diaria', 'laborables', 'semanal')
+
+# Días que el almacén mantiene en memoria además del actual
+MAX_DIAS_CACHEADOS = 31
+
+# Escritura diferida: los avances se guardan tras VENTANA_ESCRITURA segundos sin cambios,
+# pero nunca quedan retenidos más de ESPERA_MAXIMA_ESCRITURA segundos
+VENTANA_ESCRITURA = 2.0
+ESPERA_MAXIMA_ESCRITURA = 10.0
 
 class GestorObjetivos:
-    def __init__(self):
-        self.archivo_objetivos = 'storage/objetivos.json'
-        self.objetivos_diarios = {}
-        self.notificador = NotificadorPomodoro()
+    """
+    Almacén de objetivos del proceso (usar obtener_gestor_objetivos(), no instanciar)
+    
+    Las mutaciones se hacen bajo un RLock: leer, modificar y escribir la fila ocurre
+    sin que otro hilo intercale, así que la UI y los procesos de fondo no pierden
+    avances. Las lecturas devuelven copias de la cache, sin tocar disco. Los cambios
+    se publican en self.eventos fuera del lock.
+    
+    Avances y completados se aplican en memoria al instante pero se escriben con
+    retraso: una ráfaga de clics cuesta una sola transacción, una línea de log y una
+    notificación de progreso por objetivo. vaciar() fuerza la escritura (se llama
+    también al salir del proceso).
+    """
+    
+    def __init__(self, archivo_objetivos=ARCHIVO_OBJETIVOS_JSON, planificador_plazos=None):
+        """
+        Los objetivos viven en la tabla objetivos_diarios (una fila por objetivo).
+        En memoria solo se cachean los días consultados, no el historial completo.
+        
+        Args:
+            archivo_objetivos (str): JSON heredado; si existe se migra una vez a la base de datos
+            planificador_plazos (PlanificadorPlazos): planificador de la escritura diferida
+        """
+        self.archivo_objetivos = archivo_objetivos
+        self.objetivos_diarios = {}  # fecha -> lista de objetivos (cache de los días leídos)
+        self._por_id = {}            # id -> objetivo de la cache
+        self._lock = threading.RLock()
+        self._dias_materializados = set()  # días cuyas plantillas ya se revisaron en este proceso
+        self._diferidos = []  # (fecha, avisos, creados) a publicar al soltar el lock
+        self._anidado = 0     # profundidad de _con_lock en el hilo que tiene el lock
+        self.notificador = obtener_notificador()
+        
+        # Escritura diferida: id -> {'objetivo', 'incremento'} aún no guardados
+        self._planificador = planificador_plazos or planificador
+        self._pendientes = {}
+        self._tarea_escritura = None
+        self._primer_pendiente = None
+        atexit.register(self.vaciar)
+        
+        # Eventos: objetivo_creado, objetivo_avanzado, objetivo_completado, objetivo_modificado
+        # y objetivo_eliminado
+        self.eventos = BusEventos()
+        
+        self._migrar_json()
         self.cargar_objetivos()
+    
+    def suscribir_cambios(self, callback):
+        """Registra callback(evento, fecha, objetivo) para todo cambio; retorna la función que cancela"""
+        return self.eventos.suscribir(BusEventos.TODOS, callback)
+        
+    def cargar_objetivos(self, fecha=None):
+        """
+        Lee de la base de datos los objetivos de un día (por defecto hoy) y reemplaza su cache
         
-    def cargar_objetivos(self):
-        """Carga los objetivos desde el archivo JSON"""
+        La primera lectura de hoy materializa las plantillas recurrentes que aplican;
+        los días pasados no se rellenan y los futuros no se generan por adelantado.
+        """
+        fecha = fecha or fecha_hoy()
+        
+        with self._con_lock():
+            return self._cargar_dia(fecha)
+    
+    def _cargar_dia(self, fecha):
+        """
+        Cuerpo de cargar_objetivos (con el lock tomado)
+        
+        Los avisos de progreso y los objetivos creados desde plantillas quedan diferidos:
+        _con_lock los publica cuando el lock se suelta del todo.
+        """
+        # Lo pendiente va antes a la base para no leer (y cachear) valores viejos
+        avisos = self._escribir_pendientes()
+        creados = set()
+        if fecha == fecha_hoy() and fecha not in self._dias_materializados:
+            creados = self._materializar(fecha)
+            self._dias_materializados.add(fecha)
+        objetivos = obtener_objetivos(fecha)
+        
+        for objetivo in self.objetivos_diarios.get(fecha, []):
+            self._por_id.pop(objetivo['id'], None)
+        self.objetivos_diarios[fecha] = objetivos
+        self._por_id.update((objetivo['id'], objetivo) for objetivo in objetivos)
+        self._recortar_cache()
+        copias = [dict(objetivo) for objetivo in objetivos]
+        
+        self._diferidos.append((fecha, avisos, [copia for copia in copias if copia['id'] in creados]))
+        return copias
+    
+    @contextmanager
+    def _con_lock(self):
+        """
+        Toma el lock; al soltarlo el bloque más externo publica lo diferido
+        
+        Los suscriptores pueden volver a llamar al gestor, así que nunca se les
+        notifica con el lock tomado.
+        """
+        with self._lock:
+            self._anidado += 1
+            try:
+                yield
+            finally:
+                self._anidado -= 1
+                externo = self._anidado == 0
+        if externo:
+            self._publicar_diferidos()
+    
+    def _publicar_diferidos(self):
+        """Publica los avisos y creados que dejó _cargar_dia (sin el lock)"""
+        with self._lock:
+            diferidos, self._diferidos = self._diferidos, []
+        for fecha, avisos, creados in diferidos:
+            self._avisar_progreso(avisos)
+            self._publicar_creados(fecha, creados)
+    
+    def _materializar(self, fecha, plantilla_id=None):
+        """Crea en la base los objetivos recurrentes del día; retorna sus ids (con el lock tomado)"""
         try:
-            if os.path.exists(self.archivo_objetivos):
-                with open(self.archivo_objetivos, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.objetivos_diarios = data
-            else:
-                self.objetivos_diarios = {}
-                self.guardar_objetivos()
+            return set(materializar_plantillas(fecha, plantilla_id))
         except Exception as e:
-            print(f"Error al cargar objetivos: {e}")
-            self.objetivos_diarios = {}
+            print(f"Error al crear objetivos recurrentes: {e}")
+            return set()
+    
+    def _publicar_creados(self, fecha, objetivos):
+        """Anuncia los objetivos creados desde plantillas (sin el lock)"""
+        if not objetivos:
+            return
+        
+        registrar_evento(f"🔁 Objetivos recurrentes del día: {', '.join(o['descripcion'] for o in objetivos)}")
+        for objetivo in objetivos:
+            self.eventos.publicar('objetivo_creado', fecha=fecha, objetivo=objetivo)
+    
+    def _objetivos_de(self, fecha):
+        """Lista cacheada de un día, leída de la base la primera vez (con el lock tomado)"""
+        if fecha not in self.objetivos_diarios:
+            self._cargar_dia(fecha)
+        return self.objetivos_diarios[fecha]
     
-    def guardar_objetivos(self):
-        """Guarda los objetivos en el archivo JSON"""
+    def _recortar_cache(self):
+        """Descarta los días más viejos de la cache (el actual siempre queda)"""
+        hoy = fecha_hoy()
+        sobrantes = sorted(fecha for fecha in self.objetivos_diarios if fecha != hoy)
+        for fecha in sobrantes[:max(0, len(sobrantes) - MAX_DIAS_CACHEADOS)]:
+            for objetivo in self.objetivos_diarios.pop(fecha):
+                self._por_id.pop(objetivo['id'], None)
+    
+    def _migrar_json(self):
+        """Pasa una sola vez los objetivos del JSON heredado a objetivos_diarios"""
+        if not os.path.exists(self.archivo_objetivos):
+            return
+        
         try:
-            os.makedirs(os.path.dirname(self.archivo_objetivos), exist_ok=True)
-            with open(self.archivo_objetivos, 'w', encoding='utf-8') as f:
-                json.dump(self.objetivos_diarios, f, ensure_ascii=False, indent=2)
+            with open(self.archivo_objetivos, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            
+            filas = [
+                {
+                    'fecha': fecha,
+                    'descripcion': objetivo['descripcion'],
+                    'tipo': objetivo.get('tipo', 'contador'),
+                    'meta': objetivo.get('meta', 1),
+                    'progreso': objetivo.get('progreso', 0),
+                    'completado': bool(objetivo.get('completado')),
+                    'fecha_creacion': objetivo.get('fecha_creacion'),
+                    'fecha_completado': objetivo.get('fecha_completado')
+                }
+                for fecha, objetivos in sorted(data.items())
+                for objetivo in objetivos
+            ]
+            insertar_objetivos(filas)
+            
+            # El archivo queda como respaldo con otro nombre para no migrarlo dos veces
+            os.replace(self.archivo_objetivos, f"{self.archivo_objetivos}.migrado")
+            print(f"✅ {len(filas)} objetivos migrados de {self.archivo_objetivos} a la base de datos")
+            
         except Exception as e:
-            print(f"Error al guardar objetivos: {e}")
+            print(f"Error al migrar objetivos desde JSON: {e}")
+    
+    def exportar_objetivos_json(self, ruta=None, desde=None, hasta=None):
+        """
+        Exporta objetivos a JSON con el formato {fecha: [objetivos]} (opcional, para respaldo)
+        
+        Sin desde/hasta exporta todo el historial.
+        
+        Returns:
+            str: ruta del archivo, o None si falló
+        """
+        ruta = ruta or ARCHIVO_EXPORTACION
+        self.vaciar()
+        try:
+            por_fecha = {}
+            for objetivo in obtener_objetivos(desde=desde or '0000-01-01', hasta=hasta):
+                por_fecha.setdefault(objetivo.pop('fecha'), []).append(objetivo)
+            
+            guardar_json_atomico(ruta, por_fecha)
+            print(f"✅ Objetivos exportados: {ruta}")
+            return ruta
+        except Exception as e:
+            print(f"Error al exportar objetivos: {e}")
+            return None
     
-    def crear_objetivo_diario(self, descripcion, meta_numerica=None, tipo="contador"):
-        """Crea un nuevo objetivo para el día actual"""
-        fecha_hoy = date.today().isoformat()
+    def crear_objetivo_diario(self, descripcion, meta_numerica=None, tipo="contador", regla=None):
+        """
+        Crea un nuevo objetivo para el día actual
+        
+        Args:
+            regla (dict): avance automático según la ventana activa (ver objetivos/reglas.py)
+        """
+        fecha = fecha_hoy()
         
-        if fecha_hoy not in self.objetivos_diarios:
-            self.objetivos_diarios[fecha_hoy] = []
+        try:
+            regla = validar_regla(regla)
+        except ValueError as e:
+            print(f"❌ Regla no válida: {e}")
+            return None
         
         objetivo = {
-            'id': len(self.objetivos_diarios[fecha_hoy]) + 1,
+            'fecha': fecha,
             'descripcion': descripcion,
             'tipo': tipo,  # 'contador', 'tiempo', 'boolean'
             'meta': meta_numerica or 1,
             'progreso': 0,
             'completado': False,
             'fecha_creacion': datetime.now().isoformat(),
-            'fecha_completado': None
+            'fecha_completado': None,
+            'regla': regla
         }
         
-        self.objetivos_diarios[fecha_hoy].append(objetivo)
-        self.guardar_objetivos()
+        with self._con_lock():
+            try:
+                objetivo['id'] = insertar_objetivos([objetivo])[0]
+            except Exception as e:
+                print(f"Error al guardar objetivo: {e}")
+                return None
+            
+            self._objetivos_de(fecha).append(objetivo)
+            self._por_id[objetivo['id']] = objetivo
+            copia = dict(objetivo)
         
         registrar_evento(f"🎯 Nuevo objetivo creado: {descripcion}")
         print(f"✅ Objetivo creado: {descripcion} (Meta: {meta_numerica or 1})")
+        self.eventos.publicar('objetivo_creado', fecha=fecha, objetivo=copia)
         
-        return objetivo['id']
+        return copia['id']
     
-    def avanzar_objetivo(self, objetivo_id, incremento=1):
-        """Avanza el progreso de un objetivo"""
-        fecha_hoy = date.today().isoformat()
+    def crear_plantilla(self, descripcion, meta_numerica=None, tipo="contador", recurrencia="diaria",
+                        dia_semana=None, regla=None):
+        """
+        Crea un objetivo recurrente; si aplica hoy, se agrega también a los objetivos de hoy
+        
+        Args:
+            recurrencia (str): 'diaria', 'laborables' (lunes a viernes) o 'semanal'
+            dia_semana (int): 0 = lunes ... 6 = domingo (solo para 'semanal')
+            regla (dict): avance automático (ver objetivos/reglas.py)
+        
+        Returns:
+            int: id de la plantilla, o None si no se pudo crear
+        """
+        if recurrencia not in RECURRENCIAS:
+            print(f"❌ Recurrencia no válida: {recurrencia} (usa {', '.join(RECURRENCIAS)})")
+            return None
+        if recurrencia == 'semanal' and dia_semana not in range(7):
+            print("❌ Un objetivo semanal necesita dia_semana entre 0 (lunes) y 6 (domingo)")
+            return None
         
-        if fecha_hoy not in self.objetivos_diarios:
-            print("❌ No hay objetivos para hoy")
+        try:
+            regla = validar_regla(regla)
+        except ValueError as e:
+            print(f"❌ Regla no válida: {e}")
+            return None
+        
+        fecha = fecha_hoy()
+        with self._con_lock():
+            try:
+                plantilla_id = insertar_plantilla({
+                    'descripcion': descripcion,
+                    'tipo': tipo,
+                    'meta': meta_numerica or 1,
+                    'recurrencia': recurrencia,
+                    'dia_semana': dia_semana if recurrencia == 'semanal' else None,
+                    'regla': regla,
+                    'desde': fecha
+                })
+            except Exception as e:
+                print(f"Error al guardar plantilla: {e}")
+                return None
+            
+            # Hoy ya pudo haberse materializado: la plantilla nueva se agrega sola
+            creados = self._materializar(fecha, plantilla_id)
+            nuevos = [objetivo for objetivo in obtener_objetivos(fecha) if objetivo['id'] in creados]
+            if fecha in self.objetivos_diarios:
+                self.objetivos_diarios[fecha].extend(nuevos)
+                self._por_id.update((objetivo['id'], objetivo) for objetivo in nuevos)
+            copias = [dict(objetivo) for objetivo in nuevos]
+        
+        registrar_evento(f"🔁 Nuevo objetivo recurrente ({recurrencia}): {descripcion}")
+        print(f"✅ Objetivo recurrente creado: {descripcion} ({recurrencia})")
+        self._publicar_creados(fecha, copias)
+        return plantilla_id
+    
+    def eliminar_plantilla(self, plantilla_id):
+        """Deja de repetir un objetivo; los objetivos ya creados (incluido el de hoy) se conservan"""
+        try:
+            eliminada = desactivar_plantilla(plantilla_id)
+        except Exception as e:
+            print(f"Error al eliminar plantilla: {e}")
             return False
         
-        objetivo = self._buscar_objetivo(fecha_hoy, objetivo_id)
-        if not objetivo:
-            print(f"❌ Objetivo {objetivo_id} no encontrado")
-            return False
+        if eliminada:
+            registrar_evento(f"🔁🗑️ Objetivo recurrente {plantilla_id} desactivado")
+        return eliminada
+    
+    def obtener_plantillas(self):
+        """Plantillas de objetivos recurrentes activas"""
+        return obtener_plantillas()
+    
+    def _marcar_pendiente(self, objetivo, incremento=0):
+        """Anota un objetivo modificado y (re)programa la escritura diferida (con el lock tomado)"""
+        pendiente = self._pendientes.setdefault(objetivo['id'], {'objetivo': objetivo, 'incremento': 0})
+        pendiente['incremento'] += incremento
+        
+        ahora = self._planificador.reloj.monotonico()
+        if self._primer_pendiente is None:
+            self._primer_pendiente = ahora
+        if self._tarea_escritura is not None:
+            self._planificador.cancelar(self._tarea_escritura)
+        
+        espera = min(VENTANA_ESCRITURA, self._primer_pendiente + ESPERA_MAXIMA_ESCRITURA - ahora)
+        self._tarea_escritura = self._planificador.programar(espera, self.vaciar)
+    
+    def _escribir_pendientes(self):
+        """
+        Escribe los objetivos pendientes en una transacción (con el lock tomado)
+        
+        Returns:
+            list: (copia del objetivo, incremento acumulado) para avisar fuera del lock
+        """
+        if self._tarea_escritura is not None:
+            self._planificador.cancelar(self._tarea_escritura)
+            self._tarea_escritura = None
+        self._primer_pendiente = None
+        
+        if not self._pendientes:
+            return []
+        
+        pendientes, self._pendientes = self._pendientes, {}
+        try:
+            actualizar_objetivos([
+                {columna: pendiente['objetivo'][columna]
+                 for columna in ('id', 'progreso', 'completado', 'fecha_completado')}
+                for pendiente in pendientes.values()
+            ])
+        except Exception as e:
+            print(f"Error al guardar objetivos: {e}")
+            # Se reintenta en la próxima ventana sin perder lo acumulado
+            for pendiente in pendientes.values():
+                self._marcar_pendiente(pendiente['objetivo'], pendiente['incremento'])
+            return []
         
-        objetivo['progreso'] += incremento
+        return [(dict(pendiente['objetivo']), pendiente['incremento']) for pendiente in pendientes.values()]
+    
+    def _avisar_progreso(self, avisos):
+        """Una notificación y una línea de log por objetivo avanzado en la ráfaga (sin el lock)"""
+        for objetivo, incremento in avisos:
+            if incremento and not objetivo['completado']:
+                self.notificador.mostrar_progreso_objetivo(
+                    objetivo['descripcion'], 
+                    objetivo['progreso'], 
+                    objetivo['meta']
+                )
+                registrar_evento(f"🎯📈 Progreso: {objetivo['descripcion']} ({objetivo['progreso']}/{objetivo['meta']})")
+    
+    def vaciar(self):
+        """Escribe ya los avances pendientes; retorna True si no quedó nada sin guardar"""
+        with self._con_lock():
+            avisos = self._escribir_pendientes()
+            vacio = not self._pendientes
+        
+        self._avisar_progreso(avisos)
+        return vacio
+    
+    def avanzar_objetivo(self, objetivo_id, incremento=1):
+        """Avanza el progreso de un objetivo"""
+        fecha = fecha_hoy()
         
-        # Verificar si se completó el objetivo
-        if objetivo['progreso'] >= objetivo['meta'] and not objetivo['completado']:
-            objetivo['completado'] = True
-            objetivo['fecha_completado'] = datetime.now().isoformat()
+        with self._con_lock():
+            objetivo = self._buscar_objetivo(fecha, objetivo_id)
+            if not objetivo:
+                print(f"❌ Objetivo {objetivo_id} no encontrado")
+                return False
             
-            self.notificador.mostrar_objetivo_completado(objetivo['descripcion'])
-            registrar_evento(f"🎯✅ Objetivo completado: {objetivo['descripcion']}")
-        else:
-            self.notificador.mostrar_progreso_objetivo(
-                objetivo['descripcion'], 
-                objetivo['progreso'], 
-                objetivo['meta']
-            )
-            registrar_evento(f"🎯📈 Progreso: {objetivo['descripcion']} ({objetivo['progreso']}/{objetivo['meta']})")
-        
-        self.guardar_objetivos()
+            objetivo['progreso'] += incremento
+            
+            # Verificar si se completó el objetivo
+            if objetivo['progreso'] >= objetivo['meta'] and not objetivo['completado']:
+                objetivo['completado'] = True
+                objetivo['fecha_completado'] = datetime.now().isoformat()
+                evento = 'objetivo_completado'
+            else:
+                evento = 'objetivo_avanzado'
+            
+            self._marcar_pendiente(objetivo, incremento)
+            copia = dict(objetivo)
+        
+        # El progreso se avisa al escribir la ráfaga; el completado, al momento
+        if evento == 'objetivo_completado':
+            self.notificador.mostrar_objetivo_completado(copia['descripcion'])
+            registrar_evento(f"🎯✅ Objetivo completado: {copia['descripcion']}")
+        
+        self.eventos.publicar(evento, fecha=fecha, objetivo=copia)
         return True
     
     def marcar_objetivo_completado(self, objetivo_id):
         """Marca un objetivo como completado directamente"""
-        fecha_hoy = date.today().isoformat()
+        fecha = fecha_hoy()
         
-        if fecha_hoy not in self.objetivos_diarios:
-            return False
+        with self._con_lock():
+            objetivo = self._buscar_objetivo(fecha, objetivo_id)
+            if not objetivo:
+                return False
+            
+            objetivo['completado'] = True
+            objetivo['progreso'] = objetivo['meta']
+            objetivo['fecha_completado'] = datetime.now().isoformat()
+            
+            self._marcar_pendiente(objetivo)
+            copia = dict(objetivo)
         
-        objetivo = self._buscar_objetivo(fecha_hoy, objetivo_id)
-        if not objetivo:
-            return False
+        self.notificador.mostrar_objetivo_completado(copia['descripcion'])
+        registrar_evento(f"🎯✅ Objetivo marcado como completado: {copia['descripcion']}")
         
-        objetivo['completado'] = True
-        objetivo['progreso'] = objetivo['meta']
-        objetivo['fecha_completado'] = datetime.now().isoformat()
+        self.eventos.publicar('objetivo_completado', fecha=fecha, objetivo=copia)
+        return True
+    
+    def establecer_regla(self, objetivo_id, regla):
+        """Asigna (o quita, con None) la regla de avance automático de un objetivo de hoy"""
+        fecha = fecha_hoy()
         
-        self.notificador.mostrar_objetivo_completado(objetivo['descripcion'])
-        registrar_evento(f"🎯✅ Objetivo marcado como completado: {objetivo['descripcion']}")
+        try:
+            regla = validar_regla(regla)
+        except ValueError as e:
+            print(f"❌ Regla no válida: {e}")
+            return False
+        
+        with self._con_lock():
+            objetivo = self._buscar_objetivo(fecha, objetivo_id)
+            if not objetivo:
+                return False
+            
+            try:
+                actualizar_objetivo(objetivo_id, regla=regla)
+            except Exception as e:
+                print(f"Error al guardar objetivo: {e}")
+                return False
+            
+            objetivo['regla'] = regla
+            copia = dict(objetivo)
         
-        self.guardar_objetivos()
+        self.eventos.publicar('objetivo_modificado', fecha=fecha, objetivo=copia)
         return True
     
     def _buscar_objetivo(self, fecha, objetivo_id):
-        """Busca un objetivo específico por ID en una fecha"""
-        for objetivo in self.objetivos_diarios[fecha]:
-            if objetivo['id'] == objetivo_id:
-                return objetivo
-        return None
+        """Busca un objetivo por ID (índice en memoria) en una fecha (con el lock tomado)"""
+        self._objetivos_de(fecha)
+        objetivo = self._por_id.get(objetivo_id)
+        if objetivo is None or objetivo['fecha'] != fecha:
+            return None
+        return objetivo
+    
+    def obtener_objetivo(self, objetivo_id):
+        """Copia de un objetivo cacheado por ID, o None"""
+        with self._con_lock():
+            objetivo = self._por_id.get(objetivo_id)
+            return dict(objetivo) if objetivo else None
     
     def obtener_objetivos_hoy(self):
-        """Retorna los objetivos del día actual"""
-        fecha_hoy = date.today().isoformat()
-        return self.objetivos_diarios.get(fecha_hoy, [])
+        """Retorna (copias de) los objetivos del día actual"""
+        with self._con_lock():
+            return [dict(objetivo) for objetivo in self._objetivos_de(fecha_hoy())]
     
     def obtener_resumen_diario(self, fecha=None):
         """Obtiene un resumen de los objetivos de una fecha específica"""
         if fecha is None:
-            fecha = date.today().isoformat()
+            fecha = fecha_hoy()
         
-        objetivos = self.objetivos_diarios.get(fecha, [])
+        with self._con_lock():
+            objetivos = [dict(objetivo) for objetivo in self._objetivos_de(fecha)]
         total_objetivos = len(objetivos)
         objetivos_completados = len([obj for obj in objetivos if obj['completado']])
         
@@ -165,47 +551,91 @@ class GestorObjetivos:
             
             print(f"{estado} [{objetivo['id']}] {objetivo['descripcion']}")
             print(f"    Progreso: {progreso} ({porcentaje}%)")
+            if objetivo.get('plantilla_id'):
+                print(f"    Recurrente (plantilla {objetivo['plantilla_id']})")
+            if objetivo.get('regla'):
+                print(f"    Avance automático: {', '.join(f'{k}={v}' for k, v in objetivo['regla'].items())}")
             print()
     
     def eliminar_objetivo(self, objetivo_id):
         """Elimina un objetivo del día actual"""
-        fecha_hoy = date.today().isoformat()
+        fecha = fecha_hoy()
         
-        if fecha_hoy not in self.objetivos_diarios:
-            return False
-        
-        objetivos = self.objetivos_diarios[fecha_hoy]
-        objetivo_eliminar = None
-        
-        for i, objetivo in enumerate(objetivos):
-            if objetivo['id'] == objetivo_id:
-                objetivo_eliminar = objetivos.pop(i)
-                break
-        
-        if objetivo_eliminar:
-            self.guardar_objetivos()
-            registrar_evento(f"🗑️ Objetivo eliminado: {objetivo_eliminar['descripcion']}")
-            return True
+        with self._con_lock():
+            objetivo_eliminar = self._buscar_objetivo(fecha, objetivo_id)
+            if not objetivo_eliminar:
+                return False
+            
+            try:
+                eliminar_objetivo_db(objetivo_id)
+            except Exception as e:
+                print(f"Error al eliminar objetivo: {e}")
+                return False
+            
+            self._objetivos_de(fecha).remove(objetivo_eliminar)
+            del self._por_id[objetivo_id]
+            self._pendientes.pop(objetivo_id, None)
         
-        return False
+        registrar_evento(f"🗑️ Objetivo eliminado: {objetivo_eliminar['descripcion']}")
+        self.eventos.publicar('objetivo_eliminado', fecha=fecha, objetivo=objetivo_eliminar)
+        return True
+
+# Almacén único del proceso
+_gestor_compartido = None
+_lock_gestor = threading.Lock()
+
+def obtener_gestor_objetivos():
+    """Retorna el GestorObjetivos compartido por todo el proceso (se crea la primera vez)"""
+    global _gestor_compartido
+    with _lock_gestor:
+        if _gestor_compartido is None:
+            _gestor_compartido = GestorObjetivos()
+        return _gestor_compartido
+
+def _pedir_regla():
+    """Pide por consola las condiciones de avance automático; None si se omiten todas"""
+    print("Avance automático (presiona Enter para omitir cada condición):")
+    regla = {
+        'proceso': input("  Proceso (ej. excel.exe): ").strip(),
+        'titulo': input("  Expresión regular del título: ").strip(),
+        'categoria': input("  Categoría (ej. desarrollo): ").strip(),
+    }
+    if any(regla.values()):
+        minutos = input("  Minutos mínimos por sesión (Enter para 0): ").strip()
+        regla['minutos_minimos'] = float(minutos) if minutos.replace('.', '', 1).isdigit() else 0
+    return {clave: valor for clave, valor in regla.items() if valor} or None
+
+def _gestionar_plantillas(gestor):
+    """Submenú de consola para objetivos recurrentes"""
+    plantillas = gestor.obtener_plantillas()
+    print("\n🔁 OBJETIVOS RECURRENTES")
+    if not plantillas:
+        print("No hay objetivos recurrentes")
+    for plantilla in plantillas:
+        cuando = plantilla['recurrencia']
+        if cuando == 'semanal':
+            cuando += f" ({['lun', 'mar', 'mié', 'jue', 'vie', 'sáb', 'dom'][plantilla['dia_semana']]})"
+        print(f"[{plantilla['id']}] {plantilla['descripcion']} - meta {plantilla['meta']} - {cuando}")
     
-    def detectar_actividad_automatica(self, ventana_activa, proceso_activo):
-        """Detecta automáticamente progreso en objetivos basado en la actividad"""
-        # Esta función puede expandirse para detectar automáticamente
-        # el progreso en objetivos específicos basado en las aplicaciones usadas
-        
-        aplicaciones_productivas = [
-            'whatsapp', 'chrome', 'outlook', 'excel', 'word', 'teams',
-            'zoom', 'slack', 'notion', 'trello', 'asana'
-        ]
-        
-        if any(app in proceso_activo.lower() for app in aplicaciones_productivas):
-            # Podrías implementar lógica para avanzar automáticamente ciertos objetivos
-            pass
+    accion = input("\n(c) crear, (e) eliminar, Enter para volver: ").strip().lower()
+    if accion == 'c':
+        descripcion = input("Descripción del objetivo: ").strip()
+        meta = input("Meta numérica (opcional, presiona Enter para 1): ").strip()
+        recurrencia = input("Recurrencia - diaria, laborables o semanal (Enter para diaria): ").strip().lower() or 'diaria'
+        dia_semana = None
+        if recurrencia == 'semanal':
+            dia = input("Día de la semana (0 = lunes ... 6 = domingo): ").strip()
+            dia_semana = int(dia) if dia.isdigit() else None
+        gestor.crear_plantilla(descripcion, int(meta) if meta.isdigit() else 1, recurrencia=recurrencia,
+                               dia_semana=dia_semana, regla=_pedir_regla())
+    elif accion == 'e':
+        plantilla_id = input("ID del objetivo recurrente a eliminar: ").strip()
+        if not gestor.eliminar_plantilla(int(plantilla_id) if plantilla_id.isdigit() else 0):
+            print("❌ Objetivo recurrente no encontrado")
 
 def menu_interactivo():
     """Menú interactivo para gestionar objetivos"""
-    gestor = GestorObjetivos()
+    gestor = obtener_gestor_objetivos()
     
     while True:
         print("\n🎯 GESTOR DE OBJETIVOS")
@@ -216,6 +646,9 @@ def menu_interactivo():
         print("4. Marcar como completado")
         print("5. Eliminar objetivo")
         print("6. Resumen del día")
+        print("7. Exportar objetivos a JSON")
+        print("8. Regla de avance automático")
+        print("9. Objetivos recurrentes")
         print("0. Salir")
         
         opcion = input("\nSelecciona una opción: ").strip()
@@ -227,7 +660,7 @@ def menu_interactivo():
             descripcion = input("Descripción del objetivo: ").strip()
             meta = input("Meta numérica (opcional, presiona Enter para 1): ").strip()
             meta = int(meta) if meta.isdigit() else 1
-            gestor.crear_objetivo_diario(descripcion, meta)
+            gestor.crear_objetivo_diario(descripcion, meta, regla=_pedir_regla())
         
         elif opcion == "3":
             gestor.mostrar_objetivos_hoy()
@@ -258,6 +691,18 @@ def menu_interactivo():
             print(f"Completados: {resumen['objetivos_completados']}")
             print(f"Porcentaje: {resumen['porcentaje_completado']:.1f}%")
         
+        elif opcion == "7":
+            gestor.exportar_objetivos_json()
+        
+        elif opcion == "8":
+            gestor.mostrar_objetivos_hoy()
+            objetivo_id = input("ID del objetivo: ").strip()
+            objetivo_id = int(objetivo_id) if objetivo_id.isdigit() else 0
+            gestor.establecer_regla(objetivo_id, _pedir_regla())
+        
+        elif opcion == "9":
+            _gestionar_plantillas(gestor)
+        
         elif opcion == "0":
             break
         
@@ -0,0 +1,270 @@
+# objetivos/reglas.py - Avance automático de objetivos según la actividad en primer plano
+
+import re
+import threading
+from functools import lru_cache
+from utils.fechas import fecha_local, fecha_hoy
+
+# Condiciones que puede declarar una regla (todas las indicadas deben cumplirse)
+CONDICIONES_REGLA = ('proceso', 'titulo', 'categoria')
+CLAVES_REGLA = CONDICIONES_REGLA + ('minutos_minimos',)
+
+def _normalizar_proceso(nombre):
+    """Nombre de proceso comparable: minúsculas y sin '.exe'"""
+    nombre = (nombre or '').strip().lower()
+    return nombre[:-4] if nombre.endswith('.exe') else nombre
+
+def validar_regla(regla):
+    """
+    Normaliza una regla de avance automático; lanza ValueError si no es válida
+
+    Una regla es un dict con al menos una condición:
+        proceso (str): nombre del proceso, sin distinguir mayúsculas ni '.exe'
+        titulo (str): expresión regular buscada en el título (sin distinguir mayúsculas)
+        categoria (str): categoría del motor de categorías ('desarrollo', 'oficina', ...)
+    y opcionalmente:
+        minutos_minimos (float): minutos activos que debe durar un span para contar
+
+    Returns:
+        dict: la regla normalizada, o None si 'regla' está vacía
+    """
+    if not regla:
+        return None
+    if not isinstance(regla, dict):
+        raise ValueError("La regla debe ser un diccionario")
+
+    desconocidas = set(regla) - set(CLAVES_REGLA)
+    if desconocidas:
+        raise ValueError(f"Claves de regla desconocidas: {', '.join(sorted(desconocidas))}")
+
+    normalizada = {}
+    if regla.get('proceso'):
+        normalizada['proceso'] = _normalizar_proceso(regla['proceso'])
+
+    if regla.get('titulo'):
+        try:
+            re.compile(regla['titulo'])
+        except re.error as e:
+            raise ValueError(f"Expresión de título inválida: {e}")
+        normalizada['titulo'] = regla['titulo']
+
+    if regla.get('categoria'):
+        normalizada['categoria'] = regla['categoria'].strip().lower()
+
+    if not normalizada:
+        raise ValueError("La regla necesita proceso, titulo o categoria")
+
+    if regla.get('minutos_minimos'):
+        minutos = float(regla['minutos_minimos'])
+        if minutos < 0:
+            raise ValueError("minutos_minimos no puede ser negativo")
+        normalizada['minutos_minimos'] = minutos
+
+    return normalizada
+
+class MotorReglas:
+    """
+    Evalúa todas las reglas contra un span sin recorrerlas una por una
+
+    Las condiciones de proceso y categoría se indexan en diccionarios (una consulta
+    por span). Las expresiones de título se compilan una vez, agrupadas por patrón,
+    y solo se prueban para las reglas que ya cumplen sus otras condiciones (las
+    reglas de solo título se prueban siempre). El resultado por (proceso, título,
+    categoría) se memoriza con una cache LRU: volver a una ventana ya vista no
+    vuelve a evaluar nada. Una regla se cumple cuando coinciden todas sus
+    condiciones y el span alcanza sus minutos mínimos.
+    """
+
+    def __init__(self, reglas=None, tamano_memo=1024):
+        self.tamano_memo = tamano_memo
+        self.compilar(reglas or {})
+
+    def compilar(self, reglas):
+        """
+        Reemplaza las reglas del motor y reinicia la cache
+
+        Args:
+            reglas (dict): id -> regla validada (ver validar_regla)
+        """
+        por_proceso = {}
+        por_categoria = {}
+        solo_titulo = {}       # patrón -> ids de reglas cuya única condición es el título
+        titulo_de = {}         # id -> patrón compilado de reglas con título y otras condiciones
+        condiciones = {}
+        minimos = {}
+        compilados = {}
+
+        for id_regla, regla in reglas.items():
+            condiciones[id_regla] = sum(1 for condicion in CONDICIONES_REGLA if condicion in regla)
+            minimos[id_regla] = regla.get('minutos_minimos', 0) * 60
+
+            if 'proceso' in regla:
+                por_proceso.setdefault(regla['proceso'], []).append(id_regla)
+            if 'categoria' in regla:
+                por_categoria.setdefault(regla['categoria'], []).append(id_regla)
+            if 'titulo' in regla:
+                patron = compilados.get(regla['titulo'])
+                if patron is None:
+                    patron = compilados[regla['titulo']] = re.compile(regla['titulo'], re.IGNORECASE)
+                if condiciones[id_regla] == 1:
+                    solo_titulo.setdefault(patron, []).append(id_regla)
+                else:
+                    titulo_de[id_regla] = patron
+
+        def coincidencias(proceso, titulo, categoria):
+            cumplidas = {}
+            for id_regla in por_proceso.get(proceso, ()):
+                cumplidas[id_regla] = cumplidas.get(id_regla, 0) + 1
+            for id_regla in por_categoria.get(categoria, ()):
+                cumplidas[id_regla] = cumplidas.get(id_regla, 0) + 1
+
+            resultado = []
+            for id_regla, cuenta in cumplidas.items():
+                patron = titulo_de.get(id_regla)
+                if patron is not None and titulo and patron.search(titulo):
+                    cuenta += 1
+                if cuenta == condiciones[id_regla]:
+                    resultado.append(id_regla)
+
+            if titulo:
+                for patron, ids in solo_titulo.items():
+                    if patron.search(titulo):
+                        resultado.extend(ids)
+
+            return tuple(resultado)
+
+        # Se reemplaza todo junto: evaluar() nunca ve un estado a medias
+        self._estado = (lru_cache(maxsize=self.tamano_memo)(coincidencias), minimos)
+
+    def __len__(self):
+        return len(self._estado[1])
+
+    def evaluar(self, proceso, titulo, categoria, segundos_activos):
+        """Retorna los ids de las reglas que cumple un span"""
+        coincidencias, minimos = self._estado
+        if not minimos:
+            return []
+
+        ids = coincidencias(_normalizar_proceso(proceso), titulo or '', (categoria or '').lower())
+        return [id_regla for id_regla in ids if segundos_activos >= minimos[id_regla]]
+
+class AvanceAutomatico:
+    """
+    Avanza los objetivos del día cuyos spans de ventana cumplen su regla
+
+    Según el tipo del objetivo, cada span activo que cumple la regla:
+        contador: suma 1
+        tiempo: suma sus minutos activos (los segundos sobrantes se acumulan)
+        boolean: lo completa
+
+    El motor se recompila solo cuando cambian los objetivos (eventos del gestor) o
+    el día, nunca por span.
+    """
+
+    def __init__(self, gestor):
+        self.gestor = gestor
+        self.motor = MotorReglas()
+        self._tipos = {}      # id -> tipo de los objetivos con regla
+        self._segundos = {}   # id -> segundos de objetivos 'tiempo' que no llegan a un minuto
+        self._fecha = None
+        self._recompilar = True
+        self._lock = threading.Lock()
+        self._cancelar_cambios = None
+
+    def iniciar(self):
+        """Escucha los cambios de objetivos y los spans del monitor de ventanas"""
+        from monitor.ventana_activa import suscribir_spans
+
+        self._cancelar_cambios = self.gestor.suscribir_cambios(self._al_cambiar_objetivos)
+        suscribir_spans(self.procesar_span)
+
+    def detener(self):
+        """Deja de escuchar spans y cambios de objetivos"""
+        from monitor.ventana_activa import desuscribir_spans
+
+        desuscribir_spans(self.procesar_span)
+        if self._cancelar_cambios:
+            self._cancelar_cambios()
+            self._cancelar_cambios = None
+
+    def _al_cambiar_objetivos(self, evento, fecha=None, objetivo=None):
+        # Los avances (incluidos los propios) no cambian las reglas
+        if evento != 'objetivo_avanzado':
+            self._recompilar = True
+
+    def _compilar(self, hoy):
+        """Compila las reglas de los objetivos pendientes de hoy (con el lock tomado)"""
+        self._recompilar = False
+        reglas = {}
+        tipos = {}
+
+        for objetivo in self.gestor.obtener_objetivos_hoy():
+            if not objetivo.get('regla') or objetivo['completado']:
+                continue
+            try:
+                reglas[objetivo['id']] = validar_regla(objetivo['regla'])
+            except ValueError as e:
+                print(f"⚠️ Regla inválida en el objetivo {objetivo['id']}: {e}")
+                continue
+            tipos[objetivo['id']] = objetivo['tipo']
+
+        self.motor.compilar(reglas)
+        self._tipos = tipos
+        self._segundos = {id_objetivo: s for id_objetivo, s in self._segundos.items() if id_objetivo in tipos}
+        if self._fecha != hoy:
+            self._segundos = {}
+        self._fecha = hoy
+
+    def procesar_span(self, span, segundos_activos):
+        """Callback de suscribir_spans: avanza los objetivos cuya regla cumple el span"""
+        if segundos_activos <= 0:
+            return
+
+        hoy = fecha_hoy()
+        if fecha_local(span.inicio) != hoy:
+            return  # los spans se parten por día; los objetivos de días pasados no avanzan
+
+        avances = []
+        with self._lock:
+            if self._recompilar or self._fecha != hoy:
+                self._compilar(hoy)
+
+            for id_objetivo in self.motor.evaluar(span.proceso, span.titulo, span.categoria, segundos_activos):
+                tipo = self._tipos[id_objetivo]
+                if tipo == 'tiempo':
+                    minutos, resto = divmod(self._segundos.get(id_objetivo, 0.0) + segundos_activos, 60)
+                    self._segundos[id_objetivo] = resto
+                    if minutos:
+                        avances.append((id_objetivo, int(minutos)))
+                elif tipo == 'boolean':
+                    avances.append((id_objetivo, None))
+                else:
+                    avances.append((id_objetivo, 1))
+
+        for id_objetivo, incremento in avances:
+            if incremento is None:
+                self.gestor.marcar_objetivo_completado(id_objetivo)
+            else:
+                self.gestor.avanzar_objetivo(id_objetivo, incremento)
+
+if __name__ == "__main__":
+    import time
+
+    reglas = {i: validar_regla({'titulo': rf'ticket-{i}\b'}) for i in range(500)}
+    reglas['correo'] = validar_regla({'proceso': 'OUTLOOK.EXE'})
+    reglas['codigo'] = validar_regla({'categoria': 'desarrollo', 'minutos_minimos': 5})
+    reglas['pr'] = validar_regla({'proceso': 'chrome', 'titulo': r'pull request'})
+    motor = MotorReglas(reglas)
+
+    casos = [
+        ('outlook.exe', 'Bandeja de entrada - Outlook', 'oficina', 120),
+        ('code.exe', 'ticket-42 main.py - Visual Studio Code', 'desarrollo', 600),
+        ('chrome.exe', 'Pull Request #12 - Google Chrome', 'navegador', 60),
+    ]
+    for caso in casos:
+        print(f"{caso[0]}: {motor.evaluar(*caso)}")
+
+    inicio = time.perf_counter()
+    motor.compilar(reglas)  # sin memo, como una ventana nueva
+    motor.evaluar(*casos[1])
+    print(f"{len(motor)} reglas: {(time.perf_counter() - inicio) * 1000:.2f} ms para una ventana nueva")
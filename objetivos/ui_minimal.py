@@ -6,15 +6,16 @@ from datetime import date
 import threading
 import time
 
-from objetivos.gestor_objetivos import GestorObjetivos
+from objetivos.gestor_objetivos import obtener_gestor_objetivos
 from utils.helpers import formatear_tiempo
 
 class ObjetivosUI:
     def __init__(self):
-        self.gestor = GestorObjetivos()
+        self.gestor = obtener_gestor_objetivos()
         self.root = None
         self.frame_objetivos = None
         self.objetivos_widgets = {}
+        self._cancelar_suscripcion = None
         
     def crear_ventana(self):
         """Crea la ventana principal de objetivos"""
@@ -58,11 +59,28 @@ class ObjetivosUI:
         self.root.rowconfigure(0, weight=1)
         main_frame.columnconfigure(1, weight=1)
         
-        # Cargar objetivos iniciales
+        # Cargar objetivos iniciales; después la lista se refresca con cada cambio del almacén
+        # (también los hechos desde la bandeja o en segundo plano)
         self.actualizar_lista()
+        self._cancelar_suscripcion = self.gestor.suscribir_cambios(self._al_cambiar_objetivos)
+        self.root.protocol("WM_DELETE_WINDOW", self.cerrar)
         
         return self.root
     
+    def _al_cambiar_objetivos(self, evento, **datos):
+        """Suscriptor del almacén: puede llegar desde otro hilo, así que se refresca en el de tkinter"""
+        try:
+            self.root.after(0, self.actualizar_lista)
+        except (RuntimeError, tk.TclError):
+            pass  # ventana cerrada
+    
+    def cerrar(self):
+        """Cierra la ventana y deja de escuchar cambios del almacén"""
+        if self._cancelar_suscripcion:
+            self._cancelar_suscripcion()
+            self._cancelar_suscripcion = None
+        self.root.destroy()
+    
     def crear_area_objetivos(self, parent):
         """Crea el área scrolleable para mostrar objetivos"""
         # Canvas y scrollbar para scroll
@@ -182,20 +200,16 @@ class ObjetivosUI:
         if resultado:
             descripcion, meta = resultado
             self.gestor.crear_objetivo_diario(descripcion, meta)
-            self.actualizar_lista()
             messagebox.showinfo("✅", f"Objetivo creado: {descripcion}")
     
     def avanzar_objetivo(self, objetivo_id, incremento=1):
         """Avanza el progreso de un objetivo"""
-        if self.gestor.avanzar_objetivo(objetivo_id, incremento):
-            self.actualizar_lista()
-        else:
+        if not self.gestor.avanzar_objetivo(objetivo_id, incremento):
             messagebox.showerror("❌", "Error al avanzar objetivo")
     
     def completar_objetivo(self, objetivo_id):
         """Marca un objetivo como completado"""
         if self.gestor.marcar_objetivo_completado(objetivo_id):
-            self.actualizar_lista()
             messagebox.showinfo("🎉", "¡Objetivo completado!")
         else:
             messagebox.showerror("❌", "Error al completar objetivo")
@@ -204,7 +218,6 @@ class ObjetivosUI:
         """Elimina un objetivo después de confirmación"""
         if messagebox.askyesno("🗑️ Confirmar", "¿Estás seguro de eliminar este objetivo?"):
             if self.gestor.eliminar_objetivo(objetivo_id):
-                self.actualizar_lista()
                 messagebox.showinfo("✅", "Objetivo eliminado")
             else:
                 messagebox.showerror("❌", "Error al eliminar objetivo")
@@ -0,0 +1,92 @@
+# pomodoro/adaptativo.py - Duraciones Pomodoro según el rendimiento histórico de cada hora del día
+
+from datetime import datetime
+from storage.database import obtener_rendimiento_por_hora
+
+# Fases de trabajo (ponderadas) necesarias antes de alejarse de los tiempos configurados
+MUESTRAS_MINIMAS = 5
+
+# Límites de las duraciones sugeridas (minutos)
+LIMITES_TRABAJO = (15, 50)
+LIMITES_DESCANSO_CORTO = (3, 15)
+LIMITES_DESCANSO_LARGO = (10, 30)
+
+# Peso de las horas vecinas al suavizar (la hora misma pesa 1)
+PESO_HORA_VECINA = 0.5
+
+def _acotar(valor, limites):
+    return max(limites[0], min(limites[1], valor))
+
+def _combinar_horas(hora):
+    """Suma ponderada del rendimiento de la hora y sus vecinas (una consulta por clave primaria)"""
+    rendimiento = obtener_rendimiento_por_hora([hora - 1, hora, hora + 1])
+    combinado = {}
+
+    for vecina, peso in ((hora - 1, PESO_HORA_VECINA), (hora, 1.0), (hora + 1, PESO_HORA_VECINA)):
+        for clave, valor in rendimiento.get(vecina % 24, {}).items():
+            combinado[clave] = combinado.get(clave, 0.0) + peso * (valor or 0.0)
+
+    return combinado
+
+def calcular_puntuacion(rendimiento):
+    """
+    Puntuación 0-1 de una hora: tasa de éxito, intensidad de foco y tiempo inactivo en fases de trabajo
+
+    Returns:
+        tuple: (puntuacion, muestras) o (None, muestras) si no hay suficientes datos
+    """
+    completadas = rendimiento.get('fases_completadas', 0.0)
+    muestras = completadas + rendimiento.get('fases_interrumpidas', 0.0)
+    if muestras < MUESTRAS_MINIMAS:
+        return None, muestras
+
+    tasa_exito = completadas / muestras
+
+    # Sin histograma de foco (hooks desactivados) la tasa de éxito ocupa su lugar
+    minutos_foco = rendimiento.get('minutos_foco', 0.0)
+    foco = rendimiento.get('suma_puntuacion_foco', 0.0) / minutos_foco / 100 if minutos_foco else tasa_exito
+
+    segundos_trabajo = rendimiento.get('segundos_trabajo', 0.0)
+    fraccion_inactiva = rendimiento.get('segundos_inactivos', 0.0) / segundos_trabajo if segundos_trabajo else 0.0
+
+    puntuacion = 0.6 * tasa_exito + 0.4 * min(1.0, foco) - fraccion_inactiva
+    return max(0.0, min(1.0, puntuacion)), muestras
+
+def sugerir_tiempos(trabajo, descanso_corto, descanso_largo, momento=None):
+    """
+    Sugiere duraciones (minutos) para la hora de 'momento' partiendo de las configuradas
+
+    Horas con buen rendimiento alargan el trabajo (hasta +20%) y acortan los descansos;
+    horas con muchas interrupciones o inactividad hacen lo contrario. Sin datos
+    suficientes se devuelven los tiempos configurados.
+
+    Args:
+        trabajo, descanso_corto, descanso_largo (int): tiempos configurados en minutos
+        momento (float): timestamp epoch (None = ahora)
+
+    Returns:
+        dict: trabajo, descanso_corto, descanso_largo, puntuacion y muestras
+    """
+    hora = datetime.fromtimestamp(momento).hour if momento is not None else datetime.now().hour
+    puntuacion, muestras = calcular_puntuacion(_combinar_horas(hora))
+
+    if puntuacion is None:
+        return {'trabajo': trabajo, 'descanso_corto': descanso_corto, 'descanso_largo': descanso_largo,
+                'puntuacion': None, 'muestras': muestras}
+
+    # Puntuación 0.5 deja el trabajo en 0.9x; 1.0 lo lleva a 1.2x y 0 a 0.6x
+    factor_trabajo = 0.6 + 0.6 * puntuacion
+    factor_descanso = 1.4 - 0.6 * puntuacion
+
+    return {
+        'trabajo': round(_acotar(trabajo * factor_trabajo, LIMITES_TRABAJO)),
+        'descanso_corto': round(_acotar(descanso_corto * factor_descanso, LIMITES_DESCANSO_CORTO)),
+        'descanso_largo': round(_acotar(descanso_largo * factor_descanso, LIMITES_DESCANSO_LARGO)),
+        'puntuacion': round(puntuacion, 2),
+        'muestras': round(muestras, 1)
+    }
+
+if __name__ == "__main__":
+    for hora in (9, 14, 17):
+        momento = datetime.now().replace(hour=hora, minute=0).timestamp()
+        print(f"{hora:02d}:00 -> {sugerir_tiempos(25, 5, 15, momento)}")
@@ -0,0 +1,208 @@
+# pomodoro/despachador.py - Cola compartida de notificaciones del sistema con un hilo propio
+
+import heapq
+import itertools
+import threading
+import time
+
+# Prioridades: menor número sale antes
+PRIORIDAD_ALTA = 0     # fin de fases, objetivos completados
+PRIORIDAD_NORMAL = 1
+PRIORIDAD_BAJA = 2     # progreso y avisos informativos
+
+class DespachadorNotificaciones:
+    """
+    Muestra notificaciones del SO y sonidos en un hilo propio, sin bloquear a quien avisa
+
+    enviar() solo encola y retorna. El hilo saca siempre la notificación pendiente de
+    mayor prioridad (y, a igual prioridad, la más antigua).
+
+    Las notificaciones con 'clave' se agrupan: mientras una está pendiente, un nuevo
+    envío con la misma clave reemplaza su contenido en lugar de sumar otra, y entre
+    dos notificaciones mostradas con la misma clave pasan al menos VENTANA_AGRUPACION
+    segundos. Así una ráfaga de avisos de progreso termina en un solo aviso con el
+    último valor.
+
+    Si plyer no está disponible, la notificación falla o están desactivadas, el
+    mensaje se escribe en consola.
+    """
+
+    VENTANA_AGRUPACION = 3.0
+
+    def __init__(self, nombre_app="Pomodoro Timer"):
+        self.nombre_app = nombre_app
+        self.notificaciones_activadas = True
+        self.sonidos_activados = True
+        self._condicion = threading.Condition()
+        self._heap = []            # (prioridad, secuencia, clave)
+        self._pendientes = {}      # clave -> notificación (dict)
+        self._ultima_por_clave = {}  # clave -> instante monotónico en que se mostró
+        self._secuencias = itertools.count()
+        self._en_curso = False
+        self._hilo = None
+        self._notify = None
+
+    def configurar(self, notificaciones=None, sonidos=None):
+        """Activa o desactiva las notificaciones del SO (si no, consola) y los sonidos"""
+        if notificaciones is not None:
+            self.notificaciones_activadas = bool(notificaciones)
+        if sonidos is not None:
+            self.sonidos_activados = bool(sonidos)
+
+    def enviar(self, titulo, mensaje, duracion=5, prioridad=PRIORIDAD_NORMAL, sonido=False, clave=None, icono=None):
+        """
+        Encola una notificación y retorna de inmediato
+
+        Args:
+            titulo, mensaje (str): contenido de la notificación
+            duracion (int): segundos en pantalla
+            prioridad (int): PRIORIDAD_ALTA, PRIORIDAD_NORMAL o PRIORIDAD_BAJA
+            sonido (bool): reproducir un beep después de mostrarla
+            clave (str): agrupa notificaciones del mismo asunto (None = nunca se agrupa)
+            icono (str): ruta del icono
+        """
+        notificacion = {
+            'titulo': titulo, 'mensaje': mensaje, 'duracion': duracion,
+            'prioridad': prioridad, 'sonido': sonido, 'icono': icono
+        }
+
+        with self._condicion:
+            if clave is None:
+                clave = ('_unica', next(self._secuencias))
+
+            anterior = self._pendientes.get(clave)
+            if anterior is not None:
+                # Se agrupa: gana el contenido nuevo, la prioridad más alta y el sonido si alguno lo pedía
+                notificacion['sonido'] = notificacion['sonido'] or anterior['sonido']
+                if prioridad >= anterior['prioridad']:
+                    notificacion['prioridad'] = anterior['prioridad']
+                    notificacion['secuencia'] = anterior['secuencia']
+                    self._pendientes[clave] = notificacion
+                    return
+
+            notificacion['secuencia'] = next(self._secuencias)
+            self._pendientes[clave] = notificacion
+            heapq.heappush(self._heap, (notificacion['prioridad'], notificacion['secuencia'], clave))
+            self._asegurar_hilo()
+            self._condicion.notify()
+
+    def vaciar(self, timeout=None):
+        """Espera a que se muestren todas las notificaciones pendientes; retorna True si se vació"""
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._condicion:
+            while self._pendientes or self._en_curso:
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                self._condicion.wait(restante)
+            return True
+
+    def _asegurar_hilo(self):
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(target=self._ejecutar, name="despachador-notificaciones", daemon=True)
+            self._hilo.start()
+
+    def _tomar_siguiente(self):
+        """Saca la próxima notificación lista o retorna los segundos a esperar (con el lock tomado)"""
+        ahora = time.monotonic()
+        esperar = None
+        diferidas = []
+
+        while self._heap:
+            prioridad, secuencia, clave = heapq.heappop(self._heap)
+            notificacion = self._pendientes.get(clave)
+            if notificacion is None or notificacion['secuencia'] != secuencia:
+                continue  # entrada vieja de una notificación ya agrupada o mostrada
+
+            listo = self._ultima_por_clave.get(clave, ahora - self.VENTANA_AGRUPACION) + self.VENTANA_AGRUPACION
+            if listo > ahora:
+                diferidas.append((prioridad, secuencia, clave))
+                esperar = min(esperar, listo - ahora) if esperar is not None else listo - ahora
+                continue
+
+            for entrada in diferidas:
+                heapq.heappush(self._heap, entrada)
+            del self._pendientes[clave]
+            if not (isinstance(clave, tuple) and clave[0] == '_unica'):
+                self._ultima_por_clave[clave] = ahora
+            return notificacion
+
+        for entrada in diferidas:
+            heapq.heappush(self._heap, entrada)
+        return esperar
+
+    def _ejecutar(self):
+        while True:
+            with self._condicion:
+                self._en_curso = False
+                self._condicion.notify_all()
+                while True:
+                    siguiente = self._tomar_siguiente()
+                    if isinstance(siguiente, dict):
+                        break
+                    self._condicion.wait(siguiente)
+                self._en_curso = True
+
+                # Las claves viejas no se acumulan: solo importan dentro de la ventana
+                if len(self._ultima_por_clave) > 256:
+                    limite = time.monotonic() - self.VENTANA_AGRUPACION
+                    self._ultima_por_clave = {c: t for c, t in self._ultima_por_clave.items() if t > limite}
+
+            try:
+                self._mostrar(siguiente)
+            except Exception as e:
+                print(f"⚠️ Error al mostrar notificación: {e}")
+
+    def _mostrar(self, notificacion):
+        """Muestra una notificación (fuera del lock: puede tardar)"""
+        if not (self.notificaciones_activadas and self._notificar_so(notificacion)):
+            print(f"🔔 {notificacion['titulo']}: {notificacion['mensaje']}")
+
+        if notificacion['sonido'] and self.sonidos_activados:
+            self._reproducir_sonido()
+
+    def _notificar_so(self, notificacion):
+        """Notificación del sistema con plyer; retorna False si no se pudo mostrar"""
+        if self._notify is None:
+            try:
+                from plyer import notification
+                self._notify = notification.notify
+            except Exception as e:
+                print(f"⚠️ Notificaciones del sistema no disponibles (se usará la consola): {e}")
+                self._notify = False
+
+        if not self._notify:
+            return False
+
+        try:
+            self._notify(
+                title=notificacion['titulo'],
+                message=notificacion['mensaje'],
+                app_name=self.nombre_app,
+                timeout=notificacion['duracion'],
+                app_icon=notificacion['icono']
+            )
+            return True
+        except Exception as e:
+            print(f"Error de notificación: {e}")
+            return False
+
+    def _reproducir_sonido(self):
+        """Reproduce un sonido del sistema (beep)"""
+        try:
+            import winsound
+            winsound.Beep(800, 200)  # Frecuencia 800Hz, duración 200ms
+        except Exception:
+            # Alternativa si winsound no está disponible
+            print('\a')  # Beep del sistema
+
+# Instancia compartida por todos los notificadores
+despachador = DespachadorNotificaciones()
+
+if __name__ == "__main__":
+    inicio = time.monotonic()
+    for progreso in range(1, 10):
+        despachador.enviar("📈 Progreso", f"Objetivo: {progreso}/9", prioridad=PRIORIDAD_BAJA, clave='progreso')
+    despachador.enviar("✅ ¡Pomodoro Completado!", "Hora del descanso", prioridad=PRIORIDAD_ALTA)
+    print(f"10 envíos encolados (9 de progreso se agrupan en uno) en {(time.monotonic() - inicio) * 1000:.1f} ms")
+    despachador.vaciar(timeout=10)
@@ -1,13 +1,15 @@
 # pomodoro/notificador.py
 
-from plyer import notification
 import os
 import threading
 import time
+from pomodoro.despachador import despachador, PRIORIDAD_ALTA, PRIORIDAD_NORMAL, PRIORIDAD_BAJA
 
 class NotificadorPomodoro:
-    def __init__(self):
-        self.sonidos_activados = True
+    """Mensajes del Pomodoro y de los objetivos; los muestra el despachador compartido sin bloquear"""
+
+    def __init__(self, despachador_notificaciones=None):
+        self.despachador = despachador_notificaciones or despachador
         self.icono_path = self._obtener_icono()
         
     def _obtener_icono(self):
@@ -15,38 +17,22 @@ class NotificadorPomodoro:
         # Por ahora usamos None, podrías agregar un icono personalizado
         return None
     
-    def _mostrar_notificacion(self, titulo, mensaje, duracion=10):
-        """Muestra una notificación del sistema"""
-        try:
-            notification.notify(
-                title=titulo,
-                message=mensaje,
-                app_name="Pomodoro Timer",
-                timeout=duracion,
-                app_icon=self.icono_path
-            )
-        except Exception as e:
-            # Si falla la notificación, mostrar en consola
-            print(f"🔔 {titulo}: {mensaje}")
-            print(f"Error de notificación: {e}")
-    
-    def _reproducir_sonido_sistema(self):
-        """Reproduce un sonido del sistema (beep)"""
-        if self.sonidos_activados:
-            try:
-                import winsound
-                winsound.Beep(800, 200)  # Frecuencia 800Hz, duración 200ms
-            except:
-                # Alternativa si winsound no está disponible
-                print('\a')  # Beep del sistema
+    @property
+    def sonidos_activados(self):
+        return self.despachador.sonidos_activados
+    
+    def _mostrar_notificacion(self, titulo, mensaje, duracion=10, prioridad=PRIORIDAD_NORMAL,
+                              sonido=False, clave=None):
+        """Encola una notificación del sistema (y su sonido) en el despachador; no bloquea"""
+        self.despachador.enviar(titulo, mensaje, duracion=duracion, prioridad=prioridad,
+                                sonido=sonido, clave=clave, icono=self.icono_path)
     
     def mostrar_inicio_trabajo(self, ciclo):
         """Notificación al iniciar una sesión de trabajo"""
         titulo = f"🍅 Pomodoro {ciclo}"
         mensaje = "¡Es hora de trabajar! Concentrate por 25 minutos."
         
-        self._mostrar_notificacion(titulo, mensaje, duracion=5)
-        self._reproducir_sonido_sistema()
+        self._mostrar_notificacion(titulo, mensaje, duracion=5, sonido=True, clave='pomodoro')
         print(f"🍅 Iniciando Pomodoro {ciclo} - ¡A trabajar!")
     
     def mostrar_fin_trabajo(self):
@@ -54,8 +40,7 @@ class NotificadorPomodoro:
         titulo = "✅ ¡Pomodoro Completado!"
         mensaje = "¡Excelente trabajo! Es hora de tomar un descanso."
         
-        self._mostrar_notificacion(titulo, mensaje, duracion=8)
-        self._reproducir_sonido_sistema()
+        self._mostrar_notificacion(titulo, mensaje, duracion=8, prioridad=PRIORIDAD_ALTA, sonido=True)
         print("✅ ¡Pomodoro completado! Tiempo de descansar.")
     
     def mostrar_inicio_descanso_corto(self):
@@ -63,7 +48,7 @@ class NotificadorPomodoro:
         titulo = "☕ Descanso Corto"
         mensaje = "Tomate 5 minutos para relajarte. ¡Te lo merecés!"
         
-        self._mostrar_notificacion(titulo, mensaje, duracion=5)
+        self._mostrar_notificacion(titulo, mensaje, duracion=5, clave='pomodoro')
         print("☕ Descanso corto - 5 minutos para relajarte")
     
     def mostrar_inicio_descanso_largo(self):
@@ -71,7 +56,7 @@ class NotificadorPomodoro:
         titulo = "🌴 Descanso Largo"
         mensaje = "¡Excelente! Tomate 15 minutos para recargar energías."
         
-        self._mostrar_notificacion(titulo, mensaje, duracion=5)
+        self._mostrar_notificacion(titulo, mensaje, duracion=5, clave='pomodoro')
         print("🌴 Descanso largo - 15 minutos para recargar")
     
     def mostrar_fin_descanso(self):
@@ -79,8 +64,7 @@ class NotificadorPomodoro:
         titulo = "🔄 Fin del Descanso"
         mensaje = "¡Descansaste bien! Es hora de volver al trabajo."
         
-        self._mostrar_notificacion(titulo, mensaje, duracion=8)
-        self._reproducir_sonido_sistema()
+        self._mostrar_notificacion(titulo, mensaje, duracion=8, prioridad=PRIORIDAD_ALTA, sonido=True)
         print("🔄 Fin del descanso - ¡Volvamos al trabajo!")
     
     def mostrar_pausado(self):
@@ -88,7 +72,7 @@ class NotificadorPomodoro:
         titulo = "⏸️ Pomodoro Pausado"
         mensaje = "Temporizador pausado. Presiona reanudar cuando estés listo."
         
-        self._mostrar_notificacion(titulo, mensaje, duracion=3)
+        self._mostrar_notificacion(titulo, mensaje, duracion=3, clave='pausa')
         print("⏸️ Pomodoro pausado")
     
     def mostrar_reanudado(self):
@@ -96,7 +80,7 @@ class NotificadorPomodoro:
         titulo = "▶️ Pomodoro Reanudado"
         mensaje = "¡Continuemos donde lo dejamos!"
         
-        self._mostrar_notificacion(titulo, mensaje, duracion=3)
+        self._mostrar_notificacion(titulo, mensaje, duracion=3, clave='pausa')
         print("▶️ Pomodoro reanudado")
     
     def mostrar_objetivo_completado(self, objetivo):
@@ -104,23 +88,22 @@ class NotificadorPomodoro:
         titulo = "🎯 ¡Objetivo Completado!"
         mensaje = f"¡Felicitaciones! Completaste: {objetivo}"
         
-        self._mostrar_notificacion(titulo, mensaje, duracion=10)
-        self._reproducir_sonido_sistema()
+        self._mostrar_notificacion(titulo, mensaje, duracion=10, prioridad=PRIORIDAD_ALTA, sonido=True)
         print(f"🎯 ¡Objetivo completado!: {objetivo}")
     
     def mostrar_progreso_objetivo(self, objetivo, progreso, total):
-        """Notificación de progreso en un objetivo"""
+        """Notificación de progreso en un objetivo (el despachador junta las de un mismo objetivo por clave)"""
         titulo = "📈 Progreso del Objetivo"
         mensaje = f"{objetivo}: {progreso}/{total} completado"
         
-        if progreso % 3 == 0:  # Mostrar solo cada 3 avances para no saturar
-            self._mostrar_notificacion(titulo, mensaje, duracion=5)
+        self._mostrar_notificacion(titulo, mensaje, duracion=5, prioridad=PRIORIDAD_BAJA,
+                                   clave=f"progreso:{objetivo}")
         
         print(f"📈 Progreso: {objetivo} ({progreso}/{total})")
     
     def configurar_sonidos(self, activar=True):
-        """Activa o desactiva los sonidos"""
-        self.sonidos_activados = activar
+        """Activa o desactiva los sonidos (de todos los notificadores: el despachador es compartido)"""
+        self.despachador.configurar(sonidos=activar)
         estado = "activados" if activar else "desactivados"
         print(f"🔊 Sonidos {estado}")
     
@@ -128,10 +111,22 @@ class NotificadorPomodoro:
         """Permite mostrar notificaciones personalizadas"""
         self._mostrar_notificacion(titulo, mensaje, duracion)
 
+# Notificador compartido por el Pomodoro, los objetivos y la interfaz
+_notificador_compartido = None
+_lock_notificador = threading.Lock()
+
+def obtener_notificador():
+    """Retorna el NotificadorPomodoro compartido (se crea la primera vez)"""
+    global _notificador_compartido
+    with _lock_notificador:
+        if _notificador_compartido is None:
+            _notificador_compartido = NotificadorPomodoro()
+        return _notificador_compartido
+
 # Función de prueba
 def test_notificaciones():
     """Prueba todas las notificaciones"""
-    notificador = NotificadorPomodoro()
+    notificador = obtener_notificador()
     
     print("Probando notificaciones...")
     
@@ -148,6 +143,7 @@ def test_notificaciones():
     time.sleep(3)
     
     notificador.mostrar_objetivo_completado("Contactar 10 clientes")
+    notificador.despachador.vaciar(timeout=15)
     
     print("Prueba de notificaciones completada")
 
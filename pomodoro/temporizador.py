@@ -1,14 +1,35 @@
 # pomodoro/temporizador.py
 
+import json
+import os
 import time
 import threading
 from datetime import datetime, timedelta
-from pomodoro.notificador import NotificadorPomodoro
+from pomodoro.notificador import obtener_notificador
 from monitor.logger import registrar_evento
+from utils.planificador import planificador
+from utils.reloj import RELOJ_SISTEMA
+from utils.eventos import BusEventos
+from utils.fechas import fecha_local
+from utils.helpers import guardar_json_atomico
+from storage.database import registrar_sesion_pomodoro
+from pomodoro.adaptativo import sugerir_tiempos
+
+# Estado persistido para continuar el ciclo tras un cierre, caída o reinicio
+ESTADO_FILE = 'storage/estado_pomodoro.json'
 
 class PomodoroTimer:
-    def __init__(self):
-        self.notificador = NotificadorPomodoro()
+    def __init__(self, archivo_estado=ESTADO_FILE, reloj=None, planificador_plazos=None, notificador=None):
+        """
+        Args:
+            archivo_estado (str): archivo donde se persiste el ciclo en curso
+            reloj (Reloj): reloj de pared (RelojSimulado en simulaciones)
+            planificador_plazos (PlanificadorPlazos): planificador de las fases; debe usar el mismo reloj
+            notificador: notificador de fases (por defecto el compartido)
+        """
+        self._reloj = reloj or RELOJ_SISTEMA
+        self._planificador = planificador_plazos or planificador
+        self.notificador = notificador or obtener_notificador()
         self.activo = False
         self.pausado = False
         self.ciclo_actual = 1
@@ -20,113 +41,394 @@ class PomodoroTimer:
         self.tiempo_descanso_largo = 15
         self.ciclos_hasta_descanso_largo = 4
         
-        # Estado interno
+        # Modo adaptativo: las duraciones se ajustan a la hora del día (pomodoro.adaptativo)
+        self.modo_adaptativo = False
+        
+        # Estado interno: la fase en curso es una tarea del planificador de plazos
+        self.fase_actual = None
         self.tiempo_inicio = None
-        self.tiempo_restante = 0
+        self.duracion_fase = 0
+        self.segundos_pausados = 0.0
+        self._pausado_desde = None
+        self.segundos_inactivos = 0.0
+        self._inactivo_desde = None
+        self._usuario_inactivo = False  # último estado informado por monitor.inactividad
+        self._tarea = None
+        self._tarea_tick = None
+        self._lock = threading.Lock()
+        
+        # Eventos: fase_iniciada, fase_finalizada, pausado, reanudado, detenido y minuto
+        self.eventos = BusEventos()
+        
+        self.archivo_estado = archivo_estado
+        self._restaurada = None
         
     def iniciar(self):
-        """Inicia el ciclo Pomodoro"""
-        self.activo = True
-        registrar_evento("🍅 Pomodoro Timer iniciado")
+        """Inicia el ciclo Pomodoro (no bloquea: las fases avanzan con el planificador)"""
+        with self._lock:
+            if self.activo:
+                return
+            self.activo = True
+            self.pausado = False
+            restaurada, self._restaurada = self._restaurada, None
         
-        while self.activo:
+        if restaurada:
+            registrar_evento(f"🍅 Pomodoro Timer restaurado (ciclo {self.ciclo_actual}, {restaurada['fase']})")
+            self._iniciar_fase(restaurada['fase'], restaurada)
+        else:
+            registrar_evento("🍅 Pomodoro Timer iniciado")
+            self._iniciar_fase("trabajo")
+    
+    def _duracion_de(self, tipo_fase, momento=None):
+        """Duración de una fase que empieza en 'momento' (None = ahora), en segundos"""
+        tiempos = {
+            'trabajo': self.tiempo_trabajo,
+            'descanso_corto': self.tiempo_descanso_corto,
+            'descanso_largo': self.tiempo_descanso_largo
+        }
+        
+        if self.modo_adaptativo:
             try:
-                self._ejecutar_ciclo_completo()
+                tiempos = sugerir_tiempos(self.tiempo_trabajo, self.tiempo_descanso_corto,
+                                          self.tiempo_descanso_largo, momento or self._reloj.ahora())
             except Exception as e:
-                print(f"Error en Pomodoro Timer: {e}")
-                time.sleep(10)
+                print(f"⚠️ Pomodoro adaptativo no disponible, se usan los tiempos configurados: {e}")
+        
+        return tiempos.get(tipo_fase, self.tiempo_descanso_corto) * 60
     
-    def _ejecutar_ciclo_completo(self):
-        """Ejecuta un ciclo completo de Pomodoro"""
-        # Fase de trabajo
-        self._iniciar_fase_trabajo()
+    def _iniciar_fase(self, tipo_fase, restaurada=None):
+        """
+        Notifica el inicio de una fase y programa su fin
         
-        if not self.activo:
-            return
+        Args:
+            tipo_fase (str): 'trabajo', 'descanso_corto' o 'descanso_largo'
+            restaurada (dict): fase en curso recuperada del estado persistido
+        """
+        self.fase_actual = tipo_fase
+        self.en_descanso = tipo_fase != "trabajo"
+        duracion = restaurada['duracion'] if restaurada else self._duracion_de(tipo_fase)
+        minutos = round(duracion / 60)
+        
+        if restaurada is None or restaurada['notificar']:
+            if tipo_fase == "trabajo":
+                self.notificador.mostrar_inicio_trabajo(self.ciclo_actual)
+                registrar_evento(f"🍅 Iniciando Pomodoro {self.ciclo_actual} - Trabajo ({minutos} min)")
+            elif tipo_fase == "descanso_largo":
+                self.notificador.mostrar_inicio_descanso_largo()
+                registrar_evento(f"🌴 Iniciando descanso largo ({minutos} min)")
+            else:
+                self.notificador.mostrar_inicio_descanso_corto()
+                registrar_evento(f"☕ Iniciando descanso corto ({minutos} min)")
+        
+        with self._lock:
+            if not self.activo:
+                return
             
-        # Determinar tipo de descanso
-        if self.ciclo_actual % self.ciclos_hasta_descanso_largo == 0:
-            self._iniciar_descanso_largo()
-        else:
-            self._iniciar_descanso_corto()
+            self.duracion_fase = duracion
+            self.segundos_inactivos = 0.0
+            if restaurada:
+                self.tiempo_inicio = restaurada['inicio']
+                self.segundos_pausados = restaurada['pausados']
+                restante = restaurada['restante']
+            else:
+                self.tiempo_inicio = self._reloj.ahora()
+                self.segundos_pausados = 0.0
+                restante = self.duracion_fase
+            
+            # Si el usuario ya estaba ausente, la fase de trabajo empieza inactiva
+            usuario_ausente = tipo_fase == "trabajo" and self._usuario_inactivo
+            self._inactivo_desde = self.tiempo_inicio if usuario_ausente else None
             
-        self.ciclo_actual += 1
+            self._tarea = self._planificador.programar(restante, self._finalizar_fase)
+            self._programar_tick()
+            self._pausado_desde = None
+            
+            if restaurada and restaurada['pausado_desde'] is not None:
+                self._pausar_tareas()
+                self.pausado = True
+                self._pausado_desde = restaurada['pausado_desde']
+            
+            self._guardar_estado()
+            ciclo, pausado = self.ciclo_actual, self.pausado
+        
+        self.eventos.publicar('fase_iniciada', fase=tipo_fase, ciclo=ciclo,
+                              duracion=self.duracion_fase, restante=restante, pausado=pausado)
     
-    def _iniciar_fase_trabajo(self):
-        """Inicia una fase de trabajo de 25 minutos"""
-        self.en_descanso = False
-        duracion = self.tiempo_trabajo * 60  # Convertir a segundos
+    def _programar_tick(self):
+        """Programa el próximo evento 'minuto' en el siguiente minuto entero restante (con el lock tomado)"""
+        if self._tarea_tick is not None:
+            self._planificador.cancelar(self._tarea_tick)
+            self._tarea_tick = None
         
-        self.notificador.mostrar_inicio_trabajo(self.ciclo_actual)
-        registrar_evento(f"🍅 Iniciando Pomodoro {self.ciclo_actual} - Trabajo ({self.tiempo_trabajo} min)")
+        restante = self._planificador.restante(self._tarea) if self._tarea is not None else None
+        if not restante:
+            return
         
-        self._ejecutar_temporizador(duracion, "trabajo")
+        espera = restante % 60 or 60
+        if espera < restante:
+            self._tarea_tick = self._planificador.programar(espera, self._tick_minuto)
+    
+    def _tick_minuto(self):
+        """Callback del planificador una vez por minuto de fase: publica el tiempo restante"""
+        with self._lock:
+            self._tarea_tick = None
+            if not self.activo or self._tarea is None:
+                return
+            restante = self._planificador.restante(self._tarea)
+            self._programar_tick()
+            fase, ciclo = self.fase_actual, self.ciclo_actual
         
-        if self.activo:
-            self.notificador.mostrar_fin_trabajo()
-            registrar_evento(f"✅ Pomodoro {self.ciclo_actual} completado")
+        self.eventos.publicar('minuto', fase=fase, ciclo=ciclo, restante=restante)
     
-    def _iniciar_descanso_corto(self):
-        """Inicia un descanso corto de 5 minutos"""
-        self.en_descanso = True
-        duracion = self.tiempo_descanso_corto * 60
+    def _pausar_tareas(self):
+        """Congela fase y tick en el planificador (con el lock tomado)"""
+        if self._tarea_tick is not None:
+            self._planificador.pausar(self._tarea_tick)
+        return self._planificador.pausar(self._tarea)
+    
+    def _finalizar_fase(self):
+        """Callback del planificador al vencer la fase: notifica y pasa a la siguiente"""
+        with self._lock:
+            if not self.activo:
+                return
+            self._tarea = None
+            if self._tarea_tick is not None:
+                self._planificador.cancelar(self._tarea_tick)
+                self._tarea_tick = None
+            tipo_fase = self.fase_actual
+            ciclo = self.ciclo_actual
+            ahora = self._reloj.ahora()
+            sesion = (self.tiempo_inicio, ahora, self.duracion_fase, self.segundos_pausados,
+                      self._cerrar_inactividad(ahora))
         
-        self.notificador.mostrar_inicio_descanso_corto()
-        registrar_evento(f"☕ Iniciando descanso corto ({self.tiempo_descanso_corto} min)")
+        self._registrar_sesion(tipo_fase, *sesion, completada=True)
+        self.eventos.publicar('fase_finalizada', fase=tipo_fase, ciclo=ciclo, completada=True)
         
-        self._ejecutar_temporizador(duracion, "descanso_corto")
+        try:
+            if tipo_fase == "trabajo":
+                self.notificador.mostrar_fin_trabajo()
+                registrar_evento(f"✅ Pomodoro {self.ciclo_actual} completado")
+            else:
+                self.notificador.mostrar_fin_descanso()
+                registrar_evento("🔄 Fin del descanso largo" if tipo_fase == "descanso_largo" else "🔄 Fin del descanso corto")
+        except Exception as e:
+            print(f"Error en Pomodoro Timer: {e}")
         
-        if self.activo:
-            self.notificador.mostrar_fin_descanso()
-            registrar_evento("🔄 Fin del descanso corto")
+        self._iniciar_fase(self._siguiente_fase(tipo_fase))
     
-    def _iniciar_descanso_largo(self):
-        """Inicia un descanso largo de 15 minutos"""
-        self.en_descanso = True
-        duracion = self.tiempo_descanso_largo * 60
+    def _siguiente_fase(self, tipo_fase):
+        """Determina la fase que sigue a la indicada (y avanza el ciclo tras un descanso)"""
+        if tipo_fase != "trabajo":
+            self.ciclo_actual += 1
+            return "trabajo"
         
-        self.notificador.mostrar_inicio_descanso_largo()
-        registrar_evento(f"🌴 Iniciando descanso largo ({self.tiempo_descanso_largo} min)")
+        if self.ciclo_actual % self.ciclos_hasta_descanso_largo == 0:
+            return "descanso_largo"
+        return "descanso_corto"
+    
+    def registrar_cambio_inactividad(self, inactivo, momento):
+        """
+        Suscriptor de monitor.inactividad: acumula el tiempo inactivo dentro de las fases de trabajo
         
-        self._ejecutar_temporizador(duracion, "descanso_largo")
+        Alimenta el rendimiento por hora que usa el modo adaptativo. El estado se
+        recuerda fuera de las fases de trabajo: una inactividad que sigue abierta
+        al empezar la siguiente fase de trabajo se cuenta desde su inicio.
+        """
+        with self._lock:
+            self._usuario_inactivo = inactivo
+            if not self.activo or self.fase_actual != "trabajo" or self.tiempo_inicio is None:
+                return
+            if inactivo:
+                if self._inactivo_desde is None:
+                    self._inactivo_desde = max(momento, self.tiempo_inicio)
+            else:
+                self._cerrar_inactividad(momento)
+    
+    def _cerrar_inactividad(self, momento):
+        """Suma la inactividad abierta hasta 'momento' y retorna el total de la fase (con el lock tomado)"""
+        if self._inactivo_desde is not None:
+            self.segundos_inactivos += max(0.0, momento - self._inactivo_desde)
+            self._inactivo_desde = None
+        return self.segundos_inactivos
+    
+    def _registrar_sesion(self, tipo_fase, inicio, fin, planificada, pausados, inactivos=0.0, completada=True):
+        """Guarda una fase terminada en sesiones_pomodoro (por el escritor en lotes)"""
+        try:
+            registrar_sesion_pomodoro(
+                self.ciclo_actual, tipo_fase,
+                completada=completada,
+                interrumpida=not completada,
+                inicio=inicio,
+                fin=fin,
+                duracion_planificada=planificada,
+                segundos_pausados=pausados,
+                segundos_inactivos=inactivos
+            )
+        except Exception as e:
+            print(f"⚠️ Error al registrar sesión Pomodoro: {e}")
+    
+    def _guardar_estado(self):
+        """Persiste fase, plazo, pausas y ciclo (se llama con el lock tomado, solo en cambios de estado)"""
+        estado = {
+            'activo': self.activo,
+            'ciclo': self.ciclo_actual,
+            'fase': self.fase_actual,
+            'inicio_fase': self.tiempo_inicio,
+            'duracion_fase': self.duracion_fase,
+            'segundos_pausados': self.segundos_pausados,
+            'pausado_desde': self._pausado_desde,
+            'guardado': self._reloj.ahora()
+        }
         
-        if self.activo:
-            self.notificador.mostrar_fin_descanso()
-            registrar_evento("🔄 Fin del descanso largo")
+        try:
+            guardar_json_atomico(self.archivo_estado, estado)
+        except Exception as e:
+            print(f"⚠️ Error al guardar estado del Pomodoro: {e}")
     
-    def _ejecutar_temporizador(self, duracion_segundos, tipo_fase):
-        """Ejecuta el temporizador para una fase específica"""
-        self.tiempo_inicio = time.time()
-        tiempo_objetivo = self.tiempo_inicio + duracion_segundos
+    def restaurar_estado(self, ahora=None):
+        """
+        Recupera el ciclo guardado para que iniciar() continúe donde quedó
         
-        while time.time() < tiempo_objetivo and self.activo:
-            if not self.pausado:
-                self.tiempo_restante = tiempo_objetivo - time.time()
-                time.sleep(1)
-            else:
-                # Si está pausado, ajustar el tiempo objetivo
-                tiempo_objetivo += 1
-                time.sleep(1)
+        El tiempo de reloj transcurrido mientras el sistema no corría se descuenta de
+        la fase guardada; las fases que vencieron en ese lapso se dan por completadas
+        y el ciclo avanza. Una pausa sigue en pausa. Un ciclo de otro día se descarta.
+        
+        Returns:
+            bool: True si había un ciclo activo para continuar
+        """
+        try:
+            if not os.path.exists(self.archivo_estado):
+                return False
+            with open(self.archivo_estado, 'r', encoding='utf-8') as f:
+                estado = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Estado del Pomodoro ilegible, se empieza de cero: {e}")
+            return False
+        
+        if not estado.get('activo') or estado.get('inicio_fase') is None:
+            return False
+        
+        ahora = ahora or self._reloj.ahora()
+        if fecha_local(estado['inicio_fase']) != fecha_local(ahora):
+            registrar_evento("🍅 Ciclo Pomodoro de un día anterior descartado")
+            return False
+        
+        self.ciclo_actual = estado['ciclo']
+        fase = estado['fase']
+        inicio = estado['inicio_fase']
+        duracion = estado['duracion_fase']
+        pausados = estado['segundos_pausados']
+        pausado_desde = estado.get('pausado_desde')
+        
+        if pausado_desde is not None:
+            # En pausa el tiempo no corre: el restante es el que había al pausar
+            transcurrido = pausado_desde - inicio - pausados
+        else:
+            transcurrido = ahora - inicio - pausados
+        
+        completadas = 0
+        while pausado_desde is None and transcurrido >= duracion > 0:
+            fin = inicio + pausados + duracion
+            self._registrar_fase_recuperada(fase, inicio, fin, duracion, pausados)
+            transcurrido -= duracion
+            fase = self._siguiente_fase(fase)
+            inicio, pausados = fin, 0.0
+            duracion = self._duracion_de(fase, inicio)
+            completadas += 1
+        
+        self._restaurada = {
+            'fase': fase,
+            'inicio': inicio,
+            'duracion': duracion,
+            'pausados': pausados,
+            'restante': max(0.0, duracion - transcurrido),
+            'pausado_desde': pausado_desde,
+            'notificar': completadas > 0
+        }
+        
+        if completadas:
+            print(f"🍅 {completadas} fase(s) Pomodoro terminaron mientras el sistema estaba detenido")
+        return True
+    
+    def _registrar_fase_recuperada(self, tipo_fase, inicio, fin, planificada, pausados):
+        """Deja constancia de una fase que venció mientras el sistema no corría"""
+        self._registrar_sesion(tipo_fase, inicio, fin, planificada, pausados, completada=True)
+        if tipo_fase == "trabajo":
+            registrar_evento(f"✅ Pomodoro {self.ciclo_actual} completado (sistema detenido)")
+        else:
+            registrar_evento(f"🔄 Fin del {tipo_fase.replace('_', ' ')} (sistema detenido)")
+    
+    @property
+    def tiempo_restante(self):
+        """Segundos que le quedan a la fase actual (exacto también durante una pausa)"""
+        tarea = self._tarea
+        if tarea is None:
+            return 0
+        return self._planificador.restante(tarea) or 0
     
     def pausar(self):
         """Pausa el temporizador actual"""
-        if self.activo and not self.pausado:
+        with self._lock:
+            if not self.activo or self.pausado or self._tarea is None:
+                return
+            if not self._pausar_tareas():
+                return
             self.pausado = True
-            self.notificador.mostrar_pausado()
-            registrar_evento("⏸️ Pomodoro pausado")
+            self._pausado_desde = self._reloj.ahora()
+            self._guardar_estado()
+            fase = self.fase_actual
+        
+        self.notificador.mostrar_pausado()
+        registrar_evento("⏸️ Pomodoro pausado")
+        self.eventos.publicar('pausado', fase=fase, restante=self.tiempo_restante)
     
     def reanudar(self):
         """Reanuda el temporizador pausado"""
-        if self.activo and self.pausado:
+        with self._lock:
+            if not self.activo or not self.pausado:
+                return
+            self._planificador.reanudar(self._tarea)
+            if self._tarea_tick is not None:
+                self._planificador.reanudar(self._tarea_tick)
             self.pausado = False
-            self.notificador.mostrar_reanudado()
-            registrar_evento("▶️ Pomodoro reanudado")
+            if self._pausado_desde is not None:
+                self.segundos_pausados += max(0.0, self._reloj.ahora() - self._pausado_desde)
+                self._pausado_desde = None
+            self._guardar_estado()
+            fase = self.fase_actual
+        
+        self.notificador.mostrar_reanudado()
+        registrar_evento("▶️ Pomodoro reanudado")
+        self.eventos.publicar('reanudado', fase=fase, restante=self.tiempo_restante)
     
     def detener(self):
-        """Detiene completamente el Pomodoro"""
-        self.activo = False
-        self.pausado = False
+        """Detiene completamente el Pomodoro (la fase en curso queda como interrumpida)"""
+        sesion = None
+        
+        with self._lock:
+            if self._tarea_tick is not None:
+                self._planificador.cancelar(self._tarea_tick)
+                self._tarea_tick = None
+            if self._tarea is not None:
+                self._planificador.cancelar(self._tarea)
+                self._tarea = None
+                ahora = self._reloj.ahora()
+                pausados = self.segundos_pausados
+                if self._pausado_desde is not None:
+                    pausados += max(0.0, ahora - self._pausado_desde)
+                sesion = (self.fase_actual, self.tiempo_inicio, ahora, self.duracion_fase, pausados,
+                          self._cerrar_inactividad(ahora))
+            self.activo = False
+            self.pausado = False
+            self._pausado_desde = None
+            self._guardar_estado()
+            ciclo = self.ciclo_actual
+        
+        if sesion:
+            self._registrar_sesion(*sesion, completada=False)
+            self.eventos.publicar('fase_finalizada', fase=sesion[0], ciclo=ciclo, completada=False)
         registrar_evento("🛑 Pomodoro Timer detenido")
+        self.eventos.publicar('detenido', ciclo=ciclo)
     
     def obtener_estado(self):
         """Retorna el estado actual del Pomodoro"""
@@ -138,8 +440,9 @@ class PomodoroTimer:
             }
         
         fase = "descanso" if self.en_descanso else "trabajo"
-        tiempo_restante_min = int(self.tiempo_restante / 60)
-        tiempo_restante_seg = int(self.tiempo_restante % 60)
+        tiempo_restante = self.tiempo_restante
+        tiempo_restante_min = int(tiempo_restante / 60)
+        tiempo_restante_seg = int(tiempo_restante % 60)
         
         return {
             'activo': True,
@@ -149,19 +452,30 @@ class PomodoroTimer:
             'tiempo_restante': f"{tiempo_restante_min:02d}:{tiempo_restante_seg:02d}"
         }
     
-    def configurar_tiempos(self, trabajo=None, descanso_corto=None, descanso_largo=None):
-        """Permite configurar los tiempos del Pomodoro"""
+    def configurar_tiempos(self, trabajo=None, descanso_corto=None, descanso_largo=None, adaptativo=None):
+        """
+        Permite configurar los tiempos del Pomodoro
+        
+        Con adaptativo=True los tiempos configurados son la base que cada fase ajusta
+        según el rendimiento histórico de su hora del día.
+        """
         if trabajo:
             self.tiempo_trabajo = trabajo
         if descanso_corto:
             self.tiempo_descanso_corto = descanso_corto
         if descanso_largo:
             self.tiempo_descanso_largo = descanso_largo
+        if adaptativo is not None:
+            self.modo_adaptativo = bool(adaptativo)
             
-        registrar_evento(f"⚙️ Tiempos configurados: {self.tiempo_trabajo}/{self.tiempo_descanso_corto}/{self.tiempo_descanso_largo}")
+        modo = " (adaptativo)" if self.modo_adaptativo else ""
+        registrar_evento(f"⚙️ Tiempos configurados: {self.tiempo_trabajo}/{self.tiempo_descanso_corto}/{self.tiempo_descanso_largo}{modo}")
 
 if __name__ == "__main__":
     # Prueba del temporizador
     pomodoro = PomodoroTimer()
     pomodoro.configurar_tiempos(trabajo=1, descanso_corto=1, descanso_largo=2)  # Tiempos cortos para prueba
     pomodoro.iniciar()
+    
+    while pomodoro.activo:
+        time.sleep(1)
@@ -1,40 +1,114 @@
 # reportes/resumen_diario.py - Sistema de resumen diario con mensajes motivadores
 
+import copy
 import json
+import threading
 import requests
-from datetime import datetime, date
+from datetime import datetime, timedelta
 from config import config_sistema
-from storage.database import obtener_estadisticas_diarias
-from objetivos.gestor_objetivos import GestorObjetivos
+from storage.database import obtener_estadisticas_diarias, escritor_db
+from objetivos.gestor_objetivos import obtener_gestor_objetivos
+from objetivos.analitica import obtener_analitica_objetivos
 from monitor.logger import registrar_evento
+from utils.fechas import fecha_hoy, fecha_hace_dias
+
+# Días pasados cuyos resúmenes quedan en memoria (ya no cambian)
+MAX_RESUMENES_CACHEADOS = 31
+
+# Resúmenes por fecha compartidos por todas las instancias de ResumenDiario
+_resumenes = {}
+_lock_resumenes = threading.Lock()
+_generacion = 0               # cambia con cada invalidación: un cálculo en curso no guarda datos viejos
+_invalidacion_conectada = False
+
+def invalidar_resumen(fecha=None):
+    """Descarta el resumen de una fecha, o con None los que todavía pueden cambiar (hoy y ayer)"""
+    global _generacion
+    with _lock_resumenes:
+        _generacion += 1
+        if fecha is not None:
+            _resumenes.pop(fecha, None)
+        else:
+            # Los spans se retienen unos minutos antes de escribirse: ayer puede recibir datos tras la medianoche
+            abiertas = fecha_hace_dias(1)
+            for fecha_cacheada in [f for f in _resumenes if f >= abiertas]:
+                del _resumenes[fecha_cacheada]
+
+def _al_escribir_db(canales):
+    invalidar_resumen()
+
+def _al_cambiar_objetivo(evento, fecha=None, objetivo=None):
+    invalidar_resumen(fecha)
+
+def _conectar_invalidacion(gestor_objetivos):
+    """Suscribe la cache a las escrituras del escritor de la base y a los cambios de objetivos (una vez)"""
+    global _invalidacion_conectada
+    with _lock_resumenes:
+        if _invalidacion_conectada:
+            return
+        _invalidacion_conectada = True
+    escritor_db.al_escribir(_al_escribir_db)
+    gestor_objetivos.suscribir_cambios(_al_cambiar_objetivo)
 
 class ResumenDiario:
     def __init__(self):
-        self.gestor_objetivos = GestorObjetivos()
+        self.gestor_objetivos = obtener_gestor_objetivos()
         self.nombre_usuario = config_sistema.obtener_nombre_usuario()
+        _conectar_invalidacion(self.gestor_objetivos)
         
     def generar_resumen_completo(self, fecha=None):
-        """Genera un resumen completo del día"""
+        """
+        Genera un resumen completo del día (memorizado por fecha)
+        
+        El resumen se calcula una vez y se reutiliza hasta que una escritura lo
+        invalida: un lote del escritor de la base (spans, fases Pomodoro) descarta
+        los de hoy y ayer, y un cambio de objetivo el de su fecha. Los días
+        anteriores quedan fijos. Retorna una copia que se puede modificar.
+        """
         if fecha is None:
-            fecha = date.today().isoformat()
+            fecha = fecha_hoy()
+        
+        # Lo encolado en el escritor entra antes de mirar la cache (y la invalida si hace falta)
+        if fecha >= fecha_hace_dias(1):
+            escritor_db.vaciar()
+        
+        with _lock_resumenes:
+            resumen = _resumenes.get(fecha)
+            generacion = _generacion
+        if resumen is not None:
+            return copy.deepcopy(resumen)
         
+        resumen = self._calcular_resumen(fecha)
+        if resumen is not None:
+            with _lock_resumenes:
+                if generacion == _generacion:
+                    _resumenes[fecha] = copy.deepcopy(resumen)
+                    for vieja in sorted(_resumenes)[:max(0, len(_resumenes) - MAX_RESUMENES_CACHEADOS - 2)]:
+                        del _resumenes[vieja]
+        return resumen
+    
+    def _calcular_resumen(self, fecha):
+        """Calcula el resumen de una fecha consultando la base y el gestor de objetivos"""
         try:
             # Obtener datos del día
             estadisticas = obtener_estadisticas_diarias(fecha)
             resumen_objetivos = self.gestor_objetivos.obtener_resumen_diario(fecha)
+            rachas = obtener_analitica_objetivos().rachas()
             
             # Calcular métricas
             tiempo_activo_horas = 0
             aplicacion_principal = "Ninguna"
             tiempo_app_principal = 0
-            pomodoros_completados = 0
             
             if estadisticas and estadisticas['estadisticas_generales']:
                 data = estadisticas['estadisticas_generales']
                 tiempo_activo_horas = (data[2] or 0) / 3600  # Convertir a horas
-                pomodoros_completados = data[5] or 0
-                aplicacion_principal = data[7] or "Ninguna"
-                tiempo_app_principal = (data[8] or 0) / 60  # Convertir a minutos
+                aplicacion_principal = data[8] or "Ninguna"
+                tiempo_app_principal = (data[9] or 0) / 60  # Convertir a minutos
+            
+            # Pomodoros desde las fases registradas (no depende de estadisticas_diarias)
+            resumen_pomodoro = estadisticas['resumen_pomodoro'] if estadisticas else {}
+            pomodoros_completados = resumen_pomodoro.get('completados', 0)
             
             # Crear resumen estructurado
             resumen = {
@@ -44,6 +118,8 @@ class ResumenDiario:
                 'metricas': {
                     'tiempo_activo_horas': round(tiempo_activo_horas, 2),
                     'pomodoros_completados': pomodoros_completados,
+                    'pomodoros_interrumpidos': resumen_pomodoro.get('interrumpidos', 0),
+                    'tasa_exito_pomodoro': resumen_pomodoro.get('tasa_exito', 0.0),
                     'aplicacion_principal': aplicacion_principal,
                     'tiempo_app_principal_minutos': round(tiempo_app_principal, 1)
                 },
@@ -51,6 +127,8 @@ class ResumenDiario:
                     'total_objetivos': resumen_objetivos['total_objetivos'],
                     'objetivos_completados': resumen_objetivos['objetivos_completados'],
                     'porcentaje_completado': round(resumen_objetivos['porcentaje_completado'], 1),
+                    'racha_actual': rachas['actual'],
+                    'racha_mas_larga': rachas['mas_larga'],
                     'detalle_objetivos': [
                         {
                             'descripcion': obj['descripcion'],
@@ -116,6 +194,10 @@ class ResumenDiario:
         else:
             mensaje_objetivos = f"🌱 {nombre}, fue un día para aprender. Mañana es una nueva oportunidad para brillar ✨"
         
+        racha = resumen['objetivos'].get('racha_actual', 0)
+        if racha >= 2:
+            mensaje_objetivos += f"\n🔥 Llevas {racha} días seguidos cumpliendo todos tus objetivos (récord: {resumen['objetivos']['racha_mas_larga']})."
+        
         # Mensaje sobre Pomodoros
         if pomodoros >= 8:
             mensaje_pomodoro = f"🍅 ¡{pomodoros} Pomodoros completados! Tu concentración fue excepcional."
@@ -341,27 +423,52 @@ class ResumenDiario:
         except Exception as e:
             print(f"❌ Error al mostrar resumen en ventana: {e}")
 
-def programar_resumen_automatico():
-    """Programa el resumen automático al final del día"""
-    import schedule
-    import time
-    import threading
+def segundos_hasta_hora(hora, ahora):
+    """Segundos desde 'ahora' (timestamp epoch) hasta la próxima vez que el reloj local marque 'hora' (HH:MM)"""
+    horas, minutos = (int(parte) for parte in hora.split(':')[:2])
+    momento = datetime.fromtimestamp(ahora)
+    objetivo = momento.replace(hour=horas, minute=minutos, second=0, microsecond=0)
+    if objetivo <= momento:
+        objetivo = datetime.combine(objetivo.date() + timedelta(days=1), objetivo.time())
+    return objetivo.timestamp() - ahora
+
+def programar_resumen_automatico(reloj=None, planificador_plazos=None, ejecutar=None):
+    """
+    Programa el resumen automático al final del día
+    
+    Usa el planificador de plazos: no hay hilo propio ni sondeo, solo una tarea por
+    día que se reprograma al ejecutarse.
+    
+    Args:
+        reloj (Reloj): reloj de pared (RelojSimulado en simulaciones)
+        planificador_plazos (PlanificadorPlazos): planificador con el mismo reloj
+        ejecutar (callable): acción a ejecutar (por defecto, procesar el resumen diario)
+    """
+    from utils.planificador import planificador
+    from utils.reloj import RELOJ_SISTEMA
+    
+    reloj = reloj or RELOJ_SISTEMA
+    planificador_plazos = planificador_plazos or planificador
     
     def ejecutar_resumen():
         resumen_diario = ResumenDiario()
         resumen_diario.procesar_resumen_diario()
     
+    accion = ejecutar or ejecutar_resumen
+    
     # Programar para las 18:00 por defecto
     hora_resumen = config_sistema.config['reportes']['hora_resumen_diario']
-    schedule.every().day.at(hora_resumen).do(ejecutar_resumen)
     
-    def run_schedule():
-        while True:
-            schedule.run_pending()
-            time.sleep(60)
+    def al_vencer():
+        try:
+            accion()
+        finally:
+            programar_siguiente()
+    
+    def programar_siguiente():
+        planificador_plazos.programar(segundos_hasta_hora(hora_resumen, reloj.ahora()), al_vencer)
     
-    hilo_schedule = threading.Thread(target=run_schedule, daemon=True)
-    hilo_schedule.start()
+    programar_siguiente()
     print(f"⏰ Resumen automático programado para las {hora_resumen}")
 
 if __name__ == "__main__":
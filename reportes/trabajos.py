@@ -0,0 +1,361 @@
+# reportes/trabajos.py - Cola de reportes PDF generados en procesos aparte
+
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, timedelta
+from utils.eventos import BusEventos
+from utils.fechas import fecha_hoy, fecha_hace_dias, medianoche_siguiente
+
+TIPOS_REPORTE = ('diario', 'semanal')
+ESTADOS_FINALES = ('completado', 'cancelado', 'error')
+DIRECTORIO_REPORTES = 'storage/reportes'
+PROCESOS_POR_DEFECTO = 2
+MAX_TRABAJOS_GUARDADOS = 100
+
+# Estado de cada proceso trabajador (lo fija _inicializar_proceso)
+_cola_progreso = None
+
+def _inicializar_proceso(ruta_db, cola):
+    """Prepara un proceso del pool: misma base de datos que el proceso principal y cola de progreso"""
+    global _cola_progreso
+    from storage import database
+    database.DATABASE_PATH = ruta_db
+    _cola_progreso = cola
+
+def _ejecutar_trabajo(id_trabajo, tipo, fecha, ruta_temporal):
+    """Genera un reporte en el proceso trabajador; retorna la ruta escrita"""
+    def progreso(etapa, fraccion):
+        _cola_progreso.put((id_trabajo, etapa, fraccion))
+
+    progreso('iniciado', 0.0)
+    from utils import export_pdf
+
+    if tipo == 'diario':
+        ruta = export_pdf.generar_reporte_diario(fecha, ruta_temporal, progreso=progreso)
+    else:
+        ruta = export_pdf.generar_reporte_semanal(ruta_temporal, progreso=progreso)
+
+    if ruta is None:
+        raise RuntimeError(f"No se pudo generar el reporte {tipo} de {fecha}")
+    return ruta
+
+class ServicioReportes:
+    """
+    Cola de reportes PDF ejecutados en un ProcessPoolExecutor
+
+    ReportLab arma el documento completo en memoria y ocupa la CPU: en un proceso
+    aparte no bloquea el menú de la bandeja ni los hilos de monitoreo, y varios
+    reportes (por ejemplo, los diarios de un rango de meses) se generan en paralelo.
+    El pool se crea con la primera solicitud, con procesos 'spawn' en todas las
+    plataformas (el proceso principal tiene hilos y no es seguro hacer fork).
+
+    Cada solicitud es un trabajo con id, estado (pendiente, ejecutando, completado,
+    cancelado, error) y progreso entre 0 y 1, que los procesos informan por una
+    cola. Los cambios se publican en 'eventos' como 'reporte_progreso' y
+    'reporte_terminado' (desde hilos del servicio, no del que solicitó).
+
+    Los PDF quedan en DIRECTORIO_REPORTES y se reutilizan: el de un día se genera
+    una vez cerrado el día y sirve para siempre; el de hoy sirve hasta la próxima
+    escritura en la base. Pedir un reporte que ya está en la cola retorna el mismo
+    trabajo. Un trabajo pendiente se cancela sin ejecutarse; uno en ejecución
+    termina en su proceso pero su resultado se descarta.
+    """
+
+    def __init__(self, directorio=DIRECTORIO_REPORTES, procesos=None):
+        self.directorio = directorio
+        self.procesos = procesos
+        self.eventos = BusEventos()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._trabajos = {}     # id -> dict del trabajo
+        self._futuros = {}      # id -> Future de los trabajos sin terminar
+        self._en_cola = {}      # (tipo, fecha) -> id del trabajo sin terminar
+        self._vigentes = set()  # (tipo, fecha) generados sin escrituras posteriores en la base
+        self._generacion = 0
+        self._pool = None
+        self._enviados = []     # Futures enviados al pool actual (para cancelarlos al cerrarlo)
+        self._cola = None
+        self._hilo_progreso = None
+        self._conectado = False
+
+    def _conectar_invalidacion(self):
+        """Los reportes generados hoy dejan de servir con la próxima escritura en la base (una vez)"""
+        if self._conectado:
+            return
+        self._conectado = True
+        from storage.database import escritor_db
+        escritor_db.al_escribir(self._al_escribir_db)
+
+    def _al_escribir_db(self, canales):
+        with self._lock:
+            self._generacion += 1
+            self._vigentes.clear()
+
+    def _ruta(self, tipo, fecha):
+        return os.path.abspath(os.path.join(self.directorio, f"reporte_{tipo}_{fecha}.pdf"))
+
+    def _en_cache(self, tipo, fecha, ruta):
+        """True si el PDF guardado refleja los datos actuales (con el lock tomado)"""
+        if not os.path.exists(ruta):
+            return False
+        if (tipo, fecha) in self._vigentes:
+            return True
+        # Generado después de cerrado el día: sus datos ya no cambian
+        fin_del_dia = medianoche_siguiente(time.mktime(date.fromisoformat(fecha).timetuple()))
+        return os.path.getmtime(ruta) >= fin_del_dia
+
+    def _obtener_pool(self):
+        """Crea el pool y el hilo que recibe el progreso la primera vez (con el lock tomado)"""
+        if self._pool is None:
+            from config import config_sistema
+            from storage import database
+
+            procesos = self.procesos or config_sistema.obtener_configuracion('reportes', 'procesos_pdf') or PROCESOS_POR_DEFECTO
+            contexto = multiprocessing.get_context('spawn')
+            self._cola = contexto.Queue()
+            self._pool = ProcessPoolExecutor(
+                max_workers=procesos,
+                mp_context=contexto,
+                initializer=_inicializar_proceso,
+                initargs=(os.path.abspath(database.DATABASE_PATH), self._cola)
+            )
+            self._hilo_progreso = threading.Thread(target=self._recibir_progreso, args=(self._cola,), daemon=True)
+            self._hilo_progreso.start()
+        return self._pool
+
+    def solicitar(self, tipo, fecha=None):
+        """
+        Encola un reporte PDF y retorna el id de su trabajo sin esperar a que termine
+
+        Args:
+            tipo (str): 'diario' o 'semanal' (el semanal cubre los 7 días hasta hoy)
+            fecha (str): día del reporte diario en formato YYYY-MM-DD (None = hoy)
+        """
+        if tipo not in TIPOS_REPORTE:
+            raise ValueError(f"Tipo de reporte desconocido: {tipo}")
+        if tipo == 'semanal' or fecha is None:
+            fecha = fecha_hoy()
+
+        from storage.database import escritor_db
+
+        self._conectar_invalidacion()
+        # Lo encolado en el escritor debe estar en la base antes de que otro proceso la lea
+        escritor_db.vaciar()
+
+        clave = (tipo, fecha)
+        ruta = self._ruta(tipo, fecha)
+        with self._lock:
+            if clave in self._en_cola:
+                return self._en_cola[clave]
+
+            id_trabajo = next(self._ids)
+            trabajo = {
+                'id': id_trabajo,
+                'tipo': tipo,
+                'fecha': fecha,
+                'estado': 'pendiente',
+                'etapa': None,
+                'progreso': 0.0,
+                'ruta': None,
+                'error': None,
+                'desde_cache': False,
+                'solicitado': time.time()
+            }
+            self._trabajos[id_trabajo] = trabajo
+            self._descartar_antiguos()
+
+            if self._en_cache(tipo, fecha, ruta):
+                trabajo.update(estado='completado', progreso=1.0, ruta=ruta, desde_cache=True)
+                terminado = dict(trabajo)
+            else:
+                terminado = None
+                os.makedirs(self.directorio, exist_ok=True)
+                ruta_temporal = f"{ruta}.{id_trabajo}.tmp"
+                pool = self._obtener_pool()
+                try:
+                    futuro = pool.submit(_ejecutar_trabajo, id_trabajo, tipo, fecha, ruta_temporal)
+                except BrokenProcessPool:
+                    # Roto antes de que un trabajo lo informara: se reemplaza una vez
+                    pool.shutdown(wait=False)
+                    self._cola.put(None)
+                    self._pool = self._hilo_progreso = None
+                    self._enviados = []
+                    pool = self._obtener_pool()
+                    futuro = pool.submit(_ejecutar_trabajo, id_trabajo, tipo, fecha, ruta_temporal)
+                self._enviados = [f for f in self._enviados if not f.done()] + [futuro]
+                self._futuros[id_trabajo] = futuro
+                self._en_cola[clave] = id_trabajo
+                generacion = self._generacion
+
+        if terminado:
+            self.eventos.publicar('reporte_terminado', trabajo=terminado)
+        else:
+            futuro.add_done_callback(lambda f: self._al_terminar(id_trabajo, ruta, ruta_temporal, generacion, pool, f))
+        return id_trabajo
+
+    def solicitar_rango(self, desde, hasta=None):
+        """Encola los reportes diarios de desde a hasta (inclusive); se generan en paralelo"""
+        dia = date.fromisoformat(desde)
+        ultimo = date.fromisoformat(hasta or fecha_hoy())
+        ids = []
+        while dia <= ultimo:
+            ids.append(self.solicitar('diario', dia.isoformat()))
+            dia += timedelta(days=1)
+        return ids
+
+    def _recibir_progreso(self, cola):
+        """Hilo que aplica el progreso informado por los procesos hasta recibir None"""
+        while True:
+            try:
+                mensaje = cola.get()
+            except (EOFError, OSError):
+                return  # cola cerrada al terminar el intérprete
+            if mensaje is None:
+                return
+
+            id_trabajo, etapa, fraccion = mensaje
+            with self._lock:
+                trabajo = self._trabajos.get(id_trabajo)
+                if trabajo is None or trabajo['estado'] in ESTADOS_FINALES:
+                    continue
+                trabajo.update(estado='ejecutando', etapa=etapa, progreso=fraccion)
+                copia = dict(trabajo)
+            self.eventos.publicar('reporte_progreso', trabajo=copia)
+
+    def _al_terminar(self, id_trabajo, ruta, ruta_temporal, generacion, pool, futuro):
+        """Callback del Future: mueve el PDF a la cache o registra el error o la cancelación"""
+        error = None
+        if not futuro.cancelled():
+            error = futuro.exception()
+
+        if isinstance(error, BrokenProcessPool):
+            # Un proceso murió (memoria, cierre forzado): la próxima solicitud crea un pool nuevo
+            self._cerrar_pool(pool)
+
+        with self._lock:
+            trabajo = self._trabajos[id_trabajo]
+            self._futuros.pop(id_trabajo, None)
+            self._en_cola.pop((trabajo['tipo'], trabajo['fecha']), None)
+
+            if futuro.cancelled() or trabajo['estado'] == 'cancelado':
+                trabajo['estado'] = 'cancelado'
+            elif error is not None:
+                trabajo.update(estado='error', error=str(error))
+            else:
+                try:
+                    os.replace(ruta_temporal, ruta)
+                    trabajo.update(estado='completado', etapa=None, progreso=1.0, ruta=ruta)
+                    if generacion == self._generacion:
+                        self._vigentes.add((trabajo['tipo'], trabajo['fecha']))
+                except OSError as e:
+                    trabajo.update(estado='error', error=str(e))
+            terminado = dict(trabajo)
+
+        if os.path.exists(ruta_temporal):
+            try:
+                os.remove(ruta_temporal)
+            except OSError:
+                pass
+
+        self.eventos.publicar('reporte_terminado', trabajo=terminado)
+
+    def cancelar(self, id_trabajo):
+        """
+        Cancela un trabajo sin terminar
+
+        Returns:
+            bool: True si se canceló (un trabajo en ejecución se descarta al terminar)
+        """
+        with self._lock:
+            trabajo = self._trabajos.get(id_trabajo)
+            futuro = self._futuros.get(id_trabajo)
+            if trabajo is None or futuro is None or trabajo['estado'] in ESTADOS_FINALES:
+                return False
+            trabajo['estado'] = 'cancelado'
+
+        # Si todavía no empezó, el pool no lo ejecuta y el callback publica la cancelación
+        futuro.cancel()
+        return True
+
+    def obtener_trabajo(self, id_trabajo):
+        """Copia del estado de un trabajo (None si no existe)"""
+        with self._lock:
+            trabajo = self._trabajos.get(id_trabajo)
+            return dict(trabajo) if trabajo else None
+
+    def listar_trabajos(self):
+        """Copias de los trabajos recientes, del más nuevo al más antiguo"""
+        with self._lock:
+            return [dict(t) for t in sorted(self._trabajos.values(), key=lambda t: t['id'], reverse=True)]
+
+    def esperar(self, id_trabajo, timeout=None):
+        """Bloquea hasta que el trabajo termine; retorna su estado final (None si vence el timeout)"""
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            trabajo = self.obtener_trabajo(id_trabajo)
+            if trabajo is None or trabajo['estado'] in ESTADOS_FINALES:
+                return trabajo
+            if limite is not None and time.monotonic() >= limite:
+                return None
+            time.sleep(0.1)
+
+    def _descartar_antiguos(self):
+        """Olvida los trabajos terminados más antiguos por encima de MAX_TRABAJOS_GUARDADOS (con el lock tomado)"""
+        exceso = len(self._trabajos) - MAX_TRABAJOS_GUARDADOS
+        for id_trabajo in sorted(self._trabajos):
+            if exceso <= 0:
+                break
+            if self._trabajos[id_trabajo]['estado'] in ESTADOS_FINALES:
+                del self._trabajos[id_trabajo]
+                exceso -= 1
+
+    def _cerrar_pool(self, solo=None, esperar=False):
+        """Cierra el pool actual (si se indica 'solo', únicamente cuando el actual es ese)"""
+        with self._lock:
+            if solo is not None and solo is not self._pool:
+                return
+            pool, cola, hilo, enviados = self._pool, self._cola, self._hilo_progreso, self._enviados
+            self._pool = self._cola = self._hilo_progreso = None
+            self._enviados = []
+        if pool is None:
+            return
+        # Cancelar uno por uno (shutdown(cancel_futures=True) requiere Python 3.9)
+        for futuro in enviados:
+            futuro.cancel()
+        pool.shutdown(wait=esperar)
+        cola.put(None)
+        if esperar:
+            hilo.join(timeout=2)
+
+    def detener(self):
+        """Cancela los trabajos pendientes y espera a los que están en ejecución (a lo sumo uno por proceso)"""
+        self._cerrar_pool(esperar=True)
+
+# Instancia única del proceso
+_servicio_compartido = None
+_lock_servicio = threading.Lock()
+
+def obtener_servicio_reportes():
+    """Retorna el ServicioReportes compartido (se crea la primera vez)"""
+    global _servicio_compartido
+    with _lock_servicio:
+        if _servicio_compartido is None:
+            _servicio_compartido = ServicioReportes()
+        return _servicio_compartido
+
+if __name__ == "__main__":
+    servicio = obtener_servicio_reportes()
+    servicio.eventos.suscribir('reporte_progreso', lambda evento, trabajo: print(
+        f"   #{trabajo['id']} {trabajo['tipo']} {trabajo['fecha']}: {trabajo['etapa']} ({trabajo['progreso'] * 100:.0f}%)"))
+
+    ids = servicio.solicitar_rango(fecha_hace_dias(2)) + [servicio.solicitar('semanal')]
+    for id_trabajo in ids:
+        trabajo = servicio.esperar(id_trabajo)
+        origen = " (cache)" if trabajo['desde_cache'] else ""
+        print(f"#{id_trabajo} {trabajo['tipo']} {trabajo['fecha']}: {trabajo['estado']}{origen} {trabajo['ruta'] or trabajo['error'] or ''}")
+    servicio.detener()
@@ -102,7 +102,6 @@ def verificar_instalacion():
 try:
     import pynput
     import win32gui
-    import schedule
     import plyer
     import psutil
     import reportlab
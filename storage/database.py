@@ -2,11 +2,30 @@
 
 import sqlite3
 import os
-from datetime import datetime, date
+from datetime import datetime
 import json
+from storage.escritor import EscritorLotes
+from utils.fechas import fecha_local, fecha_hoy, fecha_hace_dias
 
 DATABASE_PATH = 'storage/actividad.db'
 
+# Versión del esquema (PRAGMA user_version) con las fechas ya migradas a día local:
+# 1 = sesiones Pomodoro, 2 = también eventos de actividad
+VERSION_FECHAS_LOCALES = 2
+
+def _conectar():
+    return sqlite3.connect(DATABASE_PATH)
+
+# Escritor compartido para inserciones frecuentes (spans de ventanas, etc.)
+escritor_db = EscritorLotes(_conectar)
+escritor_db.registrar_cierre()
+
+def _agregar_columna_si_falta(cursor, tabla, columna, definicion):
+    """Migración simple: agrega una columna a una tabla existente si todavía no la tiene"""
+    cursor.execute(f'PRAGMA table_info({tabla})')
+    if columna not in [fila[1] for fila in cursor.fetchall()]:
+        cursor.execute(f'ALTER TABLE {tabla} ADD COLUMN {columna} {definicion}')
+
 def inicializar_db():
     """Inicializa la base de datos SQLite con todas las tablas necesarias"""
     try:
@@ -24,7 +43,7 @@ def inicializar_db():
                 tipo_evento TEXT NOT NULL,
                 descripcion TEXT NOT NULL,
                 datos_adicionales TEXT,
-                fecha DATE DEFAULT (date('now'))
+                fecha DATE DEFAULT (date('now', 'localtime'))
             )
         ''')
         
@@ -32,7 +51,7 @@ def inicializar_db():
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS tiempo_aplicaciones (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                fecha DATE DEFAULT (date('now')),
+                fecha DATE DEFAULT (date('now', 'localtime')),
                 aplicacion TEXT NOT NULL,
                 proceso TEXT,
                 tiempo_segundos INTEGER DEFAULT 0,
@@ -45,36 +64,79 @@ def inicializar_db():
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS sesiones_pomodoro (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                fecha DATE DEFAULT (date('now')),
+                fecha DATE DEFAULT (date('now', 'localtime')),
                 numero_sesion INTEGER,
                 tipo TEXT CHECK(tipo IN ('trabajo', 'descanso_corto', 'descanso_largo')),
                 inicio DATETIME,
                 fin DATETIME,
                 completada BOOLEAN DEFAULT FALSE,
-                interrumpida BOOLEAN DEFAULT FALSE
+                interrumpida BOOLEAN DEFAULT FALSE,
+                duracion_planificada_segundos INTEGER,
+                duracion_real_segundos INTEGER,
+                segundos_pausados INTEGER DEFAULT 0,
+                segundos_inactivos INTEGER DEFAULT 0
             )
         ''')
         
+        _agregar_columna_si_falta(cursor, 'sesiones_pomodoro', 'duracion_planificada_segundos', 'INTEGER')
+        _agregar_columna_si_falta(cursor, 'sesiones_pomodoro', 'duracion_real_segundos', 'INTEGER')
+        _agregar_columna_si_falta(cursor, 'sesiones_pomodoro', 'segundos_pausados', 'INTEGER DEFAULT 0')
+        _agregar_columna_si_falta(cursor, 'sesiones_pomodoro', 'segundos_inactivos', 'INTEGER DEFAULT 0')
+        
         # Tabla de objetivos diarios
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS objetivos_diarios (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                fecha DATE DEFAULT (date('now')),
+                fecha DATE DEFAULT (date('now', 'localtime')),
                 descripcion TEXT NOT NULL,
                 tipo TEXT DEFAULT 'contador',
                 meta INTEGER DEFAULT 1,
                 progreso INTEGER DEFAULT 0,
                 completado BOOLEAN DEFAULT FALSE,
                 fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
-                fecha_completado DATETIME
+                fecha_completado DATETIME,
+                regla TEXT,
+                plantilla_id INTEGER REFERENCES plantillas_objetivos(id)
+            )
+        ''')
+        
+        # Regla de avance automático (JSON, ver objetivos/reglas.py)
+        _agregar_columna_si_falta(cursor, 'objetivos_diarios', 'regla', 'TEXT')
+        _agregar_columna_si_falta(cursor, 'objetivos_diarios', 'plantilla_id', 'INTEGER REFERENCES plantillas_objetivos(id)')
+        
+        # Plantillas de objetivos recurrentes; se materializan en objetivos_diarios al leer el día
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS plantillas_objetivos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                descripcion TEXT NOT NULL,
+                tipo TEXT DEFAULT 'contador',
+                meta INTEGER DEFAULT 1,
+                recurrencia TEXT CHECK(recurrencia IN ('diaria', 'laborables', 'semanal')) DEFAULT 'diaria',
+                dia_semana INTEGER,
+                regla TEXT,
+                activa BOOLEAN DEFAULT TRUE,
+                desde DATE DEFAULT (date('now', 'localtime'))
+            )
+        ''')
+        
+        # Días cuyas plantillas ya se materializaron (una vez por día, aunque luego se borren objetivos)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS plantillas_materializadas (
+                fecha DATE PRIMARY KEY
             )
         ''')
         
+        # Una sola instancia por plantilla y día, aunque dos procesos materialicen a la vez
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_objetivos_diarios_plantilla 
+            ON objetivos_diarios (fecha, plantilla_id) WHERE plantilla_id IS NOT NULL
+        ''')
+        
         # Tabla de estadísticas diarias
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS estadisticas_diarias (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                fecha DATE UNIQUE DEFAULT (date('now')),
+                fecha DATE UNIQUE DEFAULT (date('now', 'localtime')),
                 tiempo_activo_segundos INTEGER DEFAULT 0,
                 tiempo_inactivo_segundos INTEGER DEFAULT 0,
                 clicks_totales INTEGER DEFAULT 0,
@@ -86,6 +148,117 @@ def inicializar_db():
             )
         ''')
         
+        # Histograma de foco por minuto (0-1439) de cada día
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS histograma_foco (
+                fecha DATE NOT NULL,
+                minuto INTEGER NOT NULL,
+                puntuacion REAL DEFAULT 0,
+                teclas INTEGER DEFAULT 0,
+                clicks INTEGER DEFAULT 0,
+                movimientos INTEGER DEFAULT 0,
+                PRIMARY KEY (fecha, minuto)
+            )
+        ''')
+        
+        # Categorías de aplicaciones (asignadas al ingerir cada span)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS categorias (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nombre TEXT UNIQUE NOT NULL
+            )
+        ''')
+        
+        _agregar_columna_si_falta(cursor, 'tiempo_aplicaciones', 'categoria_id', 'INTEGER REFERENCES categorias(id)')
+        
+        # Diccionarios de aplicaciones y títulos para spans compactos
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS aplicaciones (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nombre TEXT UNIQUE NOT NULL
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS titulos_ventana (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                titulo TEXT UNIQUE NOT NULL
+            )
+        ''')
+        
+        # Una fila por sesión en primer plano (de un cambio de ventana al siguiente)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS spans_ventana (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                fecha DATE NOT NULL,
+                inicio_ms INTEGER NOT NULL,
+                fin_ms INTEGER NOT NULL,
+                app_id INTEGER NOT NULL REFERENCES aplicaciones(id),
+                pid INTEGER,
+                titulo_id INTEGER REFERENCES titulos_ventana(id),
+                categoria_id INTEGER REFERENCES categorias(id),
+                activo_ms INTEGER
+            )
+        ''')
+        
+        _agregar_columna_si_falta(cursor, 'spans_ventana', 'categoria_id', 'INTEGER REFERENCES categorias(id)')
+        _agregar_columna_si_falta(cursor, 'spans_ventana', 'activo_ms', 'INTEGER')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_spans_ventana_inicio 
+            ON spans_ventana (inicio_ms)
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_spans_ventana_fecha_app 
+            ON spans_ventana (fecha, app_id)
+        ''')
+        
+        # Rendimiento acumulado por hora del día (0-23) para el Pomodoro adaptativo.
+        # Se actualiza al escribir cada fase de trabajo y cada minuto de foco, con
+        # decaimiento exponencial para que los hábitos viejos pesen cada vez menos.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS rendimiento_por_hora (
+                hora INTEGER PRIMARY KEY CHECK(hora BETWEEN 0 AND 23),
+                fases_completadas REAL DEFAULT 0,
+                fases_interrumpidas REAL DEFAULT 0,
+                segundos_trabajo REAL DEFAULT 0,
+                segundos_inactivos REAL DEFAULT 0,
+                minutos_foco REAL DEFAULT 0,
+                suma_puntuacion_foco REAL DEFAULT 0
+            )
+        ''')
+        
+        # Primera vez: se parte del historial existente (una sola pasada)
+        cursor.execute('SELECT COUNT(*) FROM rendimiento_por_hora')
+        if cursor.fetchone()[0] == 0:
+            _reconstruir_rendimiento_por_hora(cursor)
+        
+        # Todas las consultas por día filtran por la clave fecha (día local)
+        for tabla in ('eventos_actividad', 'sesiones_pomodoro', 'objetivos_diarios'):
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{tabla}_fecha ON {tabla} (fecha)')
+        
+        # Una sola vez (PRAGMA user_version): las filas guardadas con el default UTC se
+        # reasignan al día local de su marca de tiempo; las nuevas ya llegan con su fecha
+        # local. tiempo_aplicaciones y objetivos_diarios siempre recibieron la fecha local
+        # desde Python (date.today()), así que no se tocan
+        cursor.execute('PRAGMA user_version')
+        version = cursor.fetchone()[0]
+        if version < 1:
+            # inicio ya se guarda en hora local
+            cursor.execute('''
+                UPDATE sesiones_pomodoro SET fecha = date(inicio)
+                WHERE inicio IS NOT NULL AND fecha != date(inicio)
+            ''')
+        if version < 2:
+            # timestamp es CURRENT_TIMESTAMP (UTC)
+            cursor.execute('''
+                UPDATE eventos_actividad SET fecha = date(timestamp, 'localtime')
+                WHERE timestamp IS NOT NULL AND fecha != date(timestamp, 'localtime')
+            ''')
+        if version < VERSION_FECHAS_LOCALES:
+            cursor.execute(f'PRAGMA user_version = {VERSION_FECHAS_LOCALES}')
+        
         conn.commit()
         conn.close()
         
@@ -103,9 +276,9 @@ def registrar_evento_db(tipo_evento, descripcion, datos_adicionales=None):
         datos_json = json.dumps(datos_adicionales) if datos_adicionales else None
         
         cursor.execute('''
-            INSERT INTO eventos_actividad (tipo_evento, descripcion, datos_adicionales)
-            VALUES (?, ?, ?)
-        ''', (tipo_evento, descripcion, datos_json))
+            INSERT INTO eventos_actividad (fecha, tipo_evento, descripcion, datos_adicionales)
+            VALUES (?, ?, ?, ?)
+        ''', (fecha_hoy(), tipo_evento, descripcion, datos_json))
         
         conn.commit()
         conn.close()
@@ -118,13 +291,13 @@ def actualizar_tiempo_aplicacion(aplicacion, proceso, tiempo_segundos):
     try:
         conn = sqlite3.connect(DATABASE_PATH)
         cursor = conn.cursor()
-        fecha_hoy = date.today().isoformat()
+        fecha = fecha_hoy()
         
         # Verificar si ya existe registro para hoy
         cursor.execute('''
             SELECT tiempo_segundos, sesiones FROM tiempo_aplicaciones 
             WHERE fecha = ? AND aplicacion = ?
-        ''', (fecha_hoy, aplicacion))
+        ''', (fecha, aplicacion))
         
         resultado = cursor.fetchone()
         
@@ -137,14 +310,14 @@ def actualizar_tiempo_aplicacion(aplicacion, proceso, tiempo_segundos):
                 UPDATE tiempo_aplicaciones 
                 SET tiempo_segundos = ?, sesiones = ?, proceso = ?
                 WHERE fecha = ? AND aplicacion = ?
-            ''', (nuevo_tiempo, nuevas_sesiones, proceso, fecha_hoy, aplicacion))
+            ''', (nuevo_tiempo, nuevas_sesiones, proceso, fecha, aplicacion))
         else:
             # Crear nuevo registro
             cursor.execute('''
                 INSERT INTO tiempo_aplicaciones 
                 (fecha, aplicacion, proceso, tiempo_segundos, sesiones)
                 VALUES (?, ?, ?, ?, 1)
-            ''', (fecha_hoy, aplicacion, proceso, tiempo_segundos))
+            ''', (fecha, aplicacion, proceso, tiempo_segundos))
         
         conn.commit()
         conn.close()
@@ -152,28 +325,727 @@ def actualizar_tiempo_aplicacion(aplicacion, proceso, tiempo_segundos):
     except Exception as e:
         print(f"Error al actualizar tiempo de aplicación: {e}")
 
-def registrar_sesion_pomodoro(numero_sesion, tipo, completada=True, interrumpida=False):
-    """Registra una sesión de Pomodoro en la base de datos"""
+# Los monitores parten los spans más largos que esto (segundos)
+MAX_DURACION_SPAN = 3600
+
+# Cache de ids de aplicaciones y títulos usada solo por el hilo escritor
+_ids_aplicaciones = {}
+_ids_titulos = {}
+_ids_categorias = {}
+MAX_IDS_CACHEADOS = 2048
+
+def usar_base_datos(ruta):
+    """
+    Cambia el archivo de base de datos (simulaciones); retorna la ruta anterior
+    
+    Vacía antes el escritor y descarta las caches de ids, que pertenecen a la base anterior.
+    """
+    global DATABASE_PATH
+    escritor_db.vaciar()
+    anterior, DATABASE_PATH = DATABASE_PATH, ruta
+    _olvidar_ids()
+    return anterior
+
+def _olvidar_ids():
+    """Descarta las caches de ids (cambio de base, o un lote revertido que pudo haberlas llenado)"""
+    _ids_aplicaciones.clear()
+    _ids_titulos.clear()
+    _ids_categorias.clear()
+
+def _obtener_id(cursor, cache, tabla, columna, valor):
+    """Retorna el id de un valor en una tabla diccionario, insertándolo si hace falta"""
+    id_valor = cache.get(valor)
+    if id_valor is not None:
+        return id_valor
+    
+    cursor.execute(f'INSERT OR IGNORE INTO {tabla} ({columna}) VALUES (?)', (valor,))
+    cursor.execute(f'SELECT id FROM {tabla} WHERE {columna} = ?', (valor,))
+    id_valor = cursor.fetchone()[0]
+    
+    if len(cache) >= MAX_IDS_CACHEADOS:
+        cache.clear()
+    cache[valor] = id_valor
+    return id_valor
+
+def _escribir_spans_ventana(cursor, spans):
+    """Manejador del escritor: inserta spans y acumula su tiempo en tiempo_aplicaciones"""
+    filas = []
+    tiempo_por_app = {}
+    
+    for span in spans:
+        app_id = _obtener_id(cursor, _ids_aplicaciones, 'aplicaciones', 'nombre', span['proceso'])
+        titulo_id = _obtener_id(cursor, _ids_titulos, 'titulos_ventana', 'titulo', span['titulo'])
+        categoria_id = _obtener_id(cursor, _ids_categorias, 'categorias', 'nombre', span['categoria'])
+        filas.append((span['fecha'], span['inicio_ms'], span['fin_ms'], app_id, span['pid'],
+                      titulo_id, categoria_id, span['activo_ms']))
+        
+        # tiempo_aplicaciones acumula solo el tiempo con actividad real
+        clave = (span['fecha'], span['proceso'])
+        segundos, sesiones, _ = tiempo_por_app.get(clave, (0.0, 0, categoria_id))
+        tiempo_por_app[clave] = (segundos + span['activo_ms'] / 1000.0, sesiones + 1, categoria_id)
+    
+    cursor.executemany('''
+        INSERT INTO spans_ventana (fecha, inicio_ms, fin_ms, app_id, pid, titulo_id, categoria_id, activo_ms)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', filas)
+    
+    cursor.executemany('''
+        INSERT INTO tiempo_aplicaciones (fecha, aplicacion, proceso, tiempo_segundos, sesiones, categoria_id)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(fecha, aplicacion) DO UPDATE SET
+            tiempo_segundos = tiempo_segundos + excluded.tiempo_segundos,
+            sesiones = sesiones + excluded.sesiones,
+            categoria_id = excluded.categoria_id
+    ''', [
+        (fecha, proceso, proceso, round(segundos, 3), sesiones, categoria_id)
+        for (fecha, proceso), (segundos, sesiones, categoria_id) in tiempo_por_app.items()
+    ])
+
+escritor_db.registrar_canal('spans_ventana', _escribir_spans_ventana, al_revertir=_olvidar_ids)
+
+def registrar_span_ventana(inicio, fin, proceso, pid, titulo, categoria='otros', segundos_activos=None):
+    """
+    Encola un span de ventana en primer plano para escribirse en el próximo lote
+    
+    El span se asigna al día local de su inicio; quien lo genera debe partirlo
+    antes en las medianoches (utils.fechas.partir_por_dia).
+    
+    Args:
+        inicio (float): timestamp epoch de inicio
+        fin (float): timestamp epoch de fin
+        proceso (str): nombre del proceso dueño de la ventana
+        pid (int): pid del proceso
+        titulo (str): título de la ventana
+        categoria (str): categoría de la aplicación
+        segundos_activos (float): tiempo con actividad dentro del span (None = todo el span)
+    """
+    inicio_ms = int(inicio * 1000)
+    fin_ms = int(fin * 1000)
+    if fin_ms <= inicio_ms:
+        return
+    
+    if segundos_activos is None:
+        activo_ms = fin_ms - inicio_ms
+    else:
+        activo_ms = min(fin_ms - inicio_ms, max(0, int(segundos_activos * 1000)))
+    
+    escritor_db.encolar('spans_ventana', {
+        'fecha': fecha_local(inicio),
+        'inicio_ms': inicio_ms,
+        'fin_ms': fin_ms,
+        'proceso': proceso or 'proceso_desconocido',
+        'pid': pid,
+        'titulo': titulo or '',
+        'categoria': categoria or 'otros',
+        'activo_ms': activo_ms
+    })
+
+def obtener_spans_ventana(inicio, fin):
+    """
+    Obtiene los spans que se solapan con [inicio, fin) (timestamps epoch)
+    
+    Returns:
+        list: tuplas (inicio_ms, fin_ms, aplicacion, pid, titulo, activo_ms) ordenadas por inicio
+    """
+    try:
+        conn = sqlite3.connect(DATABASE_PATH)
+        cursor = conn.cursor()
+        
+        # Un span nunca dura más de MAX_DURACION_SPAN, así que basta con retroceder eso en el índice
+        cursor.execute('''
+            SELECT s.inicio_ms, s.fin_ms, a.nombre, s.pid, t.titulo, s.activo_ms
+            FROM spans_ventana s
+            JOIN aplicaciones a ON a.id = s.app_id
+            LEFT JOIN titulos_ventana t ON t.id = s.titulo_id
+            WHERE s.inicio_ms >= ? AND s.inicio_ms < ? AND s.fin_ms > ?
+            ORDER BY s.inicio_ms
+        ''', (int((inicio - MAX_DURACION_SPAN) * 1000), int(fin * 1000), int(inicio * 1000)))
+        
+        spans = cursor.fetchall()
+        conn.close()
+        
+        return spans
+        
+    except Exception as e:
+        print(f"Error al obtener spans de ventana: {e}")
+        return []
+
+def obtener_actividad_en(momento):
+    """Retorna (inicio_ms, fin_ms, aplicacion, pid, titulo) del span activo en ese instante, o None"""
+    try:
+        conn = sqlite3.connect(DATABASE_PATH)
+        cursor = conn.cursor()
+        momento_ms = int(momento * 1000)
+        
+        cursor.execute('''
+            SELECT s.inicio_ms, s.fin_ms, a.nombre, s.pid, t.titulo
+            FROM spans_ventana s
+            JOIN aplicaciones a ON a.id = s.app_id
+            LEFT JOIN titulos_ventana t ON t.id = s.titulo_id
+            WHERE s.inicio_ms <= ?
+            ORDER BY s.inicio_ms DESC
+            LIMIT 1
+        ''', (momento_ms,))
+        
+        span = cursor.fetchone()
+        conn.close()
+        
+        if span and span[1] > momento_ms:
+            return span
+        return None
+        
+    except Exception as e:
+        print(f"Error al consultar actividad: {e}")
+        return None
+
+def obtener_tiempo_por_categoria(fecha=None):
+    """Obtiene [(categoria, segundos, sesiones)] de un día, agrupado por categoría"""
+    if fecha is None:
+        fecha = fecha_hoy()
+    
+    try:
+        conn = sqlite3.connect(DATABASE_PATH)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT COALESCE(c.nombre, 'otros'), SUM(t.tiempo_segundos), SUM(t.sesiones)
+            FROM tiempo_aplicaciones t
+            LEFT JOIN categorias c ON c.id = t.categoria_id
+            WHERE t.fecha = ?
+            GROUP BY t.categoria_id
+            ORDER BY SUM(t.tiempo_segundos) DESC
+        ''', (fecha,))
+        
+        categorias = cursor.fetchall()
+        conn.close()
+        
+        return categorias
+        
+    except Exception as e:
+        print(f"Error al obtener tiempo por categoría: {e}")
+        return []
+
+def contar_cambios_contexto(inicio, fin):
+    """Cuenta los cambios de ventana entre dos timestamps epoch"""
+    try:
+        conn = sqlite3.connect(DATABASE_PATH)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT COUNT(*) FROM spans_ventana 
+            WHERE inicio_ms >= ? AND inicio_ms < ?
+        ''', (int(inicio * 1000), int(fin * 1000)))
+        
+        cambios = cursor.fetchone()[0]
+        conn.close()
+        
+        return cambios
+        
+    except Exception as e:
+        print(f"Error al contar cambios de contexto: {e}")
+        return 0
+
+# Peso que conserva el rendimiento acumulado de una hora con cada dato nuevo
+DECAIMIENTO_FASES = 0.95      # por fase de trabajo (unas tres semanas de memoria por hora)
+DECAIMIENTO_MINUTOS = 0.999   # por minuto de foco
+
+# Fases más cortas (p. ej. detenidas al cerrar recién empezadas) no cuentan como interrupción
+MINIMO_FASE_RENDIMIENTO = 60
+
+def _reconstruir_rendimiento_por_hora(cursor):
+    """Llena rendimiento_por_hora desde sesiones_pomodoro e histograma_foco (sin decaimiento)"""
+    cursor.execute('''
+        INSERT INTO rendimiento_por_hora
+        (hora, fases_completadas, fases_interrumpidas, segundos_trabajo, segundos_inactivos)
+        SELECT CAST(strftime('%H', inicio) AS INTEGER),
+               SUM(CASE WHEN completada THEN 1 ELSE 0 END),
+               SUM(CASE WHEN interrumpida THEN 1 ELSE 0 END),
+               SUM(COALESCE(duracion_real_segundos, (julianday(fin) - julianday(inicio)) * 86400, 0)),
+               SUM(COALESCE(segundos_inactivos, 0))
+        FROM sesiones_pomodoro 
+        WHERE tipo = 'trabajo' AND inicio IS NOT NULL AND COALESCE(duracion_real_segundos, ?) >= ?
+        GROUP BY 1
+    ''', (MINIMO_FASE_RENDIMIENTO, MINIMO_FASE_RENDIMIENTO))
+    
+    cursor.execute('''
+        INSERT INTO rendimiento_por_hora (hora, minutos_foco, suma_puntuacion_foco)
+        SELECT minuto / 60, COUNT(*), SUM(puntuacion)
+        FROM histograma_foco 
+        WHERE true
+        GROUP BY 1
+        ON CONFLICT(hora) DO UPDATE SET
+            minutos_foco = excluded.minutos_foco,
+            suma_puntuacion_foco = excluded.suma_puntuacion_foco
+    ''')
+
+def _escribir_sesiones_pomodoro(cursor, sesiones):
+    """Manejador del escritor: inserta las fases Pomodoro terminadas y actualiza rendimiento_por_hora"""
+    cursor.executemany('''
+        INSERT INTO sesiones_pomodoro 
+        (fecha, numero_sesion, tipo, inicio, fin, completada, interrumpida,
+         duracion_planificada_segundos, duracion_real_segundos, segundos_pausados, segundos_inactivos)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (s['fecha'], s['numero_sesion'], s['tipo'], s['inicio'], s['fin'], s['completada'], s['interrumpida'],
+         s['duracion_planificada'], s['duracion_real'], s['segundos_pausados'], s['segundos_inactivos'])
+        for s in sesiones
+    ])
+    
+    cursor.executemany(f'''
+        INSERT INTO rendimiento_por_hora
+        (hora, fases_completadas, fases_interrumpidas, segundos_trabajo, segundos_inactivos)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(hora) DO UPDATE SET
+            fases_completadas = fases_completadas * {DECAIMIENTO_FASES} + excluded.fases_completadas,
+            fases_interrumpidas = fases_interrumpidas * {DECAIMIENTO_FASES} + excluded.fases_interrumpidas,
+            segundos_trabajo = segundos_trabajo * {DECAIMIENTO_FASES} + excluded.segundos_trabajo,
+            segundos_inactivos = segundos_inactivos * {DECAIMIENTO_FASES} + excluded.segundos_inactivos
+    ''', [
+        (s['hora'], int(s['completada']), int(s['interrumpida']), s['duracion_real'], s['segundos_inactivos'])
+        for s in sesiones if s['tipo'] == 'trabajo' and s['duracion_real'] >= MINIMO_FASE_RENDIMIENTO
+    ])
+
+escritor_db.registrar_canal('sesiones_pomodoro', _escribir_sesiones_pomodoro)
+
+def registrar_sesion_pomodoro(numero_sesion, tipo, completada=True, interrumpida=False,
+                              inicio=None, fin=None, duracion_planificada=None, segundos_pausados=0,
+                              segundos_inactivos=0):
+    """
+    Encola una fase Pomodoro terminada para escribirse en el próximo lote
+    
+    Args:
+        numero_sesion (int): ciclo Pomodoro al que pertenece la fase
+        tipo (str): 'trabajo', 'descanso_corto' o 'descanso_largo'
+        completada (bool): la fase llegó a su plazo
+        interrumpida (bool): la fase se detuvo antes del plazo
+        inicio (float): timestamp epoch de inicio (None = ahora)
+        fin (float): timestamp epoch de fin (None = ahora)
+        duracion_planificada (float): segundos programados para la fase
+        segundos_pausados (float): segundos en pausa dentro de [inicio, fin]
+        segundos_inactivos (float): segundos sin actividad del usuario dentro de la fase
+    """
+    fin = fin if fin is not None else datetime.now().timestamp()
+    inicio = inicio if inicio is not None else fin
+    
+    escritor_db.encolar('sesiones_pomodoro', {
+        'fecha': fecha_local(inicio),
+        'numero_sesion': numero_sesion,
+        'tipo': tipo,
+        'inicio': str(datetime.fromtimestamp(inicio)),
+        'fin': str(datetime.fromtimestamp(fin)),
+        'completada': bool(completada),
+        'interrumpida': bool(interrumpida),
+        'duracion_planificada': round(duracion_planificada) if duracion_planificada is not None else None,
+        'duracion_real': round(max(0.0, fin - inicio - segundos_pausados)),
+        'segundos_pausados': round(segundos_pausados),
+        'segundos_inactivos': round(segundos_inactivos),
+        'hora': datetime.fromtimestamp(inicio).hour
+    })
+
+def obtener_resumen_pomodoro(fecha=None):
+    """
+    Resumen de las fases de trabajo de un día calculado desde sesiones_pomodoro
+    
+    Returns:
+        dict: completados, interrumpidos, tasa_exito (0-100), minutos_foco y minutos_pausa
+    """
+    if fecha is None:
+        fecha = fecha_hoy()
+    
+    resumen = {'completados': 0, 'interrumpidos': 0, 'tasa_exito': 0.0, 'minutos_foco': 0.0, 'minutos_pausa': 0.0}
+    
+    try:
+        conn = sqlite3.connect(DATABASE_PATH)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT COALESCE(SUM(CASE WHEN completada THEN 1 ELSE 0 END), 0),
+                   COALESCE(SUM(CASE WHEN interrumpida THEN 1 ELSE 0 END), 0),
+                   COALESCE(SUM(duracion_real_segundos), 0),
+                   COALESCE(SUM(segundos_pausados), 0),
+                   COUNT(*)
+            FROM sesiones_pomodoro 
+            WHERE fecha = ? AND tipo = 'trabajo'
+        ''', (fecha,))
+        
+        completados, interrumpidos, segundos_foco, segundos_pausa, total = cursor.fetchone()
+        conn.close()
+        
+        resumen.update({
+            'completados': completados,
+            'interrumpidos': interrumpidos,
+            'tasa_exito': round(completados * 100.0 / total, 1) if total else 0.0,
+            'minutos_foco': round(segundos_foco / 60, 1),
+            'minutos_pausa': round(segundos_pausa / 60, 1)
+        })
+        
+    except Exception as e:
+        print(f"Error al obtener resumen Pomodoro: {e}")
+    
+    return resumen
+
+def obtener_rendimiento_por_hora(horas):
+    """
+    Rendimiento acumulado de las horas indicadas (consulta por clave primaria, sin recorrer historial)
+    
+    Returns:
+        dict: hora -> {fases_completadas, fases_interrumpidas, segundos_trabajo,
+              segundos_inactivos, minutos_foco, suma_puntuacion_foco}
+    """
+    horas = [hora % 24 for hora in horas]
+    try:
+        conn = sqlite3.connect(DATABASE_PATH)
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT hora, fases_completadas, fases_interrumpidas, segundos_trabajo,
+                   segundos_inactivos, minutos_foco, suma_puntuacion_foco
+            FROM rendimiento_por_hora 
+            WHERE hora IN ({','.join('?' * len(horas))})
+        ''', horas)
+        
+        columnas = ('fases_completadas', 'fases_interrumpidas', 'segundos_trabajo',
+                    'segundos_inactivos', 'minutos_foco', 'suma_puntuacion_foco')
+        rendimiento = {fila[0]: dict(zip(columnas, fila[1:])) for fila in cursor.fetchall()}
+        conn.close()
+        
+        return rendimiento
+        
+    except Exception as e:
+        print(f"Error al obtener rendimiento por hora: {e}")
+        return {}
+
+def registrar_minuto_foco(fecha, minuto, puntuacion, teclas=0, clicks=0, movimientos=0):
+    """Guarda la puntuación de foco y los conteos de entrada de un minuto del día"""
     try:
         conn = sqlite3.connect(DATABASE_PATH)
         cursor = conn.cursor()
         
         cursor.execute('''
-            INSERT INTO sesiones_pomodoro 
-            (numero_sesion, tipo, inicio, fin, completada, interrumpida)
+            INSERT OR REPLACE INTO histograma_foco 
+            (fecha, minuto, puntuacion, teclas, clicks, movimientos)
             VALUES (?, ?, ?, ?, ?, ?)
-        ''', (numero_sesion, tipo, datetime.now(), datetime.now(), completada, interrumpida))
+        ''', (fecha, minuto, round(puntuacion, 1), teclas, clicks, movimientos))
+        
+        cursor.execute(f'''
+            INSERT INTO rendimiento_por_hora (hora, minutos_foco, suma_puntuacion_foco)
+            VALUES (?, 1, ?)
+            ON CONFLICT(hora) DO UPDATE SET
+                minutos_foco = minutos_foco * {DECAIMIENTO_MINUTOS} + 1,
+                suma_puntuacion_foco = suma_puntuacion_foco * {DECAIMIENTO_MINUTOS} + excluded.suma_puntuacion_foco
+        ''', (minuto // 60, puntuacion))
+        
+        conn.commit()
+        conn.close()
+        
+    except Exception as e:
+        print(f"Error al registrar minuto de foco: {e}")
+
+def obtener_histograma_foco(fecha=None):
+    """Obtiene el histograma de foco por minuto de un día: [(minuto, puntuacion, teclas, clicks, movimientos)]"""
+    if fecha is None:
+        fecha = fecha_hoy()
+    
+    try:
+        conn = sqlite3.connect(DATABASE_PATH)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT minuto, puntuacion, teclas, clicks, movimientos
+            FROM histograma_foco 
+            WHERE fecha = ?
+            ORDER BY minuto
+        ''', (fecha,))
+        
+        histograma = cursor.fetchall()
+        conn.close()
+        
+        return histograma
+        
+    except Exception as e:
+        print(f"Error al obtener histograma de foco: {e}")
+        return []
+
+# Columnas de objetivos_diarios en el orden en que se leen
+COLUMNAS_OBJETIVO = ('id', 'fecha', 'descripcion', 'tipo', 'meta', 'progreso',
+                     'completado', 'fecha_creacion', 'fecha_completado', 'regla', 'plantilla_id')
+
+def _fila_a_objetivo(fila):
+    objetivo = dict(zip(COLUMNAS_OBJETIVO, fila))
+    objetivo['completado'] = bool(objetivo['completado'])
+    objetivo['regla'] = json.loads(objetivo['regla']) if objetivo['regla'] else None
+    return objetivo
+
+def _valor_columna_objetivo(columna, valor):
+    """Valor a guardar en una columna de objetivos_diarios (la regla va como JSON)"""
+    if columna == 'regla':
+        return json.dumps(valor, ensure_ascii=False) if valor else None
+    return valor
+
+def insertar_objetivos(objetivos):
+    """
+    Inserta objetivos en una sola transacción; retorna la lista de ids asignados
+    
+    Args:
+        objetivos (list): dicts con fecha, descripcion, tipo, meta, progreso, completado,
+            fecha_creacion, fecha_completado y (opcionales) regla y plantilla_id
+    """
+    conn = sqlite3.connect(DATABASE_PATH)
+    try:
+        cursor = conn.cursor()
+        ids = []
+        for objetivo in objetivos:
+            cursor.execute(f'''
+                INSERT INTO objetivos_diarios 
+                ({', '.join(COLUMNAS_OBJETIVO[1:])})
+                VALUES ({', '.join('?' for _ in COLUMNAS_OBJETIVO[1:])})
+            ''', tuple(_valor_columna_objetivo(columna, objetivo.get(columna)) for columna in COLUMNAS_OBJETIVO[1:]))
+            ids.append(cursor.lastrowid)
+        conn.commit()
+        return ids
+    finally:
+        conn.close()
+
+def actualizar_objetivo(objetivo_id, **campos):
+    """Actualiza solo la fila del objetivo indicado (progreso, completado, ...); retorna True si existía"""
+    columnas = [columna for columna in campos if columna in COLUMNAS_OBJETIVO[2:]]
+    if not columnas:
+        return False
+    
+    conn = sqlite3.connect(DATABASE_PATH)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"UPDATE objetivos_diarios SET {', '.join(f'{c} = ?' for c in columnas)} WHERE id = ?",
+            [_valor_columna_objetivo(c, campos[c]) for c in columnas] + [objetivo_id]
+        )
+        conn.commit()
+        return cursor.rowcount > 0
+    finally:
+        conn.close()
+
+def actualizar_objetivos(cambios):
+    """
+    Actualiza varias filas de objetivos en una sola transacción
+
+    Args:
+        cambios (list): dicts con 'id' y las columnas a escribir (progreso, completado, ...)
+    """
+    conn = sqlite3.connect(DATABASE_PATH)
+    try:
+        cursor = conn.cursor()
+        for campos in cambios:
+            columnas = [columna for columna in campos if columna in COLUMNAS_OBJETIVO[2:]]
+            if columnas:
+                cursor.execute(
+                    f"UPDATE objetivos_diarios SET {', '.join(f'{c} = ?' for c in columnas)} WHERE id = ?",
+                    [_valor_columna_objetivo(c, campos[c]) for c in columnas] + [campos['id']]
+                )
+        conn.commit()
+    finally:
+        conn.close()
+
+def eliminar_objetivo_db(objetivo_id):
+    """Elimina un objetivo por id; retorna True si existía"""
+    conn = sqlite3.connect(DATABASE_PATH)
+    try:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM objetivos_diarios WHERE id = ?', (objetivo_id,))
+        conn.commit()
+        return cursor.rowcount > 0
+    finally:
+        conn.close()
+
+def obtener_objetivos(fecha=None, desde=None, hasta=None):
+    """
+    Objetivos de un día (o de un rango de días si se pasa desde/hasta), ordenados por creación
+    
+    Returns:
+        list: dicts con las columnas de objetivos_diarios
+    """
+    if desde is None and hasta is None:
+        condicion, parametros = 'fecha = ?', (fecha or fecha_hoy(),)
+    else:
+        condicion, parametros = 'fecha >= ? AND fecha <= ?', (desde or '0000-00-00', hasta or '9999-99-99')
+    
+    try:
+        conn = sqlite3.connect(DATABASE_PATH)
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT {', '.join(COLUMNAS_OBJETIVO)}
+            FROM objetivos_diarios 
+            WHERE {condicion}
+            ORDER BY fecha, id
+        ''', parametros)
+        
+        objetivos = [_fila_a_objetivo(fila) for fila in cursor.fetchall()]
+        conn.close()
+        
+        return objetivos
+        
+    except Exception as e:
+        print(f"Error al obtener objetivos: {e}")
+        return []
+
+# Columnas de plantillas_objetivos en el orden en que se leen
+COLUMNAS_PLANTILLA = ('id', 'descripcion', 'tipo', 'meta', 'recurrencia', 'dia_semana', 'regla', 'activa', 'desde')
+
+def _fila_a_plantilla(fila):
+    plantilla = dict(zip(COLUMNAS_PLANTILLA, fila))
+    plantilla['activa'] = bool(plantilla['activa'])
+    plantilla['regla'] = json.loads(plantilla['regla']) if plantilla['regla'] else None
+    return plantilla
+
+def _plantilla_aplica(plantilla, fecha):
+    """Indica si una plantilla genera objetivo en una fecha (YYYY-MM-DD)"""
+    if plantilla['desde'] and fecha < plantilla['desde']:
+        return False
+    
+    dia_semana = datetime.strptime(fecha, '%Y-%m-%d').weekday()
+    if plantilla['recurrencia'] == 'laborables':
+        return dia_semana < 5
+    if plantilla['recurrencia'] == 'semanal':
+        return dia_semana == plantilla['dia_semana']
+    return True
+
+def insertar_plantilla(plantilla):
+    """
+    Guarda una plantilla de objetivo recurrente; retorna su id
+    
+    Args:
+        plantilla (dict): descripcion, tipo, meta, recurrencia ('diaria', 'laborables' o
+            'semanal'), dia_semana (0 = lunes, solo semanal), regla y desde (YYYY-MM-DD)
+    """
+    conn = sqlite3.connect(DATABASE_PATH)
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO plantillas_objetivos (descripcion, tipo, meta, recurrencia, dia_semana, regla, desde)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (plantilla['descripcion'], plantilla.get('tipo', 'contador'), plantilla.get('meta', 1),
+              plantilla.get('recurrencia', 'diaria'), plantilla.get('dia_semana'),
+              _valor_columna_objetivo('regla', plantilla.get('regla')), plantilla.get('desde') or fecha_hoy()))
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+def desactivar_plantilla(plantilla_id):
+    """Deja de generar objetivos con una plantilla (los ya creados se conservan); retorna True si existía"""
+    conn = sqlite3.connect(DATABASE_PATH)
+    try:
+        cursor = conn.cursor()
+        cursor.execute('UPDATE plantillas_objetivos SET activa = FALSE WHERE id = ? AND activa', (plantilla_id,))
+        conn.commit()
+        return cursor.rowcount > 0
+    finally:
+        conn.close()
+
+def obtener_plantillas(incluir_inactivas=False):
+    """Plantillas de objetivos recurrentes (por defecto solo las activas)"""
+    try:
+        conn = sqlite3.connect(DATABASE_PATH)
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT {', '.join(COLUMNAS_PLANTILLA)}
+            FROM plantillas_objetivos
+            {'' if incluir_inactivas else 'WHERE activa'}
+            ORDER BY id
+        ''')
+        
+        plantillas = [_fila_a_plantilla(fila) for fila in cursor.fetchall()]
+        conn.close()
+        
+        return plantillas
+        
+    except Exception as e:
+        print(f"Error al obtener plantillas: {e}")
+        return []
+
+def materializar_plantillas(fecha, plantilla_id=None):
+    """
+    Crea en objetivos_diarios los objetivos de las plantillas activas que aplican a una fecha
+    
+    Sin plantilla_id, cada día se materializa una sola vez (queda anotado en
+    plantillas_materializadas): si el usuario borra un objetivo recurrente no vuelve a
+    aparecer. Con plantilla_id se materializa solo esa plantilla (recién creada). Solo
+    se leen las plantillas: el costo no depende del historial.
+    
+    Returns:
+        list: ids de los objetivos creados
+    """
+    conn = sqlite3.connect(DATABASE_PATH)
+    try:
+        cursor = conn.cursor()
+        
+        if plantilla_id is None:
+            cursor.execute('INSERT OR IGNORE INTO plantillas_materializadas (fecha) VALUES (?)', (fecha,))
+            if cursor.rowcount == 0:
+                conn.commit()
+                return []
+            cursor.execute(f'SELECT {", ".join(COLUMNAS_PLANTILLA)} FROM plantillas_objetivos WHERE activa')
+        else:
+            cursor.execute(f'SELECT {", ".join(COLUMNAS_PLANTILLA)} FROM plantillas_objetivos WHERE id = ? AND activa',
+                           (plantilla_id,))
+        
+        creados = []
+        ahora = datetime.now().isoformat()
+        for fila in cursor.fetchall():
+            plantilla = dict(zip(COLUMNAS_PLANTILLA, fila))
+            if not _plantilla_aplica(plantilla, fecha):
+                continue
+            
+            cursor.execute('''
+                INSERT OR IGNORE INTO objetivos_diarios 
+                (fecha, descripcion, tipo, meta, progreso, completado, fecha_creacion, regla, plantilla_id)
+                VALUES (?, ?, ?, ?, 0, FALSE, ?, ?, ?)
+            ''', (fecha, plantilla['descripcion'], plantilla['tipo'], plantilla['meta'], ahora,
+                  plantilla['regla'], plantilla['id']))
+            if cursor.rowcount:
+                creados.append(cursor.lastrowid)
         
         conn.commit()
+        return creados
+    finally:
         conn.close()
+
+def obtener_totales_objetivos_por_dia():
+    """
+    Agregados por día de todo el historial de objetivos, calculados en SQLite
+    
+    Returns:
+        list: tuplas (fecha, total, completados, suma_progreso) ordenadas por fecha, donde
+            suma_progreso suma progreso / meta (acotado a 0-1) de los objetivos del día
+    """
+    try:
+        conn = sqlite3.connect(DATABASE_PATH)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT fecha, COUNT(*), SUM(completado), SUM(MAX(0.0, MIN(1.0, progreso * 1.0 / MAX(meta, 1))))
+            FROM objetivos_diarios 
+            GROUP BY fecha
+            ORDER BY fecha
+        ''')
+        
+        totales = cursor.fetchall()
+        conn.close()
+        
+        return totales
         
     except Exception as e:
-        print(f"Error al registrar sesión Pomodoro: {e}")
+        print(f"Error al obtener totales de objetivos: {e}")
+        return []
 
 def obtener_estadisticas_diarias(fecha=None):
     """Obtiene las estadísticas de un día específico"""
     if fecha is None:
-        fecha = date.today().isoformat()
+        fecha = fecha_hoy()
+    
+    # Lo encolado en el escritor (spans, fases Pomodoro) entra en la lectura
+    escritor_db.vaciar()
     
     try:
         conn = sqlite3.connect(DATABASE_PATH)
@@ -200,7 +1072,7 @@ def obtener_estadisticas_diarias(fecha=None):
         cursor.execute('''
             SELECT tipo, COUNT(*), AVG(CASE WHEN completada THEN 1 ELSE 0 END)
             FROM sesiones_pomodoro 
-            WHERE date(inicio) = ?
+            WHERE fecha = ?
             GROUP BY tipo
         ''', (fecha,))
         
@@ -223,6 +1095,7 @@ def obtener_estadisticas_diarias(fecha=None):
             'estadisticas_generales': estadisticas,
             'tiempo_aplicaciones': aplicaciones,
             'sesiones_pomodoro': pomodoros,
+            'resumen_pomodoro': obtener_resumen_pomodoro(fecha),
             'objetivos': objetivos
         }
         
@@ -230,19 +1103,21 @@ def obtener_estadisticas_diarias(fecha=None):
         print(f"Error al obtener estadísticas: {e}")
         return None
 
-def actualizar_estadisticas_diarias():
-    """Actualiza las estadísticas del día actual"""
+def actualizar_estadisticas_diarias(fecha=None):
+    """Actualiza las estadísticas de un día (por defecto el actual)"""
+    escritor_db.vaciar()
+    
     try:
         conn = sqlite3.connect(DATABASE_PATH)
         cursor = conn.cursor()
-        fecha_hoy = date.today().isoformat()
+        fecha = fecha or fecha_hoy()
         
         # Calcular tiempo total por aplicaciones
         cursor.execute('''
             SELECT SUM(tiempo_segundos), COUNT(DISTINCT aplicacion)
             FROM tiempo_aplicaciones 
             WHERE fecha = ?
-        ''', (fecha_hoy,))
+        ''', (fecha,))
         
         resultado_apps = cursor.fetchone()
         tiempo_total = resultado_apps[0] or 0
@@ -254,15 +1129,15 @@ def actualizar_estadisticas_diarias():
             WHERE fecha = ?
             ORDER BY tiempo_segundos DESC 
             LIMIT 1
-        ''', (fecha_hoy,))
+        ''', (fecha,))
         
         app_principal = cursor.fetchone()
         
         # Contar Pomodoros completados
         cursor.execute('''
             SELECT COUNT(*) FROM sesiones_pomodoro 
-            WHERE date(inicio) = ? AND completada = TRUE AND tipo = 'trabajo'
-        ''', (fecha_hoy,))
+            WHERE fecha = ? AND completada = TRUE AND tipo = 'trabajo'
+        ''', (fecha,))
         
         pomodoros_completados = cursor.fetchone()[0]
         
@@ -270,23 +1145,45 @@ def actualizar_estadisticas_diarias():
         cursor.execute('''
             SELECT COUNT(*) FROM objetivos_diarios 
             WHERE fecha = ? AND completado = TRUE
-        ''', (fecha_hoy,))
+        ''', (fecha,))
         
         objetivos_completados = cursor.fetchone()[0]
         
+        # Totales de entrada del histograma de foco
+        cursor.execute('''
+            SELECT COALESCE(SUM(clicks), 0), COALESCE(SUM(teclas), 0)
+            FROM histograma_foco 
+            WHERE fecha = ?
+        ''', (fecha,))
+        
+        clicks_totales, teclas_totales = cursor.fetchone()
+        
+        # Tiempo en primer plano sin actividad (inactividad restada de los spans)
+        cursor.execute('''
+            SELECT COALESCE(SUM(fin_ms - inicio_ms - COALESCE(activo_ms, fin_ms - inicio_ms)), 0) / 1000
+            FROM spans_ventana 
+            WHERE fecha = ?
+        ''', (fecha,))
+        
+        tiempo_inactivo = cursor.fetchone()[0]
+        
         # Insertar o actualizar estadísticas
         cursor.execute('''
             INSERT OR REPLACE INTO estadisticas_diarias 
-            (fecha, tiempo_activo_segundos, pomodoros_completados, objetivos_completados,
+            (fecha, tiempo_activo_segundos, tiempo_inactivo_segundos, clicks_totales, teclas_totales,
+             pomodoros_completados, objetivos_completados,
              aplicacion_mas_usada, tiempo_aplicacion_principal)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (fecha_hoy, tiempo_total, pomodoros_completados, objetivos_completados,
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (fecha, tiempo_total, tiempo_inactivo, clicks_totales, teclas_totales,
+              pomodoros_completados, objetivos_completados,
               app_principal[0] if app_principal else None,
               app_principal[1] if app_principal else 0))
         
         conn.commit()
         conn.close()
         
+        escritor_db.notificar_escritura({'estadisticas_diarias'})
+        
     except Exception as e:
         print(f"Error al actualizar estadísticas diarias: {e}")
 
@@ -300,9 +1197,9 @@ def obtener_resumen_semanal():
             SELECT fecha, tiempo_activo_segundos, pomodoros_completados, 
                    objetivos_completados, aplicacion_mas_usada
             FROM estadisticas_diarias 
-            WHERE fecha >= date('now', '-7 days')
+            WHERE fecha >= ?
             ORDER BY fecha DESC
-        ''', )
+        ''', (fecha_hace_dias(7),))
         
         datos = cursor.fetchall()
         conn.close()
@@ -319,19 +1216,23 @@ def limpiar_datos_antiguos(dias_a_mantener=30):
         conn = sqlite3.connect(DATABASE_PATH)
         cursor = conn.cursor()
         
-        fecha_limite = f"date('now', '-{dias_a_mantener} days')"
+        fecha_limite = fecha_hace_dias(dias_a_mantener)
         
         # Limpiar eventos antiguos
-        cursor.execute(f'''
+        cursor.execute('''
             DELETE FROM eventos_actividad 
-            WHERE fecha < {fecha_limite}
-        ''')
+            WHERE fecha < ?
+        ''', (fecha_limite,))
         
         # Limpiar datos de aplicaciones antiguos
-        cursor.execute(f'''
+        cursor.execute('''
             DELETE FROM tiempo_aplicaciones 
-            WHERE fecha < {fecha_limite}
-        ''')
+            WHERE fecha < ?
+        ''', (fecha_limite,))
+        
+        # Limpiar spans e histograma de foco antiguos
+        for tabla in ('spans_ventana', 'histograma_foco'):
+            cursor.execute(f'DELETE FROM {tabla} WHERE fecha < ?', (fecha_limite,))
         
         conn.commit()
         conn.close()
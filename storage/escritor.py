@@ -0,0 +1,227 @@
+# storage/escritor.py - Escritor por lotes en segundo plano para la base de datos
+
+import atexit
+import sqlite3
+import threading
+import time
+
+# Intentos de un lote con la base bloqueada antes de escribirlo fila por fila
+MAX_REINTENTOS = 5
+
+def _registrar_error(mensaje):
+    """Registra el error en el log del sistema (CSV y consola), o en consola si el log no está disponible"""
+    try:
+        from monitor.logger import registrar_evento
+        registrar_evento(mensaje, "error")
+    except Exception:
+        print(f"❌ {mensaje}")
+
+def _es_bloqueo(error):
+    """True si la escritura falló por otra conexión con la base tomada (el lote completo puede reintentarse)"""
+    mensaje = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ('locked' in mensaje or 'busy' in mensaje)
+
+class EscritorLotes:
+    """
+    Agrupa escrituras pequeñas y frecuentes en una sola transacción
+
+    Cada canal (por ejemplo 'spans_ventana') tiene un manejador que recibe un
+    cursor y la lista de elementos pendientes. Un hilo vacía los canales cuando
+    se junta un lote completo o cuando pasa el intervalo máximo de espera.
+
+    Si el lote falla porque la base está bloqueada, vuelve al frente de la cola y
+    se reintenta con espera creciente (hasta MAX_REINTENTOS veces). Cualquier otro
+    error, o agotar los reintentos, escribe el lote fila por fila: solo se
+    descartan (y se registran) los elementos que fallan por sí solos.
+    """
+
+    def __init__(self, conectar, tamano_lote=50, intervalo_segundos=30):
+        self._conectar = conectar
+        self.tamano_lote = tamano_lote
+        self.intervalo_segundos = intervalo_segundos
+        self._manejadores = {}
+        self._al_revertir = {}
+        self._pendientes = {}
+        self._total_pendientes = 0
+        self._condicion = threading.Condition()
+        self._lock_escritura = threading.Lock()
+        self._hilo = None
+        self._activo = False
+        self._oyentes = []
+        self._fallos_seguidos = 0
+
+    def registrar_canal(self, canal, manejador, al_revertir=None):
+        """
+        Registra la función manejador(cursor, elementos) de un canal
+
+        Args:
+            al_revertir (callable): se llama sin argumentos cuando una transacción
+                con elementos del canal se revierte (para descartar caches del manejador)
+        """
+        self._manejadores[canal] = manejador
+        self._pendientes.setdefault(canal, [])
+        if al_revertir:
+            self._al_revertir[canal] = al_revertir
+
+    def _revertido(self, canales):
+        for canal in canales:
+            if canal in self._al_revertir:
+                self._al_revertir[canal]()
+
+    def al_escribir(self, callback):
+        """Registra callback(canales) que se llama después de cada lote confirmado"""
+        self._oyentes.append(callback)
+
+    def notificar_escritura(self, canales):
+        """Avisa a los oyentes de una escritura confirmada fuera del escritor (por ejemplo, directa a una tabla)"""
+        for callback in list(self._oyentes):
+            try:
+                callback(set(canales))
+            except Exception as e:
+                print(f"⚠️ Error en oyente del escritor: {e}")
+
+    def encolar(self, canal, elemento):
+        """Agrega un elemento al canal; la escritura ocurre en el próximo lote"""
+        with self._condicion:
+            self._pendientes[canal].append(elemento)
+            self._total_pendientes += 1
+
+            if not self._activo:
+                self._iniciar()
+
+            if self._total_pendientes >= self.tamano_lote:
+                self._condicion.notify()
+
+    def _iniciar(self):
+        self._activo = True
+        self._hilo = threading.Thread(target=self._ejecutar, daemon=True)
+        self._hilo.start()
+
+    def _ejecutar(self):
+        while True:
+            with self._condicion:
+                # Tras un lote devuelto por bloqueo, esperar antes de reintentar
+                if self._activo and self._fallos_seguidos:
+                    self._condicion.wait(min(self.intervalo_segundos, 2 ** self._fallos_seguidos))
+
+                # Sin pendientes no hay nada que temporizar: esperar al primer elemento
+                while self._activo and self._total_pendientes == 0:
+                    self._condicion.wait()
+
+                limite = time.monotonic() + self.intervalo_segundos
+                while self._activo and self._total_pendientes < self.tamano_lote:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        break
+                    self._condicion.wait(restante)
+
+                activo = self._activo
+
+            self.vaciar()
+
+            if not activo:
+                break
+
+    def _tomar_pendientes(self):
+        with self._condicion:
+            lote = {canal: elementos for canal, elementos in self._pendientes.items() if elementos}
+            self._pendientes = {canal: [] for canal in self._manejadores}
+            self._total_pendientes = 0
+        return lote
+
+    def _devolver(self, lote):
+        """Vuelve a poner un lote al frente de sus canales, antes de lo encolado mientras tanto"""
+        with self._condicion:
+            for canal, elementos in lote.items():
+                self._pendientes[canal] = elementos + self._pendientes[canal]
+                self._total_pendientes += len(elementos)
+
+    def _escribir_lote(self, lote):
+        """Escribe el lote en una transacción; retorna la excepción si falló (ya revertida)"""
+        try:
+            conn = self._conectar()
+        except Exception as e:
+            return e
+
+        try:
+            cursor = conn.cursor()
+            for canal, elementos in lote.items():
+                self._manejadores[canal](cursor, elementos)
+            conn.commit()
+            return None
+        except Exception as e:
+            # Revertir explícitamente: un cursor vivo en el traceback mantendría la transacción abierta
+            conn.rollback()
+            self._revertido(lote)
+            return e
+        finally:
+            conn.close()
+
+    def _escribir_por_filas(self, lote):
+        """Escribe cada elemento en su propia transacción; retorna los canales con algo escrito"""
+        escritos = set()
+        conn = self._conectar()
+        try:
+            cursor = conn.cursor()
+            for canal, elementos in lote.items():
+                for elemento in elementos:
+                    try:
+                        self._manejadores[canal](cursor, [elemento])
+                        conn.commit()
+                        escritos.add(canal)
+                    except Exception as e:
+                        conn.rollback()
+                        self._revertido([canal])
+                        _registrar_error(f"Elemento descartado del canal {canal} al escribir en BD: {e}")
+        finally:
+            conn.close()
+        return escritos
+
+    def vaciar(self, reintentar=True):
+        """
+        Escribe ya todos los elementos pendientes en una transacción
+
+        Args:
+            reintentar (bool): con la base bloqueada, devolver el lote a la cola en
+                lugar de escribirlo fila por fila (False al cerrar: no habrá otro intento)
+        """
+        with self._lock_escritura:
+            lote = self._tomar_pendientes()
+            if not lote:
+                return
+
+            error = self._escribir_lote(lote)
+            if error is None:
+                self._fallos_seguidos = 0
+                escritos = set(lote)
+            elif reintentar and _es_bloqueo(error) and self._fallos_seguidos < MAX_REINTENTOS:
+                self._fallos_seguidos += 1
+                self._devolver(lote)
+                _registrar_error(f"Base de datos bloqueada, lote devuelto a la cola (intento {self._fallos_seguidos}): {error}")
+                return
+            else:
+                _registrar_error(f"Error al escribir lote en BD, se escribe fila por fila: {error}")
+                self._fallos_seguidos = 0
+                try:
+                    escritos = self._escribir_por_filas(lote)
+                except Exception as e:
+                    _registrar_error(f"Lote descartado, no se pudo abrir la BD: {e}")
+                    return
+
+        if escritos:
+            self.notificar_escritura(escritos)
+
+    def detener(self):
+        """Vacía lo pendiente y detiene el hilo escritor"""
+        with self._condicion:
+            self._activo = False
+            self._condicion.notify()
+
+        if self._hilo and self._hilo is not threading.current_thread():
+            self._hilo.join(timeout=5)
+
+        self.vaciar(reintentar=False)
+
+    def registrar_cierre(self):
+        """Garantiza que lo pendiente se escriba al salir del proceso"""
+        atexit.register(self.detener)
@@ -0,0 +1,152 @@
+# utils/categorias.py - Motor de categorización de aplicaciones y normalización de títulos
+
+import json
+import os
+import re
+import threading
+from functools import lru_cache
+
+CATEGORIAS_FILE = 'storage/categorias_personalizadas.json'
+
+CATEGORIA_DEFECTO = 'otros'
+
+# El orden define la prioridad cuando un nombre coincide con varias categorías
+CATEGORIAS_DEFAULT = {
+    'navegador': ['chrome', 'firefox', 'edge', 'safari', 'opera', 'brave'],
+    'desarrollo': ['code', 'pycharm', 'intellij', 'eclipse', 'atom', 'sublime'],
+    'oficina': ['winword', 'excel', 'powerpnt', 'outlook', 'notepad'],
+    'comunicacion': ['teams', 'zoom', 'skype', 'slack', 'discord', 'whatsapp'],
+    'multimedia': ['vlc', 'spotify', 'itunes', 'photoshop', 'premiere'],
+    'juegos': ['steam', 'origin', 'epicgames', 'minecraft'],
+    'sistema': ['explorer', 'taskmgr', 'settings', 'control'],
+}
+
+SUFIJOS_TITULO_DEFAULT = [
+    " - Google Chrome",
+    " - Mozilla Firefox",
+    " - Microsoft Edge",
+    " - Visual Studio Code",
+    " - Notepad++",
+    " - Word",
+    " - Excel",
+    " - PowerPoint"
+]
+
+LARGO_MAXIMO_TITULO = 50
+
+class MotorCategorias:
+    """
+    Categoriza procesos con una única expresión regular compilada
+
+    Cada categoría es una alternativa con lookahead anclada al inicio, probadas en
+    orden de prioridad, así que una sola búsqueda resuelve todas las reglas. Los
+    resultados se memorizan por nombre de proceso con una cache LRU.
+    """
+
+    def __init__(self, reglas=None, sufijos=None, archivo=CATEGORIAS_FILE, tamano_memo=1024):
+        self.archivo = archivo
+        self.tamano_memo = tamano_memo
+        self._lock = threading.Lock()
+        self.reglas = {categoria: list(tokens) for categoria, tokens in (reglas or CATEGORIAS_DEFAULT).items()}
+        self.sufijos = list(sufijos or SUFIJOS_TITULO_DEFAULT)
+
+        if reglas is None and sufijos is None:
+            self._cargar_personalizadas()
+
+        self._compilar()
+
+    def _cargar_personalizadas(self):
+        """Agrega las reglas del usuario guardadas en el archivo de categorías"""
+        try:
+            if not os.path.exists(self.archivo):
+                return
+            with open(self.archivo, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+        except Exception as e:
+            print(f"❌ Error cargando categorías personalizadas: {e}")
+            return
+
+        for categoria, tokens in datos.get('reglas', {}).items():
+            existentes = self.reglas.setdefault(categoria, [])
+            existentes.extend(t for t in tokens if t not in existentes)
+
+        self.sufijos.extend(s for s in datos.get('sufijos', []) if s not in self.sufijos)
+
+    def _compilar(self):
+        """Compila reglas y sufijos y reinicia las caches"""
+        self.categorias = list(self.reglas)
+
+        alternativas = []
+        for i, categoria in enumerate(self.categorias):
+            tokens = sorted({t.lower() for t in self.reglas[categoria] if t}, key=len, reverse=True)
+            if tokens:
+                patron = '|'.join(re.escape(t) for t in tokens)
+                alternativas.append(f'(?=.*?(?:{patron}))(?P<c{i}>)')
+
+        self._patron_categorias = re.compile('^(?:' + '|'.join(alternativas) + ')', re.DOTALL) if alternativas else None
+
+        sufijos = sorted(self.sufijos, key=len, reverse=True)
+        self._patron_sufijos = re.compile('(?:' + '|'.join(re.escape(s) for s in sufijos) + ')$') if sufijos else None
+
+        self.categorizar = lru_cache(maxsize=self.tamano_memo)(self._categorizar)
+
+    def _categorizar(self, nombre_proceso):
+        if not nombre_proceso or self._patron_categorias is None:
+            return CATEGORIA_DEFECTO
+
+        coincidencia = self._patron_categorias.match(nombre_proceso.lower())
+        if not coincidencia:
+            return CATEGORIA_DEFECTO
+
+        grupo = coincidencia.lastgroup
+        return self.categorias[int(grupo[1:])]
+
+    def normalizar_titulo(self, titulo):
+        """Quita sufijos de aplicación del título y lo trunca"""
+        if not titulo:
+            return "Aplicación Desconocida"
+
+        if self._patron_sufijos is not None:
+            titulo = self._patron_sufijos.sub('', titulo, count=1)
+
+        if len(titulo) > LARGO_MAXIMO_TITULO:
+            titulo = titulo[:LARGO_MAXIMO_TITULO - 3] + "..."
+
+        return titulo
+
+    def agregar_regla(self, categoria, token, guardar=True):
+        """Agrega un token a una categoría (nueva o existente) y recompila"""
+        with self._lock:
+            tokens = self.reglas.setdefault(categoria, [])
+            if token not in tokens:
+                tokens.append(token)
+            self._compilar()
+
+        if guardar:
+            self._guardar_personalizadas()
+
+    def _guardar_personalizadas(self):
+        """Guarda en archivo las reglas que difieren de las predeterminadas"""
+        try:
+            reglas = {}
+            for categoria, tokens in self.reglas.items():
+                extra = [t for t in tokens if t not in CATEGORIAS_DEFAULT.get(categoria, [])]
+                if extra:
+                    reglas[categoria] = extra
+
+            sufijos = [s for s in self.sufijos if s not in SUFIJOS_TITULO_DEFAULT]
+
+            os.makedirs(os.path.dirname(self.archivo), exist_ok=True)
+            with open(self.archivo, 'w', encoding='utf-8') as f:
+                json.dump({'reglas': reglas, 'sufijos': sufijos}, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            print(f"❌ Error guardando categorías personalizadas: {e}")
+
+# Instancia global del motor de categorías
+motor_categorias = MotorCategorias()
+
+if __name__ == "__main__":
+    for proceso in ['chrome.exe', 'Code.exe', 'EXCEL.EXE', 'Spotify.exe', 'desconocido.exe']:
+        print(f"{proceso}: {motor_categorias.categorizar(proceso)}")
+    print(motor_categorias.normalizar_titulo("main.py - timer_work - Visual Studio Code"))
+    print(motor_categorias.categorizar.cache_info())
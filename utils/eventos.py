@@ -0,0 +1,65 @@
+# utils/eventos.py - Bus de eventos para notificar cambios de estado sin sondeo
+
+import threading
+
+class BusEventos:
+    """
+    Publicación/suscripción síncrona por nombre de evento
+
+    Los suscriptores se llaman en el hilo que publica, en orden de suscripción.
+    La lista de suscriptores se reemplaza al modificarse (copia al escribir), así
+    que publicar no toma locks y un suscriptor puede suscribir o desuscribir
+    durante la entrega. El evento '*' recibe todos los eventos.
+    """
+
+    TODOS = '*'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._suscriptores = {}  # evento -> tupla de callbacks
+
+    def suscribir(self, evento, callback):
+        """
+        Registra callback(evento, **datos) para un evento (o '*' para todos)
+
+        Returns:
+            callable: función sin argumentos que cancela la suscripción
+        """
+        with self._lock:
+            self._suscriptores[evento] = self._suscriptores.get(evento, ()) + (callback,)
+        return lambda: self.desuscribir(evento, callback)
+
+    def desuscribir(self, evento, callback):
+        """Quita un callback de un evento; retorna True si estaba suscrito"""
+        with self._lock:
+            actuales = self._suscriptores.get(evento, ())
+            if callback not in actuales:
+                return False
+            restantes = tuple(c for c in actuales if c is not callback)
+            if restantes:
+                self._suscriptores[evento] = restantes
+            else:
+                del self._suscriptores[evento]
+            return True
+
+    def publicar(self, evento, **datos):
+        """Entrega el evento a sus suscriptores y a los de '*'"""
+        callbacks = self._suscriptores.get(evento, ()) + self._suscriptores.get(self.TODOS, ())
+        for callback in callbacks:
+            try:
+                callback(evento, **datos)
+            except Exception as e:
+                print(f"⚠️ Error en suscriptor de '{evento}': {e}")
+
+    def tiene_suscriptores(self, evento):
+        """Indica si alguien escucha el evento (para evitar trabajo si nadie lo hace)"""
+        return bool(self._suscriptores.get(evento) or self._suscriptores.get(self.TODOS))
+
+if __name__ == "__main__":
+    bus = BusEventos()
+    cancelar = bus.suscribir('fase_iniciada', lambda evento, **datos: print(f"{evento}: {datos}"))
+    bus.suscribir('*', lambda evento, **datos: print(f"  (todos) {evento}"))
+
+    bus.publicar('fase_iniciada', fase='trabajo', ciclo=1)
+    cancelar()
+    bus.publicar('fase_iniciada', fase='descanso_corto', ciclo=1)
@@ -14,8 +14,13 @@ try:
 except ImportError:
     print("⚠️ Módulo de base de datos no disponible para exportación")
 
-def generar_reporte_diario(fecha=None, archivo_salida=None):
-    """Genera un reporte PDF de la actividad diaria"""
+def generar_reporte_diario(fecha=None, archivo_salida=None, progreso=None):
+    """
+    Genera un reporte PDF de la actividad diaria
+    
+    Args:
+        progreso: callback opcional progreso(etapa, fraccion) llamado entre etapas
+    """
     if fecha is None:
         fecha = date.today().isoformat()
     
@@ -55,6 +60,9 @@ def generar_reporte_diario(fecha=None, archivo_salida=None):
         except:
             estadisticas = None
         
+        if progreso:
+            progreso('datos', 0.3)
+        
         if estadisticas:
             # Sección de resumen general
             story.append(Paragraph("🎯 RESUMEN GENERAL", styles['Heading2']))
@@ -62,9 +70,9 @@ def generar_reporte_diario(fecha=None, archivo_salida=None):
             resumen_data = [
                 ['Métrica', 'Valor'],
                 ['Tiempo total activo', f"{(estadisticas['estadisticas_generales'][2] or 0) // 3600}h {((estadisticas['estadisticas_generales'][2] or 0) % 3600) // 60}m"],
-                ['Pomodoros completados', str(estadisticas['estadisticas_generales'][5] or 0)],
-                ['Objetivos completados', str(estadisticas['estadisticas_generales'][6] or 0)],
-                ['Aplicación principal', estadisticas['estadisticas_generales'][7] or 'N/A']
+                ['Pomodoros completados', str(estadisticas['resumen_pomodoro']['completados'])],
+                ['Objetivos completados', str(estadisticas['estadisticas_generales'][7] or 0)],
+                ['Aplicación principal', estadisticas['estadisticas_generales'][8] or 'N/A']
             ]
             
             tabla_resumen = Table(resumen_data)
@@ -154,6 +162,8 @@ def generar_reporte_diario(fecha=None, archivo_salida=None):
         story.append(pie_pagina)
         
         # Construir PDF
+        if progreso:
+            progreso('construyendo', 0.6)
         doc.build(story)
         
         print(f"✅ Reporte PDF generado: {archivo_salida}")
@@ -163,8 +173,13 @@ def generar_reporte_diario(fecha=None, archivo_salida=None):
         print(f"❌ Error al generar reporte PDF: {e}")
         return None
 
-def generar_reporte_semanal(archivo_salida=None):
-    """Genera un reporte PDF de la actividad semanal"""
+def generar_reporte_semanal(archivo_salida=None, progreso=None):
+    """
+    Genera un reporte PDF de la actividad semanal
+    
+    Args:
+        progreso: callback opcional progreso(etapa, fraccion) llamado entre etapas
+    """
     if archivo_salida is None:
         fecha_actual = date.today().isoformat()
         archivo_salida = f'storage/reporte_semanal_{fecha_actual}.pdf'
@@ -186,6 +201,9 @@ def generar_reporte_semanal(archivo_salida=None):
         except:
             datos_semanales = []
         
+        if progreso:
+            progreso('datos', 0.3)
+        
         if datos_semanales:
             # Tabla de resumen semanal
             story.append(Paragraph("📊 RESUMEN DE LOS ÚLTIMOS 7 DÍAS", styles['Heading2']))
@@ -267,6 +285,8 @@ def generar_reporte_semanal(archivo_salida=None):
         story.append(pie_pagina)
         
         # Construir PDF
+        if progreso:
+            progreso('construyendo', 0.6)
         doc.build(story)
         
         print(f"✅ Reporte semanal PDF generado: {archivo_salida}")
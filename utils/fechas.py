@@ -0,0 +1,52 @@
+# utils/fechas.py - Partición por día local para todas las escrituras
+
+from datetime import datetime, date, time as hora_del_dia, timedelta
+import time
+
+def fecha_local(momento=None):
+    """
+    Clave de partición diaria (YYYY-MM-DD en hora local) de un instante
+
+    Args:
+        momento: timestamp epoch, datetime o date (None = ahora)
+    """
+    if momento is None:
+        return date.today().isoformat()
+    if isinstance(momento, datetime):
+        return momento.date().isoformat()
+    if isinstance(momento, date):
+        return momento.isoformat()
+    return datetime.fromtimestamp(momento).date().isoformat()
+
+def fecha_hoy():
+    """Fecha local de hoy (YYYY-MM-DD)"""
+    return fecha_local()
+
+def fecha_hace_dias(dias, desde=None):
+    """Fecha local de hace 'dias' días respecto de 'desde' (None = hoy)"""
+    base = date.fromisoformat(fecha_local(desde))
+    return (base - timedelta(days=dias)).isoformat()
+
+def medianoche_siguiente(momento):
+    """Timestamp epoch de la próxima medianoche local posterior a 'momento'"""
+    dia_siguiente = datetime.fromtimestamp(momento).date() + timedelta(days=1)
+    return datetime.combine(dia_siguiente, hora_del_dia()).timestamp()
+
+def partir_por_dia(inicio, fin):
+    """
+    Parte [inicio, fin) (timestamps epoch) en las medianoches locales
+
+    Returns:
+        list: tuplas (fecha, inicio, fin), una por día tocado por el intervalo
+    """
+    partes = []
+    while inicio < fin:
+        corte = min(fin, medianoche_siguiente(inicio))
+        partes.append((fecha_local(inicio), inicio, corte))
+        inicio = corte
+    return partes
+
+if __name__ == "__main__":
+    ahora = time.time()
+    for fecha, inicio, fin in partir_por_dia(ahora - 36 * 3600, ahora):
+        print(f"{fecha}: {(fin - inicio) / 3600:.2f} h")
@@ -6,6 +6,7 @@ import json
 import time
 from datetime import datetime, timedelta
 import threading
+from utils.planificador import planificador
 
 def formatear_tiempo(segundos):
     """Convierte segundos a formato legible (ej: 2h 30m 15s)"""
@@ -67,59 +68,19 @@ def calcular_productividad(tiempo_activo, tiempo_total):
 
 def limpiar_nombre_aplicacion(nombre_ventana):
     """Limpia y normaliza el nombre de una aplicación"""
-    if not nombre_ventana:
-        return "Aplicación Desconocida"
-    
-    # Remover sufijos comunes de ventanas
-    sufijos_remover = [
-        " - Google Chrome",
-        " - Mozilla Firefox",
-        " - Microsoft Edge",
-        " - Visual Studio Code",
-        " - Notepad++",
-        " - Word",
-        " - Excel",
-        " - PowerPoint"
-    ]
-    
-    nombre_limpio = nombre_ventana
-    for sufijo in sufijos_remover:
-        if nombre_limpio.endswith(sufijo):
-            nombre_limpio = nombre_limpio[:-len(sufijo)]
-            break
-    
-    # Truncar si es muy largo
-    if len(nombre_limpio) > 50:
-        nombre_limpio = nombre_limpio[:47] + "..."
-    
-    return nombre_limpio
+    from utils.categorias import motor_categorias
+    return motor_categorias.normalizar_titulo(nombre_ventana)
 
 def categorizar_aplicacion(nombre_proceso):
     """Categoriza una aplicación según su tipo"""
-    nombre_proceso = nombre_proceso.lower()
-    
-    categorias = {
-        'navegador': ['chrome', 'firefox', 'edge', 'safari', 'opera', 'brave'],
-        'desarrollo': ['code', 'pycharm', 'intellij', 'eclipse', 'atom', 'sublime'],
-        'oficina': ['winword', 'excel', 'powerpnt', 'outlook', 'notepad'],
-        'comunicacion': ['teams', 'zoom', 'skype', 'slack', 'discord', 'whatsapp'],
-        'multimedia': ['vlc', 'spotify', 'iTunes', 'photoshop', 'premiere'],
-        'juegos': ['steam', 'origin', 'epicgames', 'minecraft'],
-        'sistema': ['explorer', 'taskmgr', 'settings', 'control'],
-    }
-    
-    for categoria, procesos in categorias.items():
-        if any(proceso in nombre_proceso for proceso in procesos):
-            return categoria
-    
-    return 'otros'
+    from utils.categorias import motor_categorias
+    return motor_categorias.categorizar(nombre_proceso)
 
 def validar_configuracion():
     """Valida que todas las dependencias estén instaladas"""
     dependencias = [
         'pynput',
         'pywin32', 
-        'schedule',
         'plyer',
         'psutil',
         'reportlab'
@@ -168,6 +129,23 @@ def crear_backup_configuracion():
         print(f"❌ Error al crear backup: {e}")
         return None
 
+def guardar_json_atomico(ruta, datos):
+    """
+    Escribe JSON de forma atómica: archivo temporal en el mismo directorio y os.replace
+
+    Un corte a mitad de escritura deja el archivo anterior intacto, nunca uno truncado.
+    """
+    directorio = os.path.dirname(ruta) or '.'
+    os.makedirs(directorio, exist_ok=True)
+    temporal = f"{ruta}.tmp"
+    
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    
+    os.replace(temporal, ruta)
+
 def monitorear_memoria():
     """Monitorea el uso de memoria del proceso actual"""
     try:
@@ -203,30 +181,50 @@ def configurar_logging():
     return logging.getLogger(__name__)
 
 class TemporizadorPersonalizado:
-    """Clase para crear temporizadores personalizados"""
+    """Clase para crear temporizadores personalizados (sobre el planificador de plazos compartido)"""
     
     def __init__(self, duracion_segundos, callback=None):
         self.duracion = duracion_segundos
         self.callback = callback
         self.activo = False
-        self.hilo = None
+        self._tarea = None
     
     def iniciar(self):
         """Inicia el temporizador"""
         if not self.activo:
             self.activo = True
-            self.hilo = threading.Thread(target=self._ejecutar, daemon=True)
-            self.hilo.start()
+            self._tarea = planificador.programar(self.duracion, self._ejecutar)
     
     def detener(self):
         """Detiene el temporizador"""
         self.activo = False
+        if self._tarea is not None:
+            planificador.cancelar(self._tarea)
+            self._tarea = None
+    
+    def pausar(self):
+        """Pausa el temporizador conservando el tiempo restante"""
+        if self.activo and self._tarea is not None:
+            planificador.pausar(self._tarea)
+    
+    def reanudar(self):
+        """Reanuda el temporizador pausado"""
+        if self.activo and self._tarea is not None:
+            planificador.reanudar(self._tarea)
+    
+    def tiempo_restante(self):
+        """Segundos restantes, o 0 si no está activo"""
+        if self._tarea is None:
+            return 0
+        return planificador.restante(self._tarea) or 0
     
     def _ejecutar(self):
-        """Ejecuta el temporizador"""
-        time.sleep(self.duracion)
-        if self.activo and self.callback:
-            self.callback()
+        """Callback del planificador al vencer el plazo"""
+        self._tarea = None
+        if self.activo:
+            self.activo = False
+            if self.callback:
+                self.callback()
 
 def verificar_permisos_admin():
     """Verifica si el script tiene permisos de administrador (necesario para ciertos monitoreos)"""
@@ -268,9 +266,9 @@ def generar_estadisticas_rapidas():
             print("\n📊 ESTADÍSTICAS RÁPIDAS DE HOY:")
             print("=" * 40)
             print(f"⏱️  Tiempo activo: {formatear_tiempo(data[2] or 0)}")
-            print(f"🍅 Pomodoros: {data[5] or 0}")
-            print(f"🎯 Objetivos completados: {data[6] or 0}")
-            print(f"💻 App principal: {data[7] or 'N/A'}")
+            print(f"🍅 Pomodoros: {data[6] or 0}")
+            print(f"🎯 Objetivos completados: {data[7] or 0}")
+            print(f"💻 App principal: {data[8] or 'N/A'}")
             print("=" * 40)
         else:
             print("📊 No hay estadísticas disponibles aún")
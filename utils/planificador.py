@@ -0,0 +1,204 @@
+# utils/planificador.py - Motor de plazos compartido para temporizadores
+
+import heapq
+import itertools
+import threading
+import time
+from utils.reloj import RELOJ_SISTEMA
+
+class PlanificadorPlazos:
+    """
+    Un solo hilo para todos los temporizadores del sistema
+
+    Los plazos se guardan en un heap ordenado por reloj monotónico y el hilo
+    duerme en una Condition hasta el plazo más próximo o hasta que llega un
+    comando (programar, cancelar, pausar, reanudar). Al pausar se guarda el tiempo
+    restante exacto, así que pausar y reanudar no acumula deriva.
+
+    Las esperas de Condition no cuentan el tiempo de suspensión del equipo, así
+    que nunca se duerme más de ESPERA_MAXIMA: al volver de una suspensión los
+    plazos vencidos se disparan en a lo sumo ese tiempo.
+
+    Con un RelojSimulado no hay hilo: el reloj llama a ejecutar_vencidas() al avanzar.
+    """
+
+    ESPERA_MAXIMA = 60
+
+    def __init__(self, reloj=None):
+        self.reloj = reloj or RELOJ_SISTEMA
+        self._reloj = self.reloj.monotonico
+        self._condicion = threading.Condition()
+        self._heap = []       # (plazo, secuencia, id_tarea); entradas viejas se descartan al salir
+        self._tareas = {}     # id_tarea -> {'callback', 'plazo', 'restante', 'secuencia'}
+        self._ids = itertools.count(1)
+        self._secuencias = itertools.count()
+        self._hilo = None
+        self._detenido = False
+
+        if self.reloj.simulado:
+            self.reloj.registrar_planificador(self)
+
+    def programar(self, segundos, callback):
+        """Programa callback() dentro de 'segundos'; retorna el id de la tarea"""
+        with self._condicion:
+            id_tarea = next(self._ids)
+            self._tareas[id_tarea] = {'callback': callback, 'plazo': None, 'restante': None, 'secuencia': None}
+            self._activar(id_tarea, self._reloj() + max(0.0, segundos))
+            self._asegurar_hilo()
+            return id_tarea
+
+    def cancelar(self, id_tarea):
+        """Cancela una tarea pendiente o pausada; retorna True si existía"""
+        with self._condicion:
+            existia = self._tareas.pop(id_tarea, None) is not None
+            self._condicion.notify()
+            return existia
+
+    def pausar(self, id_tarea):
+        """Congela el tiempo restante de una tarea; retorna True si quedó pausada"""
+        with self._condicion:
+            tarea = self._tareas.get(id_tarea)
+            if tarea is None or tarea['plazo'] is None:
+                return False
+
+            tarea['restante'] = max(0.0, tarea['plazo'] - self._reloj())
+            tarea['plazo'] = None
+            tarea['secuencia'] = None
+            self._condicion.notify()
+            return True
+
+    def reanudar(self, id_tarea):
+        """Reanuda una tarea pausada con el tiempo que le quedaba; retorna True si se reanudó"""
+        with self._condicion:
+            tarea = self._tareas.get(id_tarea)
+            if tarea is None or tarea['plazo'] is not None:
+                return False
+
+            self._activar(id_tarea, self._reloj() + tarea['restante'])
+            return True
+
+    def restante(self, id_tarea):
+        """Segundos que le quedan a una tarea, o None si ya no existe"""
+        with self._condicion:
+            tarea = self._tareas.get(id_tarea)
+            if tarea is None:
+                return None
+            if tarea['plazo'] is None:
+                return tarea['restante']
+            return max(0.0, tarea['plazo'] - self._reloj())
+
+    def esta_pausada(self, id_tarea):
+        """Indica si la tarea existe y está pausada"""
+        with self._condicion:
+            tarea = self._tareas.get(id_tarea)
+            return tarea is not None and tarea['plazo'] is None
+
+    def detener(self):
+        """Detiene el hilo; las tareas pendientes no se ejecutan"""
+        with self._condicion:
+            self._detenido = True
+            self._tareas.clear()
+            self._heap.clear()
+            self._condicion.notify()
+
+    def _activar(self, id_tarea, plazo):
+        tarea = self._tareas[id_tarea]
+        tarea['plazo'] = plazo
+        tarea['restante'] = None
+        tarea['secuencia'] = next(self._secuencias)
+        heapq.heappush(self._heap, (plazo, tarea['secuencia'], id_tarea))
+
+        # Pausas y cancelaciones dejan entradas viejas; se compacta si dominan el heap
+        if len(self._heap) > 2 * len(self._tareas) + 16:
+            self._heap = [entrada for entrada in self._heap if self._entrada_valida(entrada)]
+            heapq.heapify(self._heap)
+
+        self._condicion.notify()
+
+    def _entrada_valida(self, entrada):
+        tarea = self._tareas.get(entrada[2])
+        return tarea is not None and tarea['secuencia'] == entrada[1]
+
+    def proximo_plazo(self):
+        """Instante (en el reloj monotónico) de la próxima tarea activa, o None"""
+        with self._condicion:
+            self._descartar_viejas()
+            return self._heap[0][0] if self._heap else None
+
+    def ejecutar_vencidas(self):
+        """Ejecuta ya las tareas vencidas (lo usa el reloj simulado en lugar del hilo)"""
+        with self._condicion:
+            vencidas = self._tomar_vencidas()
+        self._ejecutar_callbacks(vencidas)
+
+    def _descartar_viejas(self):
+        while self._heap and not self._entrada_valida(self._heap[0]):
+            heapq.heappop(self._heap)
+
+    def _tomar_vencidas(self):
+        """Saca del heap las tareas cuyo plazo ya pasó (con el lock tomado)"""
+        vencidas = []
+        ahora = self._reloj()
+        while self._heap and self._heap[0][0] <= ahora:
+            entrada = heapq.heappop(self._heap)
+            if self._entrada_valida(entrada):
+                vencidas.append(self._tareas.pop(entrada[2])['callback'])
+        return vencidas
+
+    def _ejecutar_callbacks(self, vencidas):
+        # Los callbacks corren fuera del lock: pueden programar o cancelar otras tareas
+        for callback in vencidas:
+            try:
+                callback()
+            except Exception as e:
+                print(f"⚠️ Error en tarea programada: {e}")
+
+    def _asegurar_hilo(self):
+        if self.reloj.simulado:
+            return
+        if self._hilo is None or not self._hilo.is_alive():
+            self._detenido = False
+            self._hilo = threading.Thread(target=self._ejecutar, name="planificador-plazos", daemon=True)
+            self._hilo.start()
+
+    def _ejecutar(self):
+        while True:
+            with self._condicion:
+                vencidas = []
+                while not vencidas:
+                    if self._detenido:
+                        return
+
+                    self._descartar_viejas()
+
+                    if not self._heap:
+                        self._condicion.wait()
+                        continue
+
+                    espera = self._heap[0][0] - self._reloj()
+                    if espera > 0:
+                        self._condicion.wait(min(espera, self.ESPERA_MAXIMA))
+                        continue
+
+                    vencidas = self._tomar_vencidas()
+
+            self._ejecutar_callbacks(vencidas)
+
+# Instancia global compartida por los temporizadores
+planificador = PlanificadorPlazos()
+
+if __name__ == "__main__":
+    inicio = time.monotonic()
+    listo = threading.Event()
+
+    def fin():
+        print(f"Plazo cumplido a los {time.monotonic() - inicio:.2f} s (esperado 2.00: 0.5 + 1.0 en pausa + 0.5)")
+        listo.set()
+
+    tarea = planificador.programar(1.0, fin)
+    time.sleep(0.5)
+    planificador.pausar(tarea)
+    print(f"Pausada con {planificador.restante(tarea):.2f} s restantes")
+    time.sleep(1.0)
+    planificador.reanudar(tarea)
+    listo.wait()
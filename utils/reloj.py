@@ -0,0 +1,86 @@
+# utils/reloj.py - Reloj inyectable: el del sistema o uno simulado para pruebas
+
+import threading
+import time
+
+def _monotonico_con_suspension():
+    """Reloj monotónico que sigue avanzando mientras el equipo está suspendido, si el SO lo ofrece"""
+    if hasattr(time, 'CLOCK_BOOTTIME'):
+        try:
+            time.clock_gettime(time.CLOCK_BOOTTIME)
+            return lambda: time.clock_gettime(time.CLOCK_BOOTTIME)
+        except OSError:
+            pass
+    return time.monotonic
+
+class Reloj:
+    """Reloj del sistema: hora de pared, reloj monotónico y espera real"""
+
+    simulado = False
+
+    def __init__(self):
+        self.monotonico = _monotonico_con_suspension()
+
+    def ahora(self):
+        """Timestamp epoch de pared"""
+        return time.time()
+
+    def dormir(self, segundos):
+        time.sleep(segundos)
+
+class RelojSimulado(Reloj):
+    """
+    Reloj que solo avanza cuando se le pide
+
+    Hora de pared y monotónica son el mismo número. Los planificadores de plazos
+    creados con este reloj no tienen hilo: avanzar() los lleva plazo por plazo y
+    ejecuta cada tarea en su instante exacto, así que una jornada entera corre en
+    milisegundos y siempre en el mismo orden.
+    """
+
+    simulado = True
+
+    def __init__(self, inicio=None):
+        self._ahora = float(inicio if inicio is not None else time.time())
+        self._planificadores = []
+        self._lock = threading.RLock()
+
+    def ahora(self):
+        return self._ahora
+
+    def monotonico(self):
+        return self._ahora
+
+    def dormir(self, segundos):
+        self.avanzar(segundos)
+
+    def registrar_planificador(self, planificador):
+        """Llamado por PlanificadorPlazos al construirse con este reloj"""
+        self._planificadores.append(planificador)
+
+    def avanzar(self, segundos):
+        """Adelanta el reloj 'segundos', disparando en orden los plazos vencidos en el camino"""
+        self.avanzar_hasta(self._ahora + segundos)
+
+    def avanzar_hasta(self, momento):
+        """Adelanta el reloj hasta 'momento' (timestamp epoch)"""
+        with self._lock:
+            while True:
+                plazos = [p.proximo_plazo() for p in self._planificadores]
+                plazos = [plazo for plazo in plazos if plazo is not None and plazo <= momento]
+                if not plazos:
+                    break
+
+                self._ahora = max(self._ahora, min(plazos))
+                for planificador in self._planificadores:
+                    planificador.ejecutar_vencidas()
+
+            self._ahora = max(self._ahora, momento)
+
+# Reloj por defecto de todos los componentes
+RELOJ_SISTEMA = Reloj()
+
+if __name__ == "__main__":
+    reloj = RelojSimulado(inicio=0)
+    reloj.avanzar(8 * 3600)
+    print(f"Reloj simulado tras una jornada: {reloj.ahora() / 3600:.0f} h")
@@ -0,0 +1,174 @@
+# utils/simulacion.py - Jornada de trabajo simulada y determinista sobre un RelojSimulado
+
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from utils.reloj import RelojSimulado, RELOJ_SISTEMA
+from utils.planificador import PlanificadorPlazos
+from utils.fechas import fecha_local
+
+# Aplicaciones entre las que alterna el usuario simulado: (título, proceso)
+APLICACIONES_SIMULADAS = [
+    ("main.py - Visual Studio Code", "code.exe"),
+    ("Documentación de Python - Google Chrome", "chrome.exe"),
+    ("Bandeja de entrada - Outlook", "outlook.exe"),
+    ("Terminal", "windowsterminal.exe"),
+    ("General - Slack", "slack.exe"),
+]
+
+class NotificadorSilencioso:
+    """Notificador del Pomodoro que solo cuenta las notificaciones en lugar de mostrarlas"""
+
+    def __init__(self):
+        self.conteo = defaultdict(int)
+
+    def __getattr__(self, nombre):
+        if not nombre.startswith('mostrar_'):
+            raise AttributeError(nombre)
+
+        def notificar(*args, **kwargs):
+            self.conteo[nombre] += 1
+        return notificar
+
+def simular_jornada(semilla=0, horas=8, inicio=None, directorio=None, silencioso=True, adaptativo=False):
+    """
+    Simula una jornada completa en milisegundos: Pomodoro, cambios de ventana e inactividad
+
+    Todos los componentes comparten un RelojSimulado, así que la misma semilla
+    produce siempre la misma jornada (mismos spans, mismas fases y mismas pausas).
+    La base de datos, el log y el estado del Pomodoro van a un directorio temporal.
+
+    Args:
+        semilla (int): semilla del generador de la jornada
+        horas (float): duración de la jornada simulada
+        inicio (float): timestamp epoch de inicio (por defecto hoy a las 9:00)
+        directorio (str): directorio para los archivos de la simulación (por defecto uno temporal)
+        silencioso (bool): oculta la salida por consola de los componentes
+        adaptativo (bool): usa el modo adaptativo del Pomodoro
+
+    Returns:
+        dict: pomodoros, tiempo activo por aplicación, tiempo inactivo y duración real
+    """
+    import storage.database as database
+    import monitor.logger as logger
+    import monitor.inactividad as inactividad
+    from monitor.proveedores_inactividad import ProveedorInactividadFalso
+    from monitor.ventana_activa import MonitorVentanas, SnapshotVentana
+    from pomodoro.temporizador import PomodoroTimer
+
+    rng = random.Random(semilla)
+    if inicio is None:
+        inicio = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0).timestamp()
+    fin = inicio + horas * 3600
+    directorio = directorio or tempfile.mkdtemp(prefix='simulacion_')
+
+    reloj = RelojSimulado(inicio)
+    planificador_sim = PlanificadorPlazos(reloj)
+    proveedor = ProveedorInactividadFalso(reloj.ahora)
+    ventana = {'snapshot': SnapshotVentana(None, "", None, None)}
+
+    # Estado global que la simulación reemplaza y restaura al terminar
+    anteriores = (logger.LOG_FILE, inactividad.proveedor_activo)
+    base_anterior = None
+    salida = io.StringIO() if silencioso else None
+    inicio_real = time.perf_counter()
+
+    with contextlib.redirect_stdout(salida) if silencioso else contextlib.nullcontext():
+        try:
+            base_anterior = database.usar_base_datos(os.path.join(directorio, 'actividad.db'))
+            logger.LOG_FILE = os.path.join(directorio, 'log_actividad.csv')
+            database.inicializar_db()
+            logger.inicializar_log()
+
+            inactividad.establecer_reloj(reloj)
+            inactividad.proveedor_activo = proveedor
+            detector = inactividad.DetectorInactividad()
+
+            pomodoro = PomodoroTimer(
+                archivo_estado=os.path.join(directorio, 'estado_pomodoro.json'),
+                reloj=reloj,
+                planificador_plazos=planificador_sim,
+                notificador=NotificadorSilencioso()
+            )
+            pomodoro.configurar_tiempos(adaptativo=adaptativo)
+            inactividad.suscribir_inactividad(pomodoro.registrar_cambio_inactividad)
+            monitor = MonitorVentanas(reloj=reloj, leer_snapshot=lambda: ventana['snapshot'])
+
+            pomodoro.iniciar()
+
+            while reloj.ahora() < fin:
+                # Un tramo: una aplicación en primer plano, a veces con el usuario ausente
+                titulo, proceso = rng.choice(APLICACIONES_SIMULADAS)
+                ventana['snapshot'] = SnapshotVentana(rng.randint(1, 10**6), titulo, rng.randint(100, 9999), proceso)
+                ausente = rng.random() < 0.15
+                duracion = rng.uniform(2 * inactividad.TIEMPO_INACTIVIDAD, 40 * 60) if ausente else rng.uniform(30, 20 * 60)
+                fin_tramo = min(fin, reloj.ahora() + duracion)
+
+                proveedor.registrar_entrada()
+                monitor.muestrear(cambio_notificado=True)
+
+                while reloj.ahora() < fin_tramo:
+                    if not ausente:
+                        proveedor.registrar_entrada()
+                    detector.verificar()
+                    monitor.muestrear()
+                    reloj.avanzar(min(inactividad.INTERVALO_VERIFICACION, fin_tramo - reloj.ahora()))
+
+            proveedor.registrar_entrada()
+            detector.verificar()
+            pomodoro.detener()
+            monitor.detener()
+            inactividad.desuscribir_inactividad(monitor.union_inactividad.registrar_cambio)
+            inactividad.desuscribir_inactividad(pomodoro.registrar_cambio_inactividad)
+
+            resumen = _resumir_jornada(database, inicio, fin)
+        finally:
+            if base_anterior is not None:
+                database.usar_base_datos(base_anterior)
+            logger.LOG_FILE, inactividad.proveedor_activo = anteriores
+            inactividad.establecer_reloj(RELOJ_SISTEMA)
+
+    resumen['semilla'] = semilla
+    resumen['directorio'] = directorio
+    resumen['duracion_real_ms'] = (time.perf_counter() - inicio_real) * 1000
+    return resumen
+
+def _resumir_jornada(database, inicio, fin):
+    """Lee de la base de la simulación lo que quedó registrado"""
+    activo_por_aplicacion = defaultdict(float)
+    total_ms = 0
+    activo_ms = 0
+
+    for inicio_ms, fin_ms, aplicacion, _, _, activo in database.obtener_spans_ventana(inicio, fin):
+        total_ms += fin_ms - inicio_ms
+        activo_ms += activo
+        activo_por_aplicacion[aplicacion] += activo / 1000
+
+    resumen_pomodoro = database.obtener_resumen_pomodoro(fecha_local(inicio))
+
+    return {
+        'pomodoros_completados': resumen_pomodoro['completados'],
+        'pomodoros_interrumpidos': resumen_pomodoro['interrumpidos'],
+        'minutos_foco': resumen_pomodoro['minutos_foco'],
+        'tiempo_por_aplicacion': dict(sorted(activo_por_aplicacion.items(), key=lambda x: -x[1])),
+        'segundos_activos': activo_ms / 1000,
+        'segundos_inactivos': (total_ms - activo_ms) / 1000,
+    }
+
+if __name__ == "__main__":
+    from utils.helpers import formatear_tiempo
+
+    resumen = simular_jornada(semilla=42)
+    print(f"🧪 Jornada simulada (semilla {resumen['semilla']}) en {resumen['duracion_real_ms']:.0f} ms reales")
+    print(f"🍅 Pomodoros: {resumen['pomodoros_completados']} completados, "
+          f"{resumen['pomodoros_interrumpidos']} interrumpidos ({resumen['minutos_foco']:.0f} min de foco)")
+    print(f"⏱️  Activo: {formatear_tiempo(resumen['segundos_activos'])} - "
+          f"Inactivo: {formatear_tiempo(resumen['segundos_inactivos'])}")
+    for aplicacion, segundos in resumen['tiempo_por_aplicacion'].items():
+        print(f"   💻 {aplicacion}: {formatear_tiempo(segundos)}")